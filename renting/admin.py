@@ -1,10 +1,16 @@
 import csv
+from datetime import timedelta
+from decimal import Decimal
+from django import forms
 from django.http import HttpResponse
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.contrib.admin.helpers import ActionForm
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from django.utils.html import format_html_join
+from . import price_calendar
 from .models import (
     AppUser, VehicleType, Brand, FuelType, Color, Transmission,
-    CarModel, Car, Reservation
+    CarModel, Car, PricingRule, Reservation, ArchivedReservation
 )
 
 
@@ -126,6 +132,89 @@ class AppUserAdmin(BaseUserAdmin):
     filter_horizontal = ('groups', 'user_permissions')
 
 
+# ============================================
+# Price Calendar Bulk Edit
+# ============================================
+
+
+class CalendarPriceForm(forms.Form):
+    """Date range and price of a price calendar bulk edit"""
+    calendar_from = forms.DateField(required=False, label='From', widget=forms.DateInput(attrs={'type': 'date'}))
+    calendar_to = forms.DateField(required=False, label='To', widget=forms.DateInput(attrs={'type': 'date'}))
+    calendar_price = forms.DecimalField(
+        required=False, label='Price', max_digits=10, decimal_places=2, min_value=Decimal('0.01')
+    )
+    calendar_percent = forms.DecimalField(
+        required=False, label='% vs daily price', max_digits=5, decimal_places=2, min_value=-90, max_value=500
+    )
+
+    def clean(self):
+        """Both dates within the calendar horizon; a fixed price or a percentage, not both"""
+        cleaned_data = super().clean()
+        start, end = cleaned_data.get('calendar_from'), cleaned_data.get('calendar_to')
+        if not start or not end:
+            raise forms.ValidationError("Enter both calendar dates.")
+        first, last = price_calendar.horizon()
+        if start > end:
+            raise forms.ValidationError("The end date must be equal to or later than the start date.")
+        if start < first or end > last:
+            raise forms.ValidationError(f"Calendar dates must be between {first} and {last}.")
+        if cleaned_data.get('calendar_price') is not None and cleaned_data.get('calendar_percent') is not None:
+            raise forms.ValidationError("Enter a price or a percentage, not both.")
+        return cleaned_data
+
+
+class CarModelActionForm(ActionForm):
+    """Actions bar with the calendar fields; only the calendar actions validate them"""
+    calendar_from = CalendarPriceForm.base_fields['calendar_from']
+    calendar_to = CalendarPriceForm.base_fields['calendar_to']
+    calendar_price = CalendarPriceForm.base_fields['calendar_price']
+    calendar_percent = CalendarPriceForm.base_fields['calendar_percent']
+
+
+def _calendar_form(modeladmin, request):
+    """Validated CalendarPriceForm from the actions bar, or None after reporting the errors"""
+    form = CalendarPriceForm(request.POST)
+    if form.is_valid():
+        return form.cleaned_data
+    errors = [error for field_errors in form.errors.values() for error in field_errors]
+    modeladmin.message_user(request, ' '.join(errors), messages.ERROR)
+    return None
+
+
+@admin.action(description="Set calendar prices (dates and price or percentage below)")
+def set_calendar_prices(modeladmin, request, queryset):
+    """Fixed price or percentage of each model's daily price for every day of the range"""
+    data = _calendar_form(modeladmin, request)
+    if data is None:
+        return
+    if data['calendar_price'] is None and data['calendar_percent'] is None:
+        modeladmin.message_user(request, "Enter a price or a percentage.", messages.ERROR)
+        return
+    car_models = list(queryset)
+    price_calendar.set_prices(
+        car_models, data['calendar_from'], data['calendar_to'],
+        price=data['calendar_price'], percent=data['calendar_percent'],
+    )
+    modeladmin.message_user(
+        request, f"Calendar prices set for {len(car_models)} model(s) "
+                 f"from {data['calendar_from']} to {data['calendar_to']}."
+    )
+
+
+@admin.action(description="Reset calendar prices to the daily price (dates below)")
+def clear_calendar_prices(modeladmin, request, queryset):
+    data = _calendar_form(modeladmin, request)
+    if data is None:
+        return
+    car_models = list(queryset)
+    price_calendar.set_prices(car_models, data['calendar_from'], data['calendar_to'])
+    modeladmin.message_user(
+        request, f"Calendar prices reset for {len(car_models)} model(s) "
+                 f"from {data['calendar_from']} to {data['calendar_to']}."
+    )
+
+
 @admin.register(CarModel)
 class CarModelAdmin(admin.ModelAdmin):
     """
@@ -136,7 +225,8 @@ class CarModelAdmin(admin.ModelAdmin):
     list_filter = ['brand', 'vehicle_type', 'fuel_type', 'transmission']
     search_fields = ['model_name', 'brand__name']
     ordering = ['brand__name', 'model_name']
-    actions = [export_as_csv]
+    actions = [export_as_csv, set_calendar_prices, clear_calendar_prices]
+    action_form = CarModelActionForm
     
     fieldsets = (
         ('Basic Information', {
@@ -146,10 +236,23 @@ class CarModelAdmin(admin.ModelAdmin):
             'fields': ('vehicle_type', 'fuel_type', 'transmission', 'seats')
         }),
         ('Pricing', {
-            'fields': ('daily_price',),
-            'description': 'Daily rental price (must be positive)'
+            'fields': ('daily_price', 'upcoming_prices'),
+            'description': 'Daily rental price (must be positive). Per-day prices are '
+                           'bulk edited from the list with the calendar actions'
         }),
     )
+    readonly_fields = ['upcoming_prices']
+
+    @admin.display(description='Next 14 days')
+    def upcoming_prices(self, obj):
+        """Calendar prices of the coming days (daily price where none is set)"""
+        if obj.pk is None or obj.daily_price is None:
+            return '-'
+        first, _ = price_calendar.horizon()
+        prices = price_calendar.calendar_cache.get().day_prices(
+            obj.pk, obj.daily_price, first, first + timedelta(days=13)
+        )
+        return format_html_join(', ', '{}: {}', ((day.strftime('%d/%m'), price) for day, price in prices))
 
 
 @admin.register(Car)
@@ -175,6 +278,43 @@ class CarAdmin(admin.ModelAdmin):
     )
 
 
+@admin.register(PricingRule)
+class PricingRuleAdmin(admin.ModelAdmin):
+    """
+    Pricing rules applied to quotes and new reservations.
+    Saved rules take effect at once: every worker recompiles its table.
+    """
+    list_display = ['name', 'kind', 'multiplier', 'coverage', 'min_age', 'max_age',
+                    'start_date', 'end_date', 'min_days', 'vehicle_type', 'is_active']
+    list_filter = ['kind', 'is_active', 'vehicle_type']
+    list_editable = ['multiplier', 'is_active']
+    search_fields = ['name', 'coverage']
+    ordering = ['kind', 'name']
+    actions = [export_as_csv]
+
+    fieldsets = (
+        ('Rule', {
+            'fields': ('name', 'kind', 'multiplier', 'is_active')
+        }),
+        ('Driver Age', {
+            'fields': ('coverage', 'min_age', 'max_age'),
+            'description': 'The multiplier is the rate stored on the reservation. '
+                           'Active age rules replace the built-in bands'
+        }),
+        ('Season', {
+            'fields': ('start_date', 'end_date'),
+            'description': 'Applies to each rental day between both dates'
+        }),
+        ('Long Rental', {
+            'fields': ('min_days',),
+            'description': 'Only the longest tier reached applies'
+        }),
+        ('Vehicle Type', {
+            'fields': ('vehicle_type',)
+        }),
+    )
+
+
 @admin.register(Reservation)
 class ReservationAdmin(admin.ModelAdmin):
     """
@@ -198,8 +338,29 @@ class ReservationAdmin(admin.ModelAdmin):
         }),
         ('Auto-Calculated Fields', {
             'fields': ('coverage', 'rate', 'total_price'),
-            'description': 'These fields are calculated automatically based on user age and duration'
+            'description': 'These fields are calculated automatically from the pricing rules'
         }),
     )
     
     readonly_fields = ['coverage', 'rate', 'total_price']  # Auto-calculated fields
+
+
+@admin.register(ArchivedReservation)
+class ArchivedReservationAdmin(admin.ModelAdmin):
+    """
+    Read-only view of reservations moved out of the live table
+    (`manage.py archive_reservations`), with the same columns and filters.
+    """
+    list_display = ['id', 'user', 'car', 'start_date', 'end_date', 'coverage', 'rate', 'total_price', 'archived_at']
+    list_filter = ['start_date', 'coverage']
+    search_fields = ['user__email', 'car__license_plate']
+    ordering = ['-start_date']
+    date_hierarchy = 'start_date'
+    list_select_related = ['user', 'car']
+    actions = [export_as_csv]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
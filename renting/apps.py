@@ -5,3 +5,7 @@ class RentingConfig(AppConfig):
     """Configuration for the Renting application"""
     name = "renting"
     verbose_name = "Renting"  # Optional: better display name in admin
+
+    def ready(self):
+        # Register model signal handlers
+        from . import signals  # noqa: F401
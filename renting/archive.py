@@ -0,0 +1,72 @@
+import logging
+from datetime import timedelta
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from .availability import reservation_changed
+from .caching import bump_version_on_commit
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ARCHIVE_DAYS = 365
+# Columns copied as-is; the archive keeps the reservation id
+ARCHIVED_FIELDS = ('id', 'start_date', 'end_date', 'coverage', 'rate', 'total_price', 'user_id', 'car_id')
+
+
+# ============================================
+# Archiving completed reservations
+# ============================================
+
+
+def archive_cutoff(days=None):
+    """Reservations ending before this date are archived"""
+    if days is None:
+        days = getattr(settings, 'RESERVATION_ARCHIVE_DAYS', DEFAULT_ARCHIVE_DAYS)
+    return timezone.localdate() - timedelta(days=days)
+
+
+def archivable(cutoff):
+    from .models import Reservation
+
+    # start <= end, so the start_date bound lets the dates index drive the scan
+    return Reservation.objects.filter(start_date__lt=cutoff, end_date__lt=cutoff).order_by()
+
+
+def archive_batch(cutoff, batch_size=1000):
+    """
+    Move up to `batch_size` reservations that ended before `cutoff` into the
+    archive in one short transaction; only those rows are locked. Returns
+    the number moved (0 when done), so callers loop until then and a run
+    interrupted at any point resumes where it stopped.
+    """
+    from .models import ArchivedReservation, Reservation
+
+    with transaction.atomic():
+        rows = list(archivable(cutoff).select_for_update().values(*ARCHIVED_FIELDS)[:batch_size])
+        if not rows:
+            return 0
+
+        ArchivedReservation.objects.bulk_create(ArchivedReservation(**row) for row in rows)
+        # Plain DELETE: the post_delete handlers would free the occupancy days,
+        # which archived reservations keep
+        table = connection.ops.quote_name(Reservation._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {table} WHERE id IN ({', '.join(['%s'] * len(rows))})",
+                [row['id'] for row in rows],
+            )
+
+        reservation_changed(*((row['car_id'], row['start_date'], row['end_date']) for row in rows))
+        bump_version_on_commit(Reservation._meta.db_table)
+        bump_version_on_commit(ArchivedReservation._meta.db_table)
+
+    logger.info(f"Archived {len(rows)} reservations ending before {cutoff}")
+    return len(rows)
+
+
+def archived_spans():
+    """(car_id, start_date, end_date) of archived reservations (occupancy rebuilds)"""
+    from .models import ArchivedReservation
+
+    return ArchivedReservation.objects.order_by().values_list('car_id', 'start_date', 'end_date')
@@ -0,0 +1,357 @@
+import logging
+import threading
+from bisect import bisect_right
+from collections import defaultdict
+from datetime import date, timedelta
+from itertools import accumulate
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from .caching import get_version, get_versions, bump_version, cache_usable
+from .singleflight import SingleFlight
+
+
+logger = logging.getLogger(__name__)
+
+VERSION_NAME = 'availability'
+DAY_VERSION_NAME = 'availability:{}'
+# Bumped for each car whose reservations change (per-car calendar ETags)
+CAR_VERSION_NAME = 'availability:car:{}'
+# Cars changed by each bump of VERSION_NAME, read by the other workers
+CHANGES_KEY = 'renting:availability:changes:{}'
+CHANGES_TIMEOUT = 3600
+# Further behind than this, a worker reloads its whole map
+MAX_CHANGES = 1000
+ONE_DAY = timedelta(days=1)
+
+
+# ============================================
+# Per-car interval structure
+# ============================================
+
+
+class CarIntervals:
+    """
+    Reservation intervals of one car sorted by start date.
+    `max_ends[i]` is the latest end date among the first i+1 intervals, so an
+    overlap test is one bisect plus one comparison even if intervals overlap.
+    """
+    __slots__ = ('starts', 'max_ends')
+
+    def __init__(self, intervals=()):
+        intervals = sorted(intervals)
+        self.starts = [start for start, _ in intervals]
+        self.max_ends = list(accumulate((end for _, end in intervals), max))
+
+    def overlaps(self, date_from, date_to):
+        """True if any interval intersects [date_from, date_to] (inclusive)"""
+        idx = bisect_right(self.starts, date_to)
+        return idx > 0 and self.max_ends[idx - 1] >= date_from
+
+    def free_gaps(self, date_from, date_to):
+        """
+        Yield the free (first, last) day ranges inside [date_from, date_to].
+        Sweep line: intervals starting before the window only push its first
+        free day past their latest end; then each start after the free day
+        closes a gap and the running max end opens the next one.
+        """
+        first = bisect_right(self.starts, date_from)
+        stop = bisect_right(self.starts, date_to, first)
+        free = date_from
+        if first:
+            free = max(free, self.max_ends[first - 1] + ONE_DAY)
+        for idx in range(first, stop):
+            start = self.starts[idx]
+            if start > free:
+                yield free, start - ONE_DAY
+            free = max(free, self.max_ends[idx] + ONE_DAY)
+        if free <= date_to:
+            yield free, date_to
+
+    def __len__(self):
+        return len(self.starts)
+
+
+# ============================================
+# Process-local availability index
+# ============================================
+
+
+class AvailabilityIndex:
+    """
+    In-memory {car_id: CarIntervals} of the reservations ending today or
+    later, built lazily from the reservation table. Windows starting before
+    today are answered by the database.
+
+    - Local writes mark the affected cars dirty; they are reloaded on next use.
+    - Each commit bumps a shared version counter and records the cars it
+      changed under that version, so other workers reload only those cars;
+      the whole map is reloaded only when part of that log is missing.
+    - Loads run outside the state lock, one at a time (`_load_lock`), so
+      writers marking cars dirty never wait for a database read.
+    - Car maps handed out are never changed afterwards (reloads build a new
+      map), so readers iterate them without holding the lock.
+    Bypassed where `cache_usable()` is false (see renting.caching).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._cars = None
+        self._version = None
+        self._horizon = None
+        self._dirty = set()
+
+    def invalidate(self, car_ids):
+        """Mark cars dirty so their intervals are reloaded on next query"""
+        with self._lock:
+            self._dirty.update(car_ids)
+
+    def publish(self, car_ids):
+        """Invalidate cars and tell other workers which cars changed"""
+        version = bump_version(VERSION_NAME)
+        cache.set(CHANGES_KEY.format(version), sorted(car_ids), CHANGES_TIMEOUT)
+        self.invalidate(car_ids)
+
+    def reset(self):
+        """Drop all cached intervals"""
+        with self._lock:
+            self._cars = None
+            self._version = None
+            self._horizon = None
+            self._dirty.clear()
+
+    def occupied_car_ids(self, date_from, date_to):
+        """Return ids of cars with a reservation overlapping [date_from, date_to]"""
+        if not self._covers(date_from):
+            return set(_overlapping_reservations(date_from, date_to))
+
+        cars = self._snapshot()
+        return {
+            car_id for car_id, intervals in cars.items()
+            if intervals.overlaps(date_from, date_to)
+        }
+
+    def car_intervals(self, date_from, date_to):
+        """
+        {car_id: CarIntervals} holding at least every reservation overlapping
+        [date_from, date_to]; cars without one may be missing.
+        """
+        if not self._covers(date_from):
+            return _load_intervals(date_from=date_from, date_to=date_to)
+        return self._snapshot()
+
+    def _covers(self, date_from):
+        # Maps are loaded on or before today: they hold every reservation ending from today on
+        return cache_usable() and date_from >= timezone.localdate()
+
+    def _current(self, version):
+        return self._cars is not None and self._version == version and not self._dirty
+
+    def _snapshot(self):
+        """Return an up-to-date car map, reloading stale parts into a copy"""
+        version = get_version(VERSION_NAME)
+        with self._lock:
+            if self._current(version):
+                return self._cars
+
+        with self._load_lock:
+            version = get_version(VERSION_NAME)
+            with self._lock:
+                if self._current(version):
+                    return self._cars
+                cars, loaded, horizon = self._cars, self._version, self._horizon
+                dirty, self._dirty = self._dirty, set()
+
+            try:
+                changed = None if cars is None else _changed_cars(loaded, version)
+                if changed is None:
+                    horizon = timezone.localdate()
+                    cars = _load_intervals(ending_from=horizon)
+                else:
+                    dirty |= changed
+                    reloaded = _load_intervals(car_ids=dirty, ending_from=horizon)
+                    cars = dict(cars)
+                    for car_id in dirty:
+                        intervals = reloaded.get(car_id)
+                        if intervals:
+                            cars[car_id] = intervals
+                        else:
+                            cars.pop(car_id, None)
+            except BaseException:
+                with self._lock:
+                    self._dirty |= dirty
+                raise
+
+            with self._lock:
+                # Cars marked dirty meanwhile stay dirty for the next reader
+                self._cars, self._version, self._horizon = cars, version, horizon
+                return cars
+
+
+def _changed_cars(since, version):
+    """Cars changed by the commits after version `since`, or None if the log does not cover them"""
+    if not 0 <= version - since <= MAX_CHANGES:
+        return None
+    keys = [CHANGES_KEY.format(number) for number in range(since + 1, version + 1)]
+    found = cache.get_many(keys)
+    if len(found) < len(keys):
+        return None
+    return {car_id for car_ids in found.values() for car_id in car_ids}
+
+
+def _load_intervals(car_ids=None, date_from=None, date_to=None, ending_from=None):
+    """
+    Read reservation intervals grouped per car; optionally only those
+    overlapping a window, or ending on or after `ending_from`
+    """
+    # Local import: models import this module for save() hooks
+    from .models import Reservation
+
+    rows = Reservation.objects.order_by()
+    if car_ids is not None:
+        rows = rows.filter(car_id__in=car_ids)
+    if date_from is not None:
+        rows = rows.filter(start_date__lte=date_to, end_date__gte=date_from)
+    if ending_from is not None:
+        rows = rows.filter(end_date__gte=ending_from)
+
+    grouped = defaultdict(list)
+    for car_id, start, end in rows.values_list('car_id', 'start_date', 'end_date').iterator():
+        grouped[car_id].append((start, end))
+
+    logger.debug(f"Availability index loaded {len(grouped)} cars")
+    return {car_id: CarIntervals(intervals) for car_id, intervals in grouped.items()}
+
+
+def _overlapping_reservations(date_from, date_to):
+    """Car ids with overlapping reservations, straight from the database"""
+    from .models import Reservation
+
+    return Reservation.objects.filter(
+        start_date__lte=date_to,
+        end_date__gte=date_from,
+    ).order_by().values_list('car_id', flat=True).distinct()
+
+
+availability_index = AvailabilityIndex()
+# Concurrent searches for the same window share one computation
+occupied_flight = SingleFlight()
+
+
+# ============================================
+# Public API
+# ============================================
+
+
+def reservation_changed(*spans):
+    """
+    Keep the index in sync after a reservation write (Reservation.save/delete).
+    `spans` are the old and new (car_id, start, end) of the reservation; None
+    entries are ignored.
+    """
+    spans = {span for span in spans if span}
+    car_ids = {car_id for car_id, _, _ in spans}
+    availability_index.invalidate(car_ids)
+
+    def publish():
+        availability_index.publish(car_ids)
+        for _, start, end in spans:
+            bump_day_versions(start, end)
+        for car_id in car_ids:
+            bump_version(CAR_VERSION_NAME.format(car_id))
+
+    # Readers outside the transaction may have reloaded the old state meanwhile
+    transaction.on_commit(publish)
+
+
+# Day versions let caches keyed on a date window (search results) depend on
+# exactly the days they cover: a booking only invalidates overlapping windows.
+
+def day_versions(date_from, date_to):
+    """Versions of every day in [date_from, date_to]"""
+    return get_versions(*(DAY_VERSION_NAME.format(day) for day in _days(date_from, date_to)))
+
+
+def bump_day_versions(date_from, date_to):
+    for day in _days(date_from, date_to):
+        bump_version(DAY_VERSION_NAME.format(day))
+
+
+def _days(date_from, date_to):
+    return [date_from + timedelta(days=offset) for offset in range((date_to - date_from).days + 1)]
+
+
+def parse_date_range(date_from, date_to):
+    """Coerce query-string or date values into a (from, to) pair, or (None, None)"""
+    if not isinstance(date_from, date):
+        date_from = _parse(date_from)
+    if not isinstance(date_to, date):
+        date_to = _parse(date_to)
+    if date_from is None or date_to is None:
+        return None, None
+    return date_from, date_to
+
+
+def _parse(value):
+    try:
+        return parse_date(value) if value else None
+    except (TypeError, ValueError):
+        return None
+
+
+def exclude_unavailable(queryset, date_from, date_to):
+    """
+    Remove cars that are booked for any day in [date_from, date_to].
+    Applied by CarFilter; invalid or missing dates are ignored.
+    """
+    date_from, date_to = parse_date_range(date_from, date_to)
+    if date_from is None:
+        return queryset
+
+    occupied = occupied_car_ids(date_from, date_to)
+    if not occupied:
+        return queryset
+    return queryset.exclude(id__in=occupied)
+
+
+def occupied_car_ids(date_from, date_to):
+    """Ids of the cars booked for any day in [date_from, date_to]"""
+    if cache_usable():
+        return occupied_flight.do(
+            (date_from, date_to),
+            lambda: availability_index.occupied_car_ids(date_from, date_to),
+        )
+    # Inside a transaction the result may include its own writes: not shared
+    return availability_index.occupied_car_ids(date_from, date_to)
+
+
+def next_windows(car_ids, date_from, date_to):
+    """
+    Earliest free window as long as [date_from, date_to] starting on or after
+    date_from, per car: {car_id: (start, end)}.
+    Gaps and islands over one query: the cars' reservations ending on or after
+    date_from, in (car, start_date) order, are walked once; each car's first
+    gap long enough wins, else the day after its last reservation.
+    """
+    from .models import Reservation
+
+    length = (date_to - date_from).days
+    candidates = dict.fromkeys(car_ids, date_from)
+    found = {}
+    rows = Reservation.objects.filter(
+        car_id__in=candidates, end_date__gte=date_from
+    ).order_by('car_id', 'start_date').values_list('car_id', 'start_date', 'end_date')
+    for car_id, start, end in rows.iterator():
+        if car_id in found:
+            continue
+        first = candidates[car_id]
+        if (start - first).days > length:
+            found[car_id] = first
+        else:
+            candidates[car_id] = max(first, end + timedelta(days=1))
+    return {
+        car_id: (first, first + timedelta(days=length))
+        for car_id, first in {**candidates, **found}.items()
+    }
@@ -0,0 +1,185 @@
+import threading
+import time
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+
+
+VERSION_KEY = 'renting:version:{}'
+MTIME_KEY = 'renting:mtime:{}'
+
+
+def get_version(name):
+    """
+    Return the shared version counter for `name`.
+    Missing counters are seeded from the clock so a cache flush or restart
+    never hands out a version that was already used for different data.
+    """
+    key = VERSION_KEY.format(name)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, int(time.time() * 1000), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(name):
+    """Increment the shared version counter for `name` and return the new value"""
+    key = VERSION_KEY.format(name)
+    cache.set(MTIME_KEY.format(name), time.time(), timeout=None)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # Counter expired or was never seeded
+        get_version(name)
+        return cache.incr(key)
+
+
+def get_versions(*names):
+    """Return the version counters for several names in one cache round-trip"""
+    keys = {VERSION_KEY.format(name): name for name in names}
+    found = cache.get_many(keys)
+    return [found[key] if key in found else get_version(name) for key, name in keys.items()]
+
+
+def get_validators(*names):
+    """
+    Return ([versions], last modified timestamp) for several names in one
+    cache round-trip. Names never bumped since a cache flush count as
+    modified now, so clients revalidate rather than keep stale copies.
+    """
+    keys = [VERSION_KEY.format(name) for name in names] + [MTIME_KEY.format(name) for name in names]
+    found = cache.get_many(keys)
+    versions = [found.get(VERSION_KEY.format(name)) or get_version(name) for name in names]
+    mtimes = []
+    for name in names:
+        mtime = found.get(MTIME_KEY.format(name))
+        if mtime is None:
+            cache.add(MTIME_KEY.format(name), time.time(), timeout=None)
+            mtime = cache.get(MTIME_KEY.format(name))
+        mtimes.append(mtime)
+    return versions, max(mtimes, default=None)
+
+
+def bump_version_on_commit(name):
+    """Bump a version once the current transaction commits (immediately in autocommit)"""
+    transaction.on_commit(lambda: bump_version(name))
+
+
+def cache_shared():
+    """
+    True when every server process sees the same version counters: the cache
+    backend is shared (Redis), or CACHE_SINGLE_PROCESS says only one process
+    runs (runserver, tests). Otherwise a bump in one worker would never reach
+    the others, so every cache built on the counters is bypassed.
+    """
+    if getattr(settings, 'CACHE_SINGLE_PROCESS', False):
+        return True
+    return not isinstance(caches['default'], (LocMemCache, DummyCache))
+
+
+def in_atomic_block(using=None):
+    return transaction.get_connection(using).in_atomic_block
+
+
+def cache_usable(using=None):
+    """
+    Shared caches are only read and filled outside atomic blocks: inside one,
+    results may include uncommitted rows that a rollback would leave behind.
+    """
+    return cache_shared() and not in_atomic_block(using)
+
+
+# ============================================
+# Process-local compiled tables
+# ============================================
+
+
+class CompiledCache:
+    """
+    Process-local value built by `compile()` from the database, built again
+    whenever the shared `version_name` counter moves (bumped on commit by
+    every write, so other workers notice). For small, rarely written tables
+    read on hot paths (lookup tables, suggestion tries, pricing rules, price
+    calendars).
+
+    Unlike the caches kept in the shared cache (see `cache_usable()`) it is
+    also used inside atomic blocks, so those paths never read the table:
+    - After a write in the current transaction (`written()`), that
+      transaction compiles its own, unshared value until it ends. The
+      marker is an on-commit callback of the connection, so it goes away
+      on commit and on rollback alike, and other transactions are not
+      affected.
+    - A value compiled inside an atomic block (possibly an older snapshot) is
+      compiled again at the next use outside one.
+    - Values that can be updated in place keep it on local writes
+      (`written(keep=True)`, then `patch()` on commit) instead of being
+      compiled again; any other worker's write still recompiles them.
+    """
+
+    def __init__(self, compile, version_name):
+        self._compile = compile
+        self._version_name = version_name
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._value = None
+            self._version = None
+            self._provisional = False
+
+    def get(self):
+        if not cache_shared():
+            return self._compile()
+        in_transaction = in_atomic_block()
+        pending = in_transaction and self._written_in_transaction()
+        version = get_version(self._version_name)
+        with self._lock:
+            if (
+                not pending and self._value is not None and self._version == version
+                and (in_transaction or not self._provisional)
+            ):
+                return self._value
+
+        value = self._compile()
+        if not pending:
+            with self._lock:
+                self._value, self._version, self._provisional = value, version, in_transaction
+        return value
+
+    def written(self, keep=False):
+        """Drop the value (unless `keep`); inside a transaction, mark it as written until it ends"""
+        if not keep:
+            with self._lock:
+                self._value = None
+        if in_atomic_block() and not self._written_in_transaction():
+            transaction.on_commit(self._transaction_ended)
+
+    def patch(self, apply):
+        """
+        After a local commit: `apply(value)` updates the value in place, then
+        the version is bumped. The value stays current only if no other write
+        bumped the version meanwhile.
+        """
+        with self._lock:
+            value = None if self._provisional else self._value
+            version = self._version
+        if value is not None:
+            apply(value)
+        bumped = bump_version(self._version_name)
+        with self._lock:
+            if self._value is value and value is not None and bumped == version + 1:
+                self._version = bumped
+            elif self._value is value:
+                self._value = None
+
+    def _written_in_transaction(self):
+        # Rolled back (savepoints included) callbacks are dropped from the list
+        connection = transaction.get_connection()
+        return any(callback == self._transaction_ended for _, callback, _ in connection.run_on_commit)
+
+    def _transaction_ended(self):
+        """On-commit marker of a write (the version itself is bumped by the writer)"""
@@ -0,0 +1,115 @@
+import logging
+from django.db import transaction
+from .caching import bump_version_on_commit
+
+
+logger = logging.getLogger(__name__)
+
+# CarSearch column -> source lookup on Car
+CAR_COLUMNS = {
+    'license_plate': 'license_plate',
+    'mileage': 'mileage',
+    'color_id': 'color_id',
+    'car_model_id': 'car_model_id',
+}
+# CarSearch column -> source lookup on CarModel (copied to every car of the model)
+MODEL_COLUMNS = {
+    'brand_id': 'brand_id',
+    'vehicle_type_id': 'vehicle_type_id',
+    'fuel_type_id': 'fuel_type_id',
+    'transmission_id': 'transmission_id',
+    'seats': 'seats',
+    'daily_price': 'daily_price',
+}
+COLUMNS = ('id', *CAR_COLUMNS, *MODEL_COLUMNS)
+# Rows are written with bulk queries (no signals): caches keyed on it are bumped here
+VERSION_NAME = 'car_search'
+
+
+# ============================================
+# Source rows
+# ============================================
+
+
+def source_rows(car_ids=None):
+    """Expected CarSearch rows (dicts keyed by column) computed from the catalog tables"""
+    from .models import Car
+
+    lookups = {
+        'id': 'id', **CAR_COLUMNS,
+        **{column: f'car_model__{lookup}' for column, lookup in MODEL_COLUMNS.items()},
+    }
+    queryset = Car.objects.order_by()
+    if car_ids is not None:
+        queryset = queryset.filter(id__in=car_ids)
+    for values in queryset.values(*lookups.values()).iterator():
+        yield {column: values[lookup] for column, lookup in lookups.items()}
+
+
+# ============================================
+# Maintenance (signals)
+# ============================================
+
+
+def sync_cars(car_ids):
+    """Rewrite the rows of these cars; cars that no longer exist lose their row"""
+    from .models import CarSearch
+
+    car_ids = list(car_ids)
+    with transaction.atomic():
+        CarSearch.objects.filter(id__in=car_ids).delete()
+        CarSearch.objects.bulk_create(CarSearch(**row) for row in source_rows(car_ids))
+    bump_version_on_commit(VERSION_NAME)
+
+
+def sync_model(car_model):
+    """Copy a car model's columns to the rows of all its cars (one UPDATE)"""
+    from .models import CarSearch
+
+    CarSearch.objects.filter(car_model_id=car_model.pk).update(
+        **{column: getattr(car_model, lookup) for column, lookup in MODEL_COLUMNS.items()}
+    )
+    bump_version_on_commit(VERSION_NAME)
+
+
+def clear_lookup(column, pk):
+    """A deleted lookup row (SET_NULL on the source) leaves NULL behind"""
+    from .models import CarSearch
+
+    CarSearch.objects.filter(**{column: pk}).update(**{column: None})
+    bump_version_on_commit(VERSION_NAME)
+
+
+# ============================================
+# Verification
+# ============================================
+
+
+def rebuild():
+    """Recompute every row from the catalog tables. Returns the row count"""
+    from .models import CarSearch
+
+    rows = [CarSearch(**row) for row in source_rows()]
+    with transaction.atomic():
+        CarSearch.objects.all().delete()
+        CarSearch.objects.bulk_create(rows, batch_size=1000)
+    bump_version_on_commit(VERSION_NAME)
+    return len(rows)
+
+
+def verify():
+    """
+    Compare stored rows with the catalog tables.
+    Returns the ids of cars whose row is missing, stale or orphaned.
+    """
+    from .models import CarSearch
+
+    expected = {row['id']: row for row in source_rows()}
+    drifted = []
+    for row in CarSearch.objects.order_by().values(*COLUMNS).iterator():
+        if expected.pop(row['id'], None) != row:
+            drifted.append(row['id'])
+    drifted.extend(expected)
+    if drifted:
+        logger.warning(f"Car search table: {len(drifted)} row(s) out of sync")
+    return sorted(drifted)
@@ -0,0 +1,74 @@
+import logging
+from collections import Counter
+from django.db.models import Case, Count, IntegerField, Value, When
+from .lookups import lookup_cache
+from .models import Brand, VehicleType, FuelType, Transmission
+
+
+logger = logging.getLogger(__name__)
+
+# Daily price bucket edges; the last bucket is open-ended
+PRICE_EDGES = (50, 100, 150)
+
+# Facet (named after its CarFilter parameter) -> (grouped column, lookup model)
+LOOKUP_FACETS = (
+    ('car_model__brand', 'brand_id', Brand),
+    ('car_model__vehicle_type', 'vehicle_type_id', VehicleType),
+    ('fuel', 'fuel_type_id', FuelType),
+    ('transmission', 'transmission_id', Transmission),
+)
+SEATS_COLUMN = 'seats'
+
+
+# ============================================
+# Facet counts
+# ============================================
+
+
+def facet_counts(queryset):
+    """
+    Counts of the filtered cars (a CarSearch queryset) per brand, vehicle
+    type, fuel, transmission, seats and price bucket, from one GROUP BY over
+    all facet columns.
+    Lookup options without cars are listed with count 0.
+    """
+    columns = [column for _, column, _ in LOOKUP_FACETS] + [SEATS_COLUMN]
+    groups = (
+        queryset.order_by()
+        .values(*columns, price_bucket=_price_bucket())
+        .annotate(cars=Count('id'))
+    )
+
+    counters = {column: Counter() for column in columns + ['price_bucket']}
+    total = 0
+    for group in groups:
+        total += group['cars']
+        for column, counter in counters.items():
+            counter[group[column]] += group['cars']
+    logger.debug(f"Facets: {total} cars")
+
+    data = {'total': total}
+    for facet, column, model in LOOKUP_FACETS:
+        counts = counters[column]
+        data[facet] = [
+            {'id': pk, 'name': name, 'count': counts[pk]}
+            for pk, name in lookup_cache.table(model).rows
+        ]
+    data['seats'] = [
+        {'value': seats, 'count': count}
+        for seats, count in sorted(counters[SEATS_COLUMN].items()) if seats is not None
+    ]
+    bounds = (None,) + PRICE_EDGES + (None,)
+    data['price'] = [
+        {'min_price': bounds[i], 'max_price': bounds[i + 1], 'count': counters['price_bucket'][i]}
+        for i in range(len(PRICE_EDGES) + 1)
+    ]
+    return data
+
+
+def _price_bucket():
+    return Case(
+        *(When(daily_price__lt=edge, then=Value(i)) for i, edge in enumerate(PRICE_EDGES)),
+        default=Value(len(PRICE_EDGES)),
+        output_field=IntegerField(),
+    )
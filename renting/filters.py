@@ -1,6 +1,8 @@
 from django_filters import rest_framework as filters
-from .models import Car, Reservation, AppUser
-from django.db.models import Q
+from rest_framework.filters import OrderingFilter
+from .models import CarSearch, Reservation, AppUser, Brand, VehicleType, Color, Transmission, FuelType
+from .availability import exclude_unavailable
+from .lookups import lookup_cache
 
 
 # Reservation Filters
@@ -15,54 +17,67 @@ class ReservationFilter(filters.FilterSet):
 
 
 class CarFilter(filters.FilterSet):
+    """Car list filters, applied to the flattened car_search table (no joins)"""
     # Price range filters
-    min_price = filters.NumberFilter(field_name="car_model__daily_price", lookup_expr='gte')
-    max_price = filters.NumberFilter(field_name="car_model__daily_price", lookup_expr='lte')
+    min_price = filters.NumberFilter(field_name="daily_price", lookup_expr='gte')
+    max_price = filters.NumberFilter(field_name="daily_price", lookup_expr='lte')
     
     # Detailed spec filters
-    seats = filters.NumberFilter(field_name="car_model__seats", lookup_expr='gte')
-    transmission = filters.CharFilter(field_name="car_model__transmission__name")
-    fuel = filters.CharFilter(field_name="car_model__fuel_type__name")
+    seats = filters.NumberFilter(field_name="seats", lookup_expr='gte')
+    transmission = filters.CharFilter(field_name="transmission", method='filter_lookup_name')
+    fuel = filters.CharFilter(field_name="fuel_type", method='filter_lookup_name')
     
     # Core: Date-based availability filter (start_date/end_date)
     available_from = filters.CharFilter(method='filter_availability')
     available_to = filters.CharFilter(method='filter_availability')
+
+    # Parameter names kept from the former Car-based filter set
+    car_model__brand = filters.ModelChoiceFilter(field_name='brand', queryset=Brand.objects.all())
+    car_model__vehicle_type = filters.ModelChoiceFilter(field_name='vehicle_type', queryset=VehicleType.objects.all())
+    color = filters.ModelChoiceFilter(queryset=Color.objects.all())
     
     class Meta:
-        model = Car
-        fields = {
-            'car_model__brand': ['exact'],          # /cars/?brand=1
-            'car_model__vehicle_type': ['exact'],   # /cars/?vehicle_type=1
-            'color': ['exact'],                     # /cars/?color=1
-        }
-        
+        model = CarSearch
+        fields = ['car_model__brand', 'car_model__vehicle_type', 'color']
+
+    # Lookup model behind each name filter
+    LOOKUP_MODELS = {'transmission': Transmission, 'fuel_type': FuelType}
+
+    def filter_lookup_name(self, queryset, name, value):
+        """Resolve the name to an id through the lookup cache: no join on the lookup table"""
+        pk = lookup_cache.table(self.LOOKUP_MODELS[name]).id(value)
+        if pk is None:
+            return queryset.none()
+        return queryset.filter(**{name: pk})
+
     def filter_availability(self, queryset, name, value):
         """
         Filter cars available for specific date range.
-        Excludes cars with overlapping reservations.
+        Excludes cars with overlapping reservations (shared availability index).
         """
         # Skip processing for available_from parameter (avoid duplicate calls)
         if name == 'available_from':
             return queryset
 
-        start_date = self.data.get('available_from')
-        end_date = self.data.get('available_to')
+        return exclude_unavailable(
+            queryset,
+            self.data.get('available_from'),
+            self.data.get('available_to'),
+        )
+
 
-        if start_date and end_date:
-            try:
-                # 1. Get IDs of cars with overlapping reservations
-                # (existing_start <= user_end) AND (existing_end >= user_start)
-                occupied_car_ids = Reservation.objects.filter(
-                    start_date__lte=end_date,
-                    end_date__gte=start_date
-                ).values_list('car_id', flat=True).distinct()
+class ColumnOrderingFilter(OrderingFilter):
+    """
+    ?ordering= validated against the view's public `ordering_fields`, then
+    sorted by the matching read model column (`view.ordering_columns`).
+    """
 
-                # 2. Exclude occupied cars from queryset
-                return queryset.exclude(id__in=occupied_car_ids)
-            except Exception as e:
-                # Return original queryset on error to prevent server crash
-                import logging
-                logging.getLogger(__name__).error(f"Availability filter error: {e}")
-                return queryset
-                
-        return queryset
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        if not ordering:
+            return ordering
+        columns = getattr(view, 'ordering_columns', {})
+        return [
+            ('-' if term.startswith('-') else '') + columns.get(term.lstrip('-'), term.lstrip('-'))
+            for term in ordering
+        ]
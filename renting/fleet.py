@@ -0,0 +1,98 @@
+import base64
+import json
+from .occupancy import bit_runs
+
+
+# Window of the matrix when `to` is not given, and the longest allowed
+DEFAULT_DAYS = 90
+MAX_DAYS = 366
+ENCODINGS = ('runs', 'bitmap')
+# Cars read per batch (with their reservations), and car rows per streamed chunk
+BATCH_CARS = 500
+CHUNK_CARS = 200
+
+
+# ============================================
+# Row encoding (pure functions)
+# ============================================
+
+
+def span_bits(start, end, date_from, days):
+    """Bitmask of the window days (bit i: date_from + i) booked by [start, end], clipped"""
+    first = max((start - date_from).days, 0)
+    last = min((end - date_from).days, days - 1)
+    if first > last:
+        return 0
+    return ((1 << (last - first + 1)) - 1) << first
+
+
+def encode_row(bits, days, encoding):
+    """
+    `runs`: [[first day offset, length], ...] of each booked run.
+    `bitmap`: base64 of ceil(days / 8) bytes, bit i of byte i // 8 is day i.
+    """
+    if encoding == 'bitmap':
+        return base64.b64encode(bits.to_bytes((days + 7) // 8, 'little')).decode('ascii')
+    return [[offset, length] for offset, length in bit_runs(bits)]
+
+
+# ============================================
+# Matrix scan
+# ============================================
+
+
+def car_rows(date_from, date_to):
+    """
+    Yield (car_id, license_plate, bits) for every car in id order.
+    Cars are read in batches of BATCH_CARS (keyset on id), each with one
+    query for the reservations overlapping the window within the car id
+    range of the batch (reservation_car_dates_idx). Memory is bounded by the
+    batch on every backend (MySQL iterators buffer whole results).
+    """
+    from .models import Car, Reservation
+
+    days = (date_to - date_from).days + 1
+    last_id = None
+    while True:
+        cars = Car.objects.order_by('id')
+        if last_id is not None:
+            cars = cars.filter(id__gt=last_id)
+        cars = list(cars.values_list('id', 'license_plate')[:BATCH_CARS])
+        if not cars:
+            return
+        last_id = cars[-1][0]
+
+        bits = dict.fromkeys((car_id for car_id, _ in cars), 0)
+        spans = Reservation.objects.filter(
+            car__gte=cars[0][0], car__lte=last_id, start_date__lte=date_to, end_date__gte=date_from
+        ).order_by().values_list('car_id', 'start_date', 'end_date')
+        for car_id, start, end in spans:
+            if car_id in bits:
+                bits[car_id] |= span_bits(start, end, date_from, days)
+        for car_id, license_plate in cars:
+            yield car_id, license_plate, bits[car_id]
+
+
+def stream(date_from, date_to, encoding='runs'):
+    """
+    The matrix as JSON text chunks, for StreamingHttpResponse:
+    {"from", "to", "days", "encoding", "cars": [{"id", "license_plate", "busy"}, ...]}
+    """
+    days = (date_to - date_from).days + 1
+    header = json.dumps({
+        'from': date_from.isoformat(), 'to': date_to.isoformat(), 'days': days, 'encoding': encoding,
+    })
+    yield header[:-1] + ', "cars": ['
+
+    chunk = []
+    separator = ''
+    for car_id, license_plate, bits in car_rows(date_from, date_to):
+        chunk.append(json.dumps({
+            'id': car_id, 'license_plate': license_plate, 'busy': encode_row(bits, days, encoding),
+        }))
+        if len(chunk) == CHUNK_CARS:
+            yield separator + ', '.join(chunk)
+            chunk, separator = [], ', '
+    if chunk:
+        yield separator + ', '.join(chunk)
+    yield ']}'
@@ -0,0 +1,92 @@
+import heapq
+import logging
+from collections import defaultdict
+from datetime import timedelta
+from . import pricing
+from .availability import ONE_DAY, CarIntervals
+
+
+logger = logging.getLogger(__name__)
+
+# Longest search range (within_from..within_to) accepted
+MAX_RANGE_DAYS = 92
+
+NO_RESERVATIONS = CarIntervals()
+
+
+# ============================================
+# Free windows (sweep line)
+# ============================================
+
+
+def free_starts(car_ids, intervals, within_from, within_to, days):
+    """
+    {start_date: [car_id, ...]}: every `days`-day window inside
+    [within_from, within_to] a car is free for, grouped by first day.
+    `intervals` maps car ids to CarIntervals; each car's free gaps come from
+    one sweep over its sorted reservations, and a gap of L days holds
+    L - days + 1 windows.
+    """
+    span = timedelta(days=days - 1)
+    starts = defaultdict(list)
+    for car_id in car_ids:
+        for first, last in intervals.get(car_id, NO_RESERVATIONS).free_gaps(within_from, within_to):
+            day = first
+            while day + span <= last:
+                starts[day].append(car_id)
+                day += ONE_DAY
+    return starts
+
+
+# ============================================
+# Ranking
+# ============================================
+
+
+class RankedWindows:
+    """
+    Priced windows, cheapest first (then earliest, then license plate), as a
+    sequence the paginator can count and slice. A page partially sorts the
+    windows with a bounded heap instead of sorting all of them.
+    Items are (total_price, start_date, license_plate, car_id, quote).
+    """
+    __slots__ = ('windows',)
+
+    def __init__(self, windows):
+        self.windows = windows
+
+    def __len__(self):
+        return len(self.windows)
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        stop = len(self.windows) if index.stop is None else index.stop
+        return heapq.nsmallest(stop, self.windows)[index]
+
+
+def ranked_windows(rows, intervals, within_from, within_to, days, birth_date=None,
+                   today=None, table=None, calendars=None):
+    """
+    RankedWindows of every free `days`-day window of the cars in `rows`
+    (car id -> read model row: license_plate, daily_price, vehicle_type_id,
+    car_model_id), priced as a reservation for a driver born on `birth_date`.
+    All cars free on a same first day are quoted in one batch.
+    """
+    starts = free_starts(rows, intervals, within_from, within_to, days)
+    span = timedelta(days=days - 1)
+    windows = []
+    for start, car_ids in starts.items():
+        quotes = pricing.quote_cars(
+            {car_id: rows[car_id].daily_price for car_id in car_ids},
+            birth_date, start, start + span,
+            vehicle_types={car_id: rows[car_id].vehicle_type_id for car_id in car_ids},
+            car_models={car_id: rows[car_id].car_model_id for car_id in car_ids},
+            today=today, table=table, calendars=calendars,
+        )
+        windows.extend(
+            (quote.total_price, start, rows[car_id].license_plate, car_id, quote)
+            for car_id, quote in quotes.items()
+        )
+    logger.debug(f"Flexible search: {len(windows)} windows of {days} days for {len(rows)} cars")
+    return RankedWindows(windows)
@@ -0,0 +1,89 @@
+import logging
+import threading
+from functools import partial
+from .caching import CompiledCache, bump_version_on_commit
+
+
+logger = logging.getLogger(__name__)
+
+VERSION_NAME = 'lookups'
+
+
+# ============================================
+# Lookup tables (VehicleType, Brand, FuelType, Color, Transmission)
+# ============================================
+
+
+class LookupTable:
+    """
+    id/name pairs of one lookup model in Meta ordering.
+    Name matching is case-insensitive, like the MySQL collation used by the
+    filters it replaces.
+    """
+    __slots__ = ('model', 'rows', 'names', 'ids')
+
+    def __init__(self, model, rows):
+        self.model = model
+        self.rows = rows
+        self.names = dict(rows)
+        self.ids = {name.casefold(): pk for pk, name in rows}
+
+    def name(self, pk):
+        """Name for an id; ids unknown to this snapshot are read from the database"""
+        name = self.names.get(pk)
+        if name is None and pk is not None:
+            name = self.model.objects.filter(pk=pk).values_list('name', flat=True).first()
+        return name
+
+    def id(self, name):
+        """Id for an exact (case-insensitive) name, or None"""
+        return self.ids.get(name.casefold()) if name else None
+
+    def matching(self, text):
+        """Ids whose name contains `text` (case-insensitive)"""
+        text = text.casefold()
+        return [pk for pk, name in self.rows if text in name.casefold()]
+
+
+class LookupCache:
+    """
+    Process-local LookupTable per lookup model, loaded on first use: one
+    CompiledCache (renting.caching) per model, all following the `lookups`
+    version counter.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._caches = {}
+
+    def table(self, model):
+        return self._cache(model).get()
+
+    def written(self, model):
+        self._cache(model).written()
+
+    def reset(self):
+        with self._lock:
+            self._caches = {}
+
+    def _cache(self, model):
+        with self._lock:
+            compiled = self._caches.get(model)
+            if compiled is None:
+                compiled = self._caches[model] = CompiledCache(partial(_load_table, model), VERSION_NAME)
+            return compiled
+
+
+def _load_table(model):
+    rows = list(model.objects.values_list('id', 'name'))
+    logger.debug(f"Lookup cache loaded {len(rows)} {model.__name__} rows")
+    return LookupTable(model, rows)
+
+
+lookup_cache = LookupCache()
+
+
+def lookups_changed(model):
+    """Keep the cache in sync after a lookup write (signals)"""
+    lookup_cache.written(model)
+    bump_version_on_commit(VERSION_NAME)
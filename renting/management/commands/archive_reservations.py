@@ -0,0 +1,42 @@
+# renting/management/commands/archive_reservations.py
+import time
+from django.core.management.base import BaseCommand
+from renting import archive
+
+
+class Command(BaseCommand):
+    help = (
+        'Moves reservations that ended before the archive horizon '
+        '(RESERVATION_ARCHIVE_DAYS) from the reservation table into the archive. '
+        'Works in small batches, each its own short transaction, so it never locks '
+        'the table for long and can be stopped and re-run at any time.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None, help='Override RESERVATION_ARCHIVE_DAYS')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Reservations moved per transaction')
+        parser.add_argument('--pause', type=float, default=0.1, help='Seconds to sleep between batches')
+        parser.add_argument('--dry-run', action='store_true', help='Only count archivable reservations')
+
+    def handle(self, *args, **options):
+        cutoff = archive.archive_cutoff(options['days'])
+        if options['dry_run']:
+            count = archive.archivable(cutoff).count()
+            self.stdout.write(f"{count} reservation(s) ended before {cutoff} and would be archived.")
+            return
+
+        moved = batches = 0
+        while True:
+            count = archive.archive_batch(cutoff, options['batch_size'])
+            if not count:
+                break
+            moved += count
+            batches += 1
+            if options['verbosity'] > 1:
+                self.stdout.write(f"Batch {batches}: {count} reservation(s)")
+            if options['pause']:
+                time.sleep(options['pause'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Archived {moved} reservation(s) ended before {cutoff} in {batches} batch(es)."
+        ))
@@ -0,0 +1,125 @@
+# renting/management/commands/benchmark_bookings.py
+import random
+import threading
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from rest_framework import serializers
+from renting.models import AppUser, Brand, CarModel, Car, Reservation
+from renting.serializers import ReservationSerializer
+
+
+PLATE_PREFIX = 'BENCH-'
+
+
+class Command(BaseCommand):
+    help = (
+        'Multi-threaded booking benchmark: measures bookings/second through the '
+        'API booking path and verifies there are no double-bookings. '
+        'Run against MySQL; SQLite serializes all writes.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--cars', type=int, default=10, help='Fewer cars means more contention')
+        parser.add_argument('--attempts', type=int, default=200, help='Booking attempts per thread')
+        parser.add_argument('--days', type=int, default=60, help='Window of start dates to pick from')
+        parser.add_argument('--keep', action='store_true', help='Keep benchmark data afterwards')
+
+    def handle(self, *args, **options):
+        if Car.objects.filter(license_plate__startswith=PLATE_PREFIX).exists():
+            raise CommandError(f"Leftover {PLATE_PREFIX}* cars found; remove them before benchmarking.")
+
+        user, cars = self._create_fixtures(options['cars'])
+        results = {'booked': 0, 'conflicts': 0, 'errors': 0}
+        lock = threading.Lock()
+
+        def worker(seed):
+            rng = random.Random(seed)
+            request = SimpleNamespace(user=user)
+            counts = {'booked': 0, 'conflicts': 0, 'errors': 0}
+            try:
+                for _ in range(options['attempts']):
+                    start = date.today() + timedelta(days=rng.randint(1, options['days']))
+                    data = {
+                        'car': rng.choice(cars).id,
+                        'start_date': start,
+                        'end_date': start + timedelta(days=rng.randint(1, 5)),
+                    }
+                    serializer = ReservationSerializer(data=data, context={'request': request})
+                    try:
+                        serializer.is_valid(raise_exception=True)
+                        serializer.save(user=user)
+                        counts['booked'] += 1
+                    except serializers.ValidationError:
+                        counts['conflicts'] += 1
+                    except Exception as e:
+                        counts['errors'] += 1
+                        self.stderr.write(f"Booking error: {e}")
+            finally:
+                connection.close()
+                with lock:
+                    for key, value in counts.items():
+                        results[key] += value
+
+        threads = [threading.Thread(target=worker, args=(seed,)) for seed in range(options['threads'])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        attempts = options['threads'] * options['attempts']
+        self.stdout.write(
+            f"{attempts} attempts in {elapsed:.2f}s with {options['threads']} threads: "
+            f"{results['booked']} booked, {results['conflicts']} conflicts, {results['errors']} errors"
+        )
+        self.stdout.write(
+            f"Throughput: {results['booked'] / elapsed:.1f} bookings/s, {attempts / elapsed:.1f} attempts/s"
+        )
+
+        double_bookings = self._count_double_bookings(cars)
+        if not options['keep']:
+            self._cleanup(user, cars)
+
+        if double_bookings:
+            raise CommandError(f"{double_bookings} double-booking(s) detected!")
+        self.stdout.write(self.style.SUCCESS("No double-bookings detected."))
+
+    def _create_fixtures(self, car_count):
+        user = AppUser.objects.create_user(
+            email=f'{PLATE_PREFIX.lower()}{int(time.time())}@example.com',
+            first_name='Bench',
+            last_name='Mark',
+            password=None,
+            birth_date=date(1990, 1, 1),
+        )
+        brand, _ = Brand.objects.get_or_create(name='Benchmark')
+        car_model = CarModel.objects.create(brand=brand, model_name='Bench', daily_price=Decimal('50.00'))
+        cars = [
+            Car.objects.create(car_model=car_model, license_plate=f'{PLATE_PREFIX}{i:04d}')
+            for i in range(car_count)
+        ]
+        return user, cars
+
+    def _count_double_bookings(self, cars):
+        """Scan each car's reservations in start order and count overlaps"""
+        rows = Reservation.objects.filter(car__in=cars).order_by('car_id', 'start_date', 'end_date')
+        overlaps = 0
+        last_car, last_end = None, None
+        for car_id, start, end in rows.values_list('car_id', 'start_date', 'end_date'):
+            if car_id == last_car and start <= last_end:
+                overlaps += 1
+            if car_id != last_car or end > last_end:
+                last_car, last_end = car_id, end
+        return overlaps
+
+    def _cleanup(self, user, cars):
+        car_model = cars[0].car_model
+        user.delete()
+        car_model.delete()
+        Brand.objects.filter(name='Benchmark', car_models__isnull=True).delete()
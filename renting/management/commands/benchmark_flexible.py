@@ -0,0 +1,122 @@
+# renting/management/commands/benchmark_flexible.py
+import random
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+from django.core.management.base import BaseCommand, CommandError
+from renting import flexible, pricing
+from renting.availability import CarIntervals
+from renting.price_calendar import CalendarTable
+
+
+class Command(BaseCommand):
+    help = (
+        'Flexible date search microbenchmark: free N-day windows of a whole '
+        'fleet inside a date range, priced and ranked, from per-car sorted '
+        'reservations as the availability index holds them. The fleet is '
+        'generated in memory; the database is not touched. Checks the sweep '
+        'line against testing every window of a sample of cars.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cars', type=int, default=10000)
+        parser.add_argument('--reservations', type=int, default=1000000)
+        parser.add_argument('--horizon', type=int, default=730, help='Days the reservations are spread over')
+        parser.add_argument('--range-days', type=int, default=31, help='Length of the searched range')
+        parser.add_argument('--days', type=int, default=5, help='Rental length')
+        parser.add_argument('--check-cars', type=int, default=200, help='Cars checked against the per-window scan')
+
+    def handle(self, *args, **options):
+        if not 0 < options['days'] <= options['range_days'] <= flexible.MAX_RANGE_DAYS:
+            raise CommandError(f"Need 0 < --days <= --range-days <= {flexible.MAX_RANGE_DAYS}")
+
+        rng = random.Random(42)
+        today = date.today()
+        started = time.perf_counter()
+        spans = self._spans(rng, today, options['cars'], options['reservations'], options['horizon'])
+        generate_time = time.perf_counter() - started
+
+        started = time.perf_counter()
+        intervals = {car_id: CarIntervals(car_spans) for car_id, car_spans in spans.items()}
+        index_time = time.perf_counter() - started
+
+        rows = {
+            car_id: SimpleNamespace(
+                license_plate=f'BENCH-{car_id:06d}', daily_price=Decimal(rng.randint(25, 150)),
+                vehicle_type_id=car_id % 20, car_model_id=car_id % 500,
+            )
+            for car_id in range(options['cars'])
+        }
+        within_from = today + timedelta(days=rng.randint(0, options['horizon'] - options['range_days']))
+        within_to = within_from + timedelta(days=options['range_days'] - 1)
+        days = options['days']
+
+        started = time.perf_counter()
+        starts = flexible.free_starts(rows, intervals, within_from, within_to, days)
+        sweep_time = time.perf_counter() - started
+
+        started = time.perf_counter()
+        windows = flexible.ranked_windows(
+            rows, intervals, within_from, within_to, days,
+            today=today, table=pricing.PricingTable(), calendars=CalendarTable(),
+        )
+        rank_time = time.perf_counter() - started
+
+        started = time.perf_counter()
+        page = windows[:10]
+        page_time = time.perf_counter() - started
+        started = time.perf_counter()
+        ordered = sorted(windows.windows)
+        sort_time = time.perf_counter() - started
+
+        self.stdout.write(
+            f"{options['cars']} cars, {sum(len(car) for car in spans.values())} reservations "
+            f"(generated in {generate_time:.2f} s)"
+        )
+        self.stdout.write(f"  index build:   {index_time * 1000:.0f} ms (availability index reload)")
+        self.stdout.write(
+            f"  sweep:         {sweep_time * 1000:.1f} ms for {len(windows)} free {days}-day windows "
+            f"in {within_from}..{within_to}"
+        )
+        self.stdout.write(f"  sweep + price: {rank_time * 1000:.1f} ms ({len(starts)} batched quotes)")
+        self.stdout.write(f"  first page:    {page_time * 1000:.1f} ms (full sort: {sort_time * 1000:.1f} ms)")
+
+        if page != ordered[:10]:
+            raise CommandError("The first page differs from the fully sorted windows")
+        sample = rng.sample(sorted(rows), min(options['check_cars'], len(rows)))
+        mismatches = sum(
+            1 for car_id in sample
+            if _naive_starts(spans.get(car_id, []), within_from, within_to, days)
+            != sorted(start for start, car_ids in starts.items() if car_id in car_ids)
+        )
+        if mismatches:
+            raise CommandError(f"{mismatches} car(s) differ from the per-window scan")
+        self.stdout.write(self.style.SUCCESS(f"Free windows of {len(sample)} sampled cars match the per-window scan."))
+
+    def _spans(self, rng, today, cars, reservations, horizon):
+        """{car_id: [(start, end)]}: non-overlapping bookings of 1 to 7 days, spread over the horizon"""
+        per_car = reservations // cars
+        mean_gap = max(horizon // max(per_car, 1) - 4, 0)
+        spans = {}
+        for car_id in range(cars):
+            day = today + timedelta(days=rng.randint(0, mean_gap))
+            car_spans = []
+            for _ in range(per_car):
+                end = day + timedelta(days=rng.randint(0, 6))
+                car_spans.append((day, end))
+                day = end + timedelta(days=1 + rng.randint(0, 2 * mean_gap))
+            spans[car_id] = car_spans
+        return spans
+
+
+def _naive_starts(spans, within_from, within_to, days):
+    """Reference: every candidate window tested against every reservation of the car"""
+    starts = []
+    start = within_from
+    while start + timedelta(days=days - 1) <= within_to:
+        end = start + timedelta(days=days - 1)
+        if not any(first <= end and last >= start for first, last in spans):
+            starts.append(start)
+        start += timedelta(days=1)
+    return starts
@@ -0,0 +1,131 @@
+# renting/management/commands/benchmark_pricing.py
+import random
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from django.core.management.base import BaseCommand, CommandError
+from renting import pricing
+from renting.models import PricingRule
+
+
+VEHICLE_TYPES = 20
+
+
+class Command(BaseCommand):
+    help = (
+        'Pricing rules microbenchmark: compile time and quote latency of the '
+        'compiled decision table for growing rule counts, against evaluating '
+        'every rule for every rental day. Rules are generated in memory; the '
+        'database is not touched. Checks both give the same totals.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rules', default='0,100,500', help='Comma-separated rule counts')
+        parser.add_argument('--quotes', type=int, default=2000)
+        parser.add_argument('--cars', type=int, default=20, help='Cars per batch quote (one list page)')
+
+    def handle(self, *args, **options):
+        try:
+            counts = [int(count) for count in options['rules'].split(',')]
+        except ValueError:
+            raise CommandError('--rules must be comma-separated integers')
+
+        rng = random.Random(42)
+        today = date.today()
+        for count in counts:
+            rules = self._rules(rng, count, today)
+            rentals = [self._rental(rng, today) for _ in range(options['quotes'])]
+
+            started = time.perf_counter()
+            table = pricing.PricingTable(rules)
+            compile_ms = (time.perf_counter() - started) * 1000
+
+            compiled_time, compiled = self._run(rentals, lambda rental: pricing.quote(
+                Decimal('50.00'), *rental, today=today, table=table
+            ).total_price)
+            naive_time, naive = self._run(rentals, lambda rental: _naive_total(
+                rules, Decimal('50.00'), *rental, today=today
+            ))
+
+            prices = {car: Decimal(30 + car) for car in range(options['cars'])}
+            types = {car: car % VEHICLE_TYPES for car in prices}
+            started = time.perf_counter()
+            for birth_date, start_date, end_date, _ in rentals:
+                pricing.quote_cars(prices, birth_date, start_date, end_date, types, today=today, table=table)
+            batch_time = time.perf_counter() - started
+
+            self.stdout.write(f"{count} rules ({table.rule_count} active, {len(table.seasons)} season segments)")
+            self.stdout.write(f"  compile:       {compile_ms:.2f} ms")
+            self.stdout.write(f"  compiled:      {compiled_time * 1e6 / len(rentals):.1f} us/quote")
+            self.stdout.write(f"  per-day scan:  {naive_time * 1e6 / len(rentals):.1f} us/quote")
+            self.stdout.write(
+                f"  batch of {len(prices)}:   {batch_time * 1e6 / len(rentals):.1f} us/page "
+                f"({batch_time * 1e6 / len(rentals) / len(prices):.2f} us/car)"
+            )
+
+            mismatches = sum(1 for a, b in zip(compiled, naive) if a != b)
+            if mismatches:
+                raise CommandError(f"{mismatches} quote(s) differ from the per-day evaluation")
+        self.stdout.write(self.style.SUCCESS("Compiled quotes match the per-day evaluation."))
+
+    def _run(self, rentals, evaluate):
+        """Total seconds and the totals for all rentals"""
+        started = time.perf_counter()
+        totals = [evaluate(rental) for rental in rentals]
+        return time.perf_counter() - started, totals
+
+    def _rental(self, rng, today):
+        """(birth_date, start_date, end_date, vehicle_type_id)"""
+        start = today + timedelta(days=rng.randint(0, 700))
+        birth_date = None if rng.random() < 0.2 else date(rng.randint(1940, 2006), rng.randint(1, 12), 1)
+        return birth_date, start, start + timedelta(days=rng.randint(0, 30)), rng.randint(0, VEHICLE_TYPES)
+
+    def _rules(self, rng, count, today):
+        """Mostly seasons, plus duration tiers, vehicle type surcharges and age bands"""
+        rules = []
+        for i in range(count):
+            multiplier = Decimal(rng.randint(70, 150)) / 100
+            roll = rng.random()
+            if roll < 0.6:
+                start = today + timedelta(days=rng.randint(0, 700))
+                rules.append(PricingRule(
+                    kind=PricingRule.SEASON, multiplier=multiplier,
+                    start_date=start, end_date=start + timedelta(days=rng.randint(0, 60)),
+                ))
+            elif roll < 0.8:
+                rules.append(PricingRule(kind=PricingRule.DURATION, multiplier=multiplier, min_days=rng.randint(2, 30)))
+            elif roll < 0.95:
+                rules.append(PricingRule(
+                    kind=PricingRule.VEHICLE_TYPE, multiplier=multiplier, vehicle_type_id=rng.randint(0, VEHICLE_TYPES)
+                ))
+            else:
+                low = rng.randint(18, 80)
+                rules.append(PricingRule(
+                    kind=PricingRule.AGE, multiplier=multiplier, coverage=f'Band {i}',
+                    min_age=low, max_age=low + rng.randint(0, 10),
+                ))
+        return rules
+
+
+def _naive_total(rules, daily_price, birth_date, start_date, end_date, vehicle_type_id, today):
+    """Reference evaluation: every rule checked for every rental day"""
+    table = pricing.PricingTable([rule for rule in rules if rule.kind == PricingRule.AGE])
+    _, rate = table.coverage(birth_date, today)
+    days = pricing.rental_days(start_date, end_date)
+
+    billed = Decimal(0)
+    for offset in range(days):
+        day = start_date + timedelta(days=offset)
+        multiplier = pricing.ONE
+        for rule in rules:
+            if rule.kind == PricingRule.SEASON and rule.start_date <= day <= rule.end_date:
+                multiplier *= rule.multiplier
+        billed += multiplier
+
+    tiers = [rule for rule in rules if rule.kind == PricingRule.DURATION and days >= rule.min_days]
+    duration = max(tiers, key=lambda rule: rule.min_days).multiplier if tiers else pricing.ONE
+    vehicle = pricing.ONE
+    for rule in rules:
+        if rule.kind == PricingRule.VEHICLE_TYPE and rule.vehicle_type_id == vehicle_type_id:
+            vehicle *= rule.multiplier
+    return (daily_price * billed * duration * vehicle * rate).quantize(pricing.CENT, pricing.ROUND_HALF_UP)
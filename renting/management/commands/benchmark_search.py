@@ -0,0 +1,90 @@
+# renting/management/commands/benchmark_search.py
+import random
+import string
+import time
+from decimal import Decimal
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+from renting import search
+from renting.models import Brand, CarModel, Car
+
+
+PLATE_PREFIX = 'SRCH-'
+BRAND_PREFIX = 'Bench'
+
+
+class Command(BaseCommand):
+    help = (
+        'Search benchmark: the former icontains join (brand OR model name) versus '
+        'the search term index. Reports ms/query and checks the index finds every '
+        'car the old path found.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--models', type=int, default=2000)
+        parser.add_argument('--cars-per-model', type=int, default=5)
+        parser.add_argument('--queries', type=int, default=50)
+        parser.add_argument('--keep', action='store_true', help='Keep benchmark data afterwards')
+
+    def handle(self, *args, **options):
+        if Car.objects.filter(license_plate__startswith=PLATE_PREFIX).exists():
+            raise CommandError(f"Leftover {PLATE_PREFIX}* cars found; remove them before benchmarking.")
+
+        rng = random.Random(42)
+        names = self._create_fixtures(rng, options['models'], options['cars_per_model'])
+        # Substrings of real names: prefixes, infixes and whole words
+        queries = []
+        for _ in range(options['queries']):
+            name = rng.choice(names)
+            start = rng.randint(0, max(0, len(name) - 3))
+            queries.append(name[start:start + rng.randint(3, 6)])
+
+        cars = Car.objects.filter(license_plate__startswith=PLATE_PREFIX)
+        try:
+            old_time, old_ids = self._run(queries, lambda q: cars.filter(
+                Q(car_model__brand__name__icontains=q) | Q(car_model__model_name__icontains=q)
+            ))
+            new_time, new_ids = self._run(queries, lambda q: search.search_cars(cars, q))
+
+            self.stdout.write(f"{cars.count()} cars, {len(queries)} queries")
+            self.stdout.write(f"   icontains: {old_time * 1000 / len(queries):.2f} ms/query")
+            self.stdout.write(f"search index: {new_time * 1000 / len(queries):.2f} ms/query")
+            self.stdout.write(f"Speedup: {old_time / new_time:.1f}x")
+
+            missing = [q for q, old, new in zip(queries, old_ids, new_ids) if not old <= new]
+            if missing:
+                raise CommandError(f"Index missed results for: {', '.join(missing)}")
+            self.stdout.write(self.style.SUCCESS("Index results include every icontains match."))
+        finally:
+            if not options['keep']:
+                self._cleanup()
+
+    def _run(self, queries, build):
+        """Total seconds and the id sets for all queries"""
+        results = []
+        started = time.perf_counter()
+        for query in queries:
+            results.append(set(build(query).values_list('id', flat=True)))
+        return time.perf_counter() - started, results
+
+    def _create_fixtures(self, rng, model_count, cars_per_model):
+        def word():
+            return ''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 9))).capitalize()
+
+        brands = [Brand.objects.create(name=f'{BRAND_PREFIX} {word()} {i}') for i in range(max(1, model_count // 50))]
+        names = [brand.name.split()[1] for brand in brands]
+        for i in range(model_count):
+            model_name = f'{word()} {word()}'
+            names.extend(model_name.split())
+            car_model = CarModel.objects.create(
+                brand=rng.choice(brands), model_name=model_name, daily_price=Decimal('50.00')
+            )
+            Car.objects.bulk_create(
+                Car(car_model=car_model, license_plate=f'{PLATE_PREFIX}{i:05d}-{n}')
+                for n in range(cars_per_model)
+            )
+        return names
+
+    def _cleanup(self):
+        CarModel.objects.filter(brand__name__startswith=f'{BRAND_PREFIX} ').delete()
+        Brand.objects.filter(name__startswith=f'{BRAND_PREFIX} ').delete()
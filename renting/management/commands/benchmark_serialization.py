@@ -0,0 +1,111 @@
+# renting/management/commands/benchmark_serialization.py
+import gc
+import time
+import tracemalloc
+from decimal import Decimal
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from renting.models import Brand, CarModel, Car, Color
+from renting.rows import compile_renderer
+from renting.serializers import CarSerializer
+
+
+PLATE_PREFIX = 'SER-'
+
+
+class Command(BaseCommand):
+    help = (
+        'Serialization benchmark for one large car page: CarSerializer versus the '
+        'values() row renderer used by CarViewSet.list. Reports rows/second and '
+        'peak memory and checks both produce byte-identical JSON.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000, help='Cars on the page')
+        parser.add_argument('--repeat', type=int, default=3, help='Runs per path (best is reported)')
+        parser.add_argument('--keep', action='store_true', help='Keep benchmark data afterwards')
+
+    def handle(self, *args, **options):
+        if Car.objects.filter(license_plate__startswith=PLATE_PREFIX).exists():
+            raise CommandError(f"Leftover {PLATE_PREFIX}* cars found; remove them before benchmarking.")
+
+        car_model = self._create_fixtures(options['rows'])
+        host = next((h for h in settings.ALLOWED_HOSTS if h not in ('*', '')), 'localhost').lstrip('.')
+        request = Request(APIRequestFactory().get('/api/cars/', HTTP_HOST=host))
+        # Same joins the viewset plans for CarSerializer
+        queryset = Car.objects.filter(license_plate__startswith=PLATE_PREFIX).select_related(
+            'car_model', 'car_model__brand', 'car_model__transmission',
+            'car_model__fuel_type', 'car_model__vehicle_type', 'color',
+        )
+        renderer = compile_renderer(CarSerializer, Car)
+
+        def serializer_path():
+            data = CarSerializer(queryset.all(), many=True, context={'request': request}).data
+            return JSONRenderer().render(data)
+
+        def row_path():
+            return JSONRenderer().render(renderer.render(queryset.values(*renderer.lookups), request))
+
+        try:
+            results = {}
+            for label, run in (('serializer', serializer_path), ('values rows', row_path)):
+                results[label] = self._measure(run, options['repeat'])
+
+            for label, (elapsed, peak, _) in results.items():
+                self.stdout.write(
+                    f"{label:>12}: {options['rows'] / elapsed:,.0f} rows/s "
+                    f"({elapsed * 1000:.1f} ms), peak {peak / 1024 / 1024:.1f} MiB"
+                )
+            speedup = results['serializer'][0] / results['values rows'][0]
+            self.stdout.write(f"Speedup: {speedup:.1f}x")
+
+            if results['serializer'][2] != results['values rows'][2]:
+                raise CommandError("Row renderer output differs from CarSerializer!")
+            self.stdout.write(self.style.SUCCESS("JSON output is byte-identical."))
+        finally:
+            if not options['keep']:
+                self._cleanup(car_model)
+
+    def _measure(self, run, repeat):
+        """Return (best seconds, peak traced bytes, output) for a callable"""
+        best = None
+        for _ in range(repeat):
+            gc.collect()
+            started = time.perf_counter()
+            output = run()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+
+        gc.collect()
+        tracemalloc.start()
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return best, peak, output
+
+    def _create_fixtures(self, count):
+        brand, _ = Brand.objects.get_or_create(name='Benchmark')
+        color, _ = Color.objects.get_or_create(name='Benchmark')
+        car_model = CarModel.objects.create(
+            brand=brand, model_name='Serializer', daily_price=Decimal('50.00'),
+            seats=5, image='car_models/benchmark.jpg',
+        )
+        Car.objects.bulk_create(
+            Car(
+                car_model=car_model,
+                license_plate=f'{PLATE_PREFIX}{i:06d}',
+                # Every other car has no color to exercise omitted keys
+                color=color if i % 2 else None,
+                mileage=i * 10,
+            )
+            for i in range(count)
+        )
+        return car_model
+
+    def _cleanup(self, car_model):
+        car_model.delete()
+        Color.objects.filter(name='Benchmark', car__isnull=True).delete()
+        Brand.objects.filter(name='Benchmark', car_models__isnull=True).delete()
@@ -0,0 +1,31 @@
+# renting/management/commands/rebuild_occupancy.py
+from django.core.management.base import BaseCommand, CommandError
+from renting import occupancy
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds per-car occupancy bitmaps from the live and archived reservations and verifies them'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Only verify stored bitmaps against reservations, do not rebuild',
+        )
+
+    def handle(self, *args, **options):
+        if not options['check']:
+            rows, collisions = occupancy.rebuild()
+            self.stdout.write(f"Rebuilt {rows} occupancy rows.")
+            if collisions:
+                self.stdout.write(self.style.WARNING(
+                    f"{collisions} reservation(s) overlap another reservation of the same car."
+                ))
+
+        mismatches = occupancy.verify()
+        if mismatches:
+            for car_id, year in mismatches[:20]:
+                self.stdout.write(self.style.ERROR(f"Mismatch: car={car_id} year={year}"))
+            raise CommandError(f"{len(mismatches)} occupancy row(s) do not match the reservation table.")
+
+        self.stdout.write(self.style.SUCCESS("Occupancy bitmaps match the reservation table."))
@@ -0,0 +1,40 @@
+# renting/management/commands/verify_car_search.py
+from django.core.management.base import BaseCommand, CommandError
+from renting import car_search
+
+
+class Command(BaseCommand):
+    help = (
+        'Verifies the car_search read model against the catalog tables and repairs '
+        'drifted rows (e.g. after bulk updates that bypass signals). Meant to run periodically.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Only report drifted rows, do not repair them',
+        )
+        parser.add_argument(
+            '--rebuild',
+            action='store_true',
+            help='Recompute the whole table before verifying',
+        )
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            rows = car_search.rebuild()
+            self.stdout.write(f"Rebuilt {rows} car search rows.")
+
+        drifted = car_search.verify()
+        if drifted and not options['check']:
+            car_search.sync_cars(drifted)
+            self.stdout.write(self.style.WARNING(f"Repaired {len(drifted)} car search row(s)."))
+            drifted = car_search.verify()
+
+        if drifted:
+            for car_id in drifted[:20]:
+                self.stdout.write(self.style.ERROR(f"Mismatch: car={car_id}"))
+            raise CommandError(f"{len(drifted)} car search row(s) do not match the catalog tables.")
+
+        self.stdout.write(self.style.SUCCESS("Car search table matches the catalog tables."))
@@ -0,0 +1,68 @@
+# Generated by Django 6.0.1 on 2026-10-18 00:48
+
+from collections import defaultdict
+from datetime import date
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Frozen copy of the bitmap layout (renting.occupancy): bit i of a year's
+# bitmap is day i counted from January 1st, stored little-endian in 46 bytes
+BITMAP_BYTES = 46
+
+
+def year_masks(start, end):
+    """Split [start, end] (inclusive) into {year: bitmask of booked days}"""
+    masks = {}
+    for year in range(start.year, end.year + 1):
+        first = max(start, date(year, 1, 1))
+        last = min(end, date(year, 12, 31))
+        offset = first.timetuple().tm_yday - 1
+        masks[year] = ((1 << ((last - first).days + 1)) - 1) << offset
+    return masks
+
+
+def populate_occupancy(apps, schema_editor):
+    """Build bitmaps for reservations that predate the occupancy table"""
+    Reservation = apps.get_model('renting', 'Reservation')
+    CarOccupancy = apps.get_model('renting', 'CarOccupancy')
+
+    bitmaps = defaultdict(int)
+    spans = Reservation.objects.order_by().values_list('car_id', 'start_date', 'end_date')
+    for car_id, start, end in spans.iterator():
+        for year, mask in year_masks(start, end).items():
+            bitmaps[(car_id, year)] |= mask
+    CarOccupancy.objects.bulk_create(
+        [
+            CarOccupancy(car_id=car_id, year=year, days=bits.to_bytes(BITMAP_BYTES, 'little'))
+            for (car_id, year), bits in bitmaps.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('renting', '0002_alter_appuser_options_alter_brand_options_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CarOccupancy',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveSmallIntegerField()),
+                ('days', models.BinaryField(max_length=46)),
+                ('car', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='occupancy', to='renting.car')),
+            ],
+            options={
+                'verbose_name': 'Car Occupancy',
+                'verbose_name_plural': 'Car Occupancy',
+                'db_table': 'car_occupancy',
+                'ordering': ['car', 'year'],
+                'constraints': [models.UniqueConstraint(fields=('car', 'year'), name='unique_car_occupancy_year')],
+            },
+        ),
+        migrations.RunPython(populate_occupancy, migrations.RunPython.noop),
+    ]
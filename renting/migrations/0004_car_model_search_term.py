@@ -0,0 +1,78 @@
+# Generated by Django 6.0.1 on 2026-10-18 01:05
+
+import unicodedata
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Frozen copy of the term rules (renting.search) the index was created with
+TERM_LENGTH = 40
+MODEL_FIELDS = (
+    ('model_name', 4),
+    ('brand__name', 4),
+    ('vehicle_type__name', 2),
+    ('fuel_type__name', 1),
+    ('transmission__name', 1),
+)
+
+
+def words(text):
+    """Case- and accent-insensitive words, cut to the term column length"""
+    decomposed = unicodedata.normalize('NFKD', text or '')
+    normalized = ''.join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+    return [word[:TERM_LENGTH] for word in normalized.split()]
+
+
+def model_terms(values):
+    """{term: weight}: every suffix of every word; a term that starts a word counts double"""
+    terms = {}
+    for field, weight in MODEL_FIELDS:
+        for word in words(values.get(field)):
+            for start in range(len(word)):
+                term_weight = weight * 2 if start == 0 else weight
+                term = word[start:]
+                if terms.get(term, 0) < term_weight:
+                    terms[term] = term_weight
+    return terms
+
+
+def populate_search_terms(apps, schema_editor):
+    """Index car models that predate the search table"""
+    CarModel = apps.get_model('renting', 'CarModel')
+    CarModelSearchTerm = apps.get_model('renting', 'CarModelSearchTerm')
+
+    rows = CarModel.objects.order_by().values('id', *(field for field, _ in MODEL_FIELDS))
+    CarModelSearchTerm.objects.bulk_create(
+        (
+            CarModelSearchTerm(car_model_id=values['id'], term=term, weight=weight)
+            for values in rows.iterator()
+            for term, weight in model_terms(values).items()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('renting', '0003_car_occupancy'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CarModelSearchTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=40)),
+                ('weight', models.PositiveSmallIntegerField()),
+                ('car_model', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to='renting.carmodel')),
+            ],
+            options={
+                'verbose_name': 'Car Model Search Term',
+                'verbose_name_plural': 'Car Model Search Terms',
+                'db_table': 'car_model_search_term',
+                'indexes': [models.Index(fields=['term', 'car_model', 'weight'], name='search_term_idx')],
+            },
+        ),
+        migrations.RunPython(populate_search_terms, migrations.RunPython.noop),
+    ]
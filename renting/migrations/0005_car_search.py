@@ -0,0 +1,57 @@
+# Generated by Django 6.0.1 on 2026-10-18 01:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def populate_car_search(apps, schema_editor):
+    """Flatten cars that predate the read model"""
+    Car = apps.get_model('renting', 'Car')
+    CarSearch = apps.get_model('renting', 'CarSearch')
+
+    rows = Car.objects.order_by().values(
+        'id', 'license_plate', 'mileage', 'color_id', 'car_model_id',
+        'car_model__brand_id', 'car_model__vehicle_type_id', 'car_model__fuel_type_id',
+        'car_model__transmission_id', 'car_model__seats', 'car_model__daily_price',
+    )
+    CarSearch.objects.bulk_create(
+        (
+            CarSearch(**{name.replace('car_model__', ''): value for name, value in values.items()})
+            for values in rows.iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('renting', '0004_car_model_search_term'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CarSearch',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('license_plate', models.CharField(max_length=20, unique=True)),
+                ('mileage', models.PositiveIntegerField(blank=True, null=True)),
+                ('seats', models.PositiveIntegerField(null=True)),
+                ('daily_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('brand', models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='renting.brand')),
+                ('car_model', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='renting.carmodel')),
+                ('color', models.ForeignKey(db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='renting.color')),
+                ('fuel_type', models.ForeignKey(db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='renting.fueltype')),
+                ('transmission', models.ForeignKey(db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='renting.transmission')),
+                ('vehicle_type', models.ForeignKey(db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='renting.vehicletype')),
+            ],
+            options={
+                'verbose_name': 'Car Search Row',
+                'verbose_name_plural': 'Car Search Rows',
+                'db_table': 'car_search',
+                'ordering': ['license_plate'],
+                'indexes': [models.Index(fields=['brand', 'daily_price'], name='car_search_brand_price_idx'), models.Index(fields=['vehicle_type', 'daily_price'], name='car_search_type_price_idx'), models.Index(fields=['fuel_type', 'transmission', 'daily_price'], name='car_search_fuel_price_idx'), models.Index(fields=['seats', 'daily_price'], name='car_search_seats_price_idx'), models.Index(fields=['daily_price', 'id'], name='car_search_price_idx'), models.Index(fields=['mileage', 'id'], name='car_search_mileage_idx')],
+            },
+        ),
+        migrations.RunPython(populate_car_search, migrations.RunPython.noop),
+    ]
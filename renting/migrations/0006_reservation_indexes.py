@@ -0,0 +1,38 @@
+# Generated by Django 6.0.1 on 2026-10-18 01:18
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('renting', '0005_car_search'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['car', 'start_date', 'end_date'], name='reservation_car_dates_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['user', 'start_date'], name='reservation_user_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['start_date', 'end_date', 'car'], name='reservation_dates_idx'),
+        ),
+        # Dropped only after the composites exist: MySQL needs an index for each FK
+        migrations.AlterField(
+            model_name='reservation',
+            name='car',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='reservations', to='renting.car'),
+        ),
+        migrations.AlterField(
+            model_name='reservation',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='reservations', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 6.0.1 on 2026-10-18 01:21
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('renting', '0006_reservation_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedReservation',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('start_date', models.DateField()),
+                ('end_date', models.DateField()),
+                ('coverage', models.CharField(blank=True, max_length=100)),
+                ('rate', models.DecimalField(decimal_places=2, default=Decimal('1.00'), max_digits=5)),
+                ('total_price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('car', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_reservations', to='renting.car')),
+                ('user', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='archived_reservations', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Archived Reservation',
+                'verbose_name_plural': 'Archived Reservations',
+                'db_table': 'reservation_archive',
+                'ordering': ['-start_date'],
+                'indexes': [models.Index(fields=['user', 'start_date'], name='archive_user_start_idx'), models.Index(fields=['start_date'], name='archive_start_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 6.0.1 on 2026-10-18 01:26
+
+import django.core.validators
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('renting', '0007_reservation_archive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PricingRule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('kind', models.CharField(choices=[('age', 'Driver age (coverage and rate)'), ('season', 'Season (per rental day)'), ('duration', 'Long rental'), ('vehicle_type', 'Vehicle type')], max_length=20)),
+                ('multiplier', models.DecimalField(decimal_places=2, help_text='Factor on the daily price (0.90 = 10% off, 1.25 = 25% surcharge)', max_digits=4, validators=[django.core.validators.MinValueValidator(Decimal('0.01'))])),
+                ('is_active', models.BooleanField(default=True)),
+                ('coverage', models.CharField(blank=True, max_length=100)),
+                ('min_age', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('max_age', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('start_date', models.DateField(blank=True, null=True)),
+                ('end_date', models.DateField(blank=True, null=True)),
+                ('min_days', models.PositiveIntegerField(blank=True, null=True)),
+                ('vehicle_type', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='pricing_rules', to='renting.vehicletype')),
+            ],
+            options={
+                'verbose_name': 'Pricing Rule',
+                'verbose_name_plural': 'Pricing Rules',
+                'db_table': 'pricing_rule',
+                'ordering': ['kind', 'name'],
+            },
+        ),
+    ]
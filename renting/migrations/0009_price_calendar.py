@@ -0,0 +1,30 @@
+# Generated by Django 6.0.1 on 2026-10-18 01:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('renting', '0008_pricing_rule'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CarModelPriceCalendar',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveSmallIntegerField()),
+                ('prices', models.BinaryField(max_length=1464)),
+                ('car_model', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='price_calendar', to='renting.carmodel')),
+            ],
+            options={
+                'verbose_name': 'Price Calendar',
+                'verbose_name_plural': 'Price Calendars',
+                'db_table': 'car_model_price_calendar',
+                'ordering': ['car_model', 'year'],
+                'constraints': [models.UniqueConstraint(fields=('car_model', 'year'), name='unique_car_model_price_year')],
+            },
+        ),
+    ]
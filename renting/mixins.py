@@ -0,0 +1,327 @@
+import json
+import time
+import warnings
+from collections import namedtuple
+from hashlib import md5
+from django.core.exceptions import FieldDoesNotExist
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from rest_framework import serializers
+from rest_framework.response import Response
+from .caching import cache_shared, get_validators
+from .lookups import lookup_cache
+from .rows import compile_renderer
+
+
+class RelationNotLoadedWarning(RuntimeWarning):
+    """A serializer reads a relation the list queryset does not load"""
+
+
+QueryPlan = namedtuple('QueryPlan', 'select_related prefetch_related only unresolved')
+
+
+# ============================================
+# Planner
+# ============================================
+
+
+def plan_serializer(serializer_class, model):
+    """
+    Derive the queryset a serializer needs from its field sources.
+
+    - Dotted sources through forward FK/one-to-one fields become select_related.
+    - Reverse and many-to-many relations (many=True fields) become prefetch_related.
+    - Every concrete column read becomes an only() entry; `unresolved` lists
+      sources that end on something other than a field (property, method, '*'),
+      in which case only() must not be used.
+    """
+    plan = QueryPlan(set(), set(), set(), [])
+    _walk(serializer_class(), model, '', plan)
+    return QueryPlan(
+        sorted(plan.select_related), sorted(plan.prefetch_related),
+        sorted(plan.only), plan.unresolved,
+    )
+
+
+def _walk(serializer, model, prefix, plan):
+    for field in serializer.fields.values():
+        if field.write_only:
+            continue
+        if field.source == '*':
+            if not isinstance(field, serializers.BaseSerializer):
+                plan.unresolved.append(f'{prefix}{field.field_name}')
+            continue
+
+        path, current = prefix, model
+        attrs = field.source.split('.')
+        for position, attr in enumerate(attrs):
+            try:
+                model_field = current._meta.get_field(attr)
+            except FieldDoesNotExist:
+                plan.unresolved.append(f'{path}{attr}')
+                break
+            # Foreign key ids (`brand_id`) plan as the relation itself
+            lookup = f'{path}{model_field.name}'
+            last = position == len(attrs) - 1
+
+            if model_field.many_to_many or model_field.one_to_many:
+                # Columns of prefetched rows are not restricted
+                plan.prefetch_related.add(lookup)
+                break
+            if model_field.is_relation:
+                # Forward FK/one-to-one: the column itself is always needed
+                plan.only.add(lookup)
+                if last and not isinstance(field, serializers.BaseSerializer):
+                    # PrimaryKeyRelatedField and friends only read the id
+                    break
+                if not model_field.concrete:
+                    # Reverse one-to-one cannot be deferred on
+                    plan.unresolved.append(lookup)
+                plan.select_related.add(lookup)
+                path, current = f'{lookup}__', model_field.related_model
+                if last:
+                    _walk(field, current, path, plan)
+                continue
+            if not last:
+                plan.unresolved.append(lookup)
+                break
+            plan.only.add(lookup)
+
+
+def missing_relations(queryset, plan):
+    """Relations the plan reads that the queryset neither joins nor prefetches"""
+    joined = set()
+
+    def collect(tree, prefix=''):
+        for name, subtree in tree.items():
+            joined.add(f'{prefix}{name}')
+            collect(subtree, f'{prefix}{name}__')
+
+    select_related = queryset.query.select_related
+    if select_related is True:
+        return []
+    if select_related:
+        collect(select_related)
+    prefetched = set(queryset._prefetch_related_lookups)
+    return [
+        path for path in plan.select_related + plan.prefetch_related
+        if path not in joined and path not in prefetched
+    ]
+
+
+# ============================================
+# ViewSet mixin
+# ============================================
+
+
+class QueryPlanMixin:
+    """
+    Builds select_related/prefetch_related from the serializer's sources, and
+    restricts columns with only() on read actions, so list responses cost a
+    fixed number of queries whatever the page size.
+
+    Write actions keep full rows: saving a partially loaded instance would
+    only write its loaded columns.
+    """
+    plan_only_actions = ('list', 'retrieve')
+    _query_plans = {}
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        plan = self.get_query_plan(queryset.model)
+        if plan.select_related:
+            queryset = queryset.select_related(*plan.select_related)
+        if plan.prefetch_related:
+            queryset = queryset.prefetch_related(*plan.prefetch_related)
+        if plan.only and not plan.unresolved and self.action in self.plan_only_actions:
+            queryset = queryset.only(*plan.only)
+        return queryset
+
+    def get_query_plan(self, model):
+        """Plan for the current serializer, computed once per class"""
+        serializer_class = self.get_serializer_class()
+        key = (serializer_class, model)
+        plan = self._query_plans.get(key)
+        if plan is None:
+            plan = plan_serializer(serializer_class, model)
+            if plan.unresolved:
+                warnings.warn(
+                    f"{serializer_class.__name__} reads {', '.join(plan.unresolved)} "
+                    f"which cannot be planned on {model.__name__}; only() is disabled",
+                    RelationNotLoadedWarning,
+                )
+            self._query_plans[key] = plan
+        return plan
+
+
+class ValuesListMixin:
+    """
+    list() reads flat values() rows and renders them with a RowRenderer
+    compiled from the serializer, producing the same JSON as the serializer
+    without model instances. Falls back to the regular list() when the
+    serializer has fields that cannot be read from values().
+    """
+    _row_renderers = {}
+
+    def get_row_renderer(self, model):
+        serializer_class = self.get_serializer_class()
+        key = (serializer_class, model)
+        if key not in self._row_renderers:
+            self._row_renderers[key] = compile_renderer(serializer_class, model)
+        return self._row_renderers[key]
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        renderer = self.get_row_renderer(queryset.model)
+        if renderer is None:
+            return super().list(request, *args, **kwargs)
+
+        rows = queryset.values(*renderer.lookups)
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(renderer.render(page, request))
+        return Response(renderer.render(rows, request))
+
+
+class ReadModelMixin:
+    """
+    Listing actions filter, sort, count and page a flattened read model
+    (`read_model`, one row per object sharing its primary key); only the
+    objects of the returned page are then loaded and serialized through the
+    regular queryset. Filter backends are written against the read model,
+    so other actions look objects up by primary key only.
+    """
+    read_model = None
+    read_model_actions = ('list',)
+
+    def get_queryset(self):
+        if self.action in self.read_model_actions:
+            return self.read_model.objects.all()
+        return super().get_queryset()
+
+    def filter_queryset(self, queryset):
+        if queryset.model is not self.read_model:
+            return queryset
+        return super().filter_queryset(queryset)
+
+    def list(self, request, *args, **kwargs):
+        rows = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(rows)
+        data = self.render_rows(list(rows) if page is None else page)
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
+
+    def get_object_queryset(self):
+        """Queryset the page's objects are loaded from (the regular get_queryset())"""
+        return super().get_queryset()
+
+    def render_rows(self, rows):
+        """Serialized objects for a page of read model rows"""
+        return self.render_objects([row.pk for row in rows])
+
+    def render_objects(self, pks):
+        """Serialized objects for `pks`, in that order"""
+        queryset = self.get_object_queryset().filter(pk__in=pks)
+        renderer = self.get_row_renderer(queryset.model) if hasattr(self, 'get_row_renderer') else None
+        if renderer is None:
+            objects = {obj.pk: obj for obj in queryset}
+            found = [objects[pk] for pk in pks if pk in objects]
+            return self.get_serializer(found, many=True).data
+
+        pk_name = queryset.model._meta.pk.attname
+        rows = {row[pk_name]: row for row in queryset.values(*dict.fromkeys([pk_name, *renderer.lookups]))}
+        # Objects deleted since the page was read are skipped
+        return renderer.render([rows[pk] for pk in pks if pk in rows], self.request)
+
+
+class CachedLookupMixin:
+    """
+    list/retrieve for lookup tables (id, name) served from the lookup cache.
+    Requests with params other than paging (e.g. ?ordering=) and ids missing
+    from the cache go to the database.
+    """
+    paging_params = ('page', 'page_size')
+
+    def list(self, request, *args, **kwargs):
+        if any(name not in self.paging_params for name in request.query_params):
+            return super().list(request, *args, **kwargs)
+
+        model = self.queryset.model
+        instances = [model(id=pk, name=name) for pk, name in lookup_cache.table(model).rows]
+        page = self.paginate_queryset(instances)
+        if page is not None:
+            return self.get_paginated_response(self.get_serializer(page, many=True).data)
+        return Response(self.get_serializer(instances, many=True).data)
+
+    def retrieve(self, request, *args, **kwargs):
+        model = self.queryset.model
+        try:
+            pk = int(self.kwargs[self.lookup_url_kwarg or self.lookup_field])
+        except (TypeError, ValueError):
+            pk = None
+        name = lookup_cache.table(model).names.get(pk)
+        if name is None:
+            return super().retrieve(request, *args, **kwargs)
+
+        instance = model(id=pk, name=name)
+        self.check_object_permissions(request, instance)
+        return Response(self.get_serializer(instance).data)
+
+
+class ConditionalGetMixin:
+    """
+    Conditional GET for read-mostly resources.
+
+    ETag and Last-Modified come from the version counters and change times of
+    the tables in `conditional_tables`, so a matching If-None-Match or
+    If-Modified-Since gets 304 before any query or serialization. Full
+    responses get `Cache-Control: max-age` of a tenth of the time since the
+    last change (capped): data untouched for a week is cached for an hour,
+    data changed a minute ago for a few seconds.
+    Without a cache shared by all workers the counters are not trusted and
+    responses are sent in full.
+    """
+    conditional_tables = ()
+    conditional_actions = ('list', 'retrieve')
+    max_age_ratio = 0.1
+    max_age_limit = 3600
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_get(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_get(super().retrieve, request, *args, **kwargs)
+
+    def conditional_get(self, handler, request, *args, **kwargs):
+        if not self.get_conditional_names() or self.action not in self.conditional_actions or not cache_shared():
+            return handler(request, *args, **kwargs)
+
+        etag, last_modified = self.get_validators(request)
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        patch_cache_control(response, public=True, must_revalidate=True, max_age=self.get_max_age(last_modified))
+        return response
+
+    def get_conditional_names(self):
+        """Version counters the response depends on (`conditional_tables` by default)"""
+        return self.conditional_tables
+
+    def get_validators(self, request):
+        """(quoted ETag, last modified timestamp) for this URL and representation"""
+        versions, last_modified = get_validators(*self.get_conditional_names())
+        raw = json.dumps([
+            type(self).__name__, self.action, sorted(self.kwargs.items()),
+            sorted(request.query_params.lists()), versions,
+            request.get_host(), request.META.get('HTTP_ACCEPT', ''),
+        ])
+        return quote_etag(md5(raw.encode()).hexdigest()), int(last_modified)
+
+    def get_max_age(self, last_modified):
+        age = max(0, time.time() - last_modified)
+        return int(min(self.max_age_limit, age * self.max_age_ratio))
@@ -1,11 +1,12 @@
-from django.db import models
+from django.db import models, transaction
 from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils.translation import gettext_lazy as _
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
 from django.contrib.auth.hashers import make_password, check_password
 from decimal import Decimal
-from datetime import date
+from .availability import reservation_changed
+from . import occupancy, price_calendar, pricing
 
 
 # ============================================
@@ -231,6 +232,81 @@ class Car(models.Model):
         return f"{self.license_plate} - {self.car_model}"
 
 
+# ============================================
+# Pricing rules (compiled by renting/pricing.py)
+# ============================================
+
+
+class PricingRule(models.Model):
+    """Price multiplier applied to quotes and new reservations"""
+    AGE = 'age'
+    SEASON = 'season'
+    DURATION = 'duration'
+    VEHICLE_TYPE = 'vehicle_type'
+    KIND_CHOICES = [
+        (AGE, 'Driver age (coverage and rate)'),
+        (SEASON, 'Season (per rental day)'),
+        (DURATION, 'Long rental'),
+        (VEHICLE_TYPE, 'Vehicle type'),
+    ]
+    # Fields each kind of rule needs
+    KIND_FIELDS = {
+        AGE: ['coverage'],
+        SEASON: ['start_date', 'end_date'],
+        DURATION: ['min_days'],
+        VEHICLE_TYPE: ['vehicle_type'],
+    }
+
+    name = models.CharField(max_length=100)
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    multiplier = models.DecimalField(
+        max_digits=4,
+        decimal_places=2,
+        validators=[MinValueValidator(Decimal('0.01'))],
+        help_text="Factor on the daily price (0.90 = 10% off, 1.25 = 25% surcharge)"
+    )
+    is_active = models.BooleanField(default=True)
+
+    # Age: drivers aged min_age..max_age get this coverage, multiplier is the rate
+    coverage = models.CharField(max_length=100, blank=True)
+    min_age = models.PositiveSmallIntegerField(null=True, blank=True)
+    max_age = models.PositiveSmallIntegerField(null=True, blank=True)
+    # Season: rental days between both dates (inclusive)
+    start_date = models.DateField(null=True, blank=True)
+    end_date = models.DateField(null=True, blank=True)
+    # Long rental: rentals of at least min_days days (the longest tier applies)
+    min_days = models.PositiveIntegerField(null=True, blank=True)
+    # Vehicle type: cars of this type
+    vehicle_type = models.ForeignKey(
+        VehicleType, on_delete=models.CASCADE, null=True, blank=True, related_name='pricing_rules'
+    )
+
+    class Meta:
+        db_table = 'pricing_rule'
+        verbose_name = 'Pricing Rule'
+        verbose_name_plural = 'Pricing Rules'
+        ordering = ['kind', 'name']
+
+    def clean(self):
+        """Each kind needs its own fields; ranges must be ordered"""
+        super().clean()
+
+        errors = {
+            field: _('Required for this kind of rule')
+            for field in self.KIND_FIELDS.get(self.kind, [])
+            if getattr(self, field if field != 'vehicle_type' else 'vehicle_type_id') in (None, '')
+        }
+        if self.start_date and self.end_date and self.start_date > self.end_date:
+            errors['end_date'] = _('End date must be equal to or later than start date')
+        if self.min_age is not None and self.max_age is not None and self.min_age > self.max_age:
+            errors['max_age'] = _('Maximum age must be equal to or greater than minimum age')
+        if errors:
+            raise ValidationError(errors)
+
+    def __str__(self):
+        return f"{self.name} ({self.get_kind_display()} x{self.multiplier})"
+
+
 # ============================================
 # Reservations
 # ============================================
@@ -252,74 +328,242 @@ class Reservation(models.Model):
         help_text="Total reservation price (calculated automatically)"
     )
     
-    user = models.ForeignKey(AppUser, on_delete=models.CASCADE, related_name='reservations')
-    car = models.ForeignKey(Car, on_delete=models.CASCADE, related_name='reservations')
+    # Single-column FK indexes are covered by the composite indexes below
+    user = models.ForeignKey(AppUser, on_delete=models.CASCADE, related_name='reservations', db_index=False)
+    car = models.ForeignKey(Car, on_delete=models.CASCADE, related_name='reservations', db_index=False)
 
     class Meta:
         db_table = 'reservation'
         verbose_name = 'Reservation'
         verbose_name_plural = 'Reservations'
         ordering = ['-start_date']
+        indexes = [
+            # Per-car overlap checks and interval loads (covering)
+            models.Index(fields=['car', 'start_date', 'end_date'], name='reservation_car_dates_idx'),
+            # my_reservations: one user's rows in start_date order
+            models.Index(fields=['user', 'start_date'], name='reservation_user_start_idx'),
+            # Default ordering, admin date_hierarchy and window overlap scans (covering)
+            models.Index(fields=['start_date', 'end_date', 'car'], name='reservation_dates_idx'),
+        ]
+
+    OVERLAP_MESSAGE = _("Selected dates overlap with another reservation for this vehicle")
 
     def clean(self):
         """Validate dates and prevent overlapping reservations"""
         super().clean()
-        
+        self.clean_dates()
+
+        # Check for overlapping reservations for same car (occupancy bitmap)
+        if self.start_date and self.end_date and self.car_id:
+            if self.overlaps_existing():
+                raise ValidationError(self.OVERLAP_MESSAGE)
+
+    def clean_dates(self):
+        """Date order and price checks that need no database access"""
         # Validate end_date >= start_date
         if self.start_date and self.end_date and self.start_date > self.end_date:
             raise ValidationError({
                 "end_date": _("End date must be equal to or later than start date")
             })
-
-        # Check for overlapping reservations for same car
-        if self.start_date and self.end_date and self.car_id:
-            overlapping = Reservation.objects.filter(
-                car=self.car,
-                start_date__lte=self.end_date,
-                end_date__gte=self.start_date,
-            )
-            
-            # Exclude self when updating
-            if self.pk:
-                overlapping = overlapping.exclude(pk=self.pk)
-                
-            if overlapping.exists():
-                raise ValidationError(
-                    _("Selected dates overlap with another reservation for this vehicle")
-                )
                 
         if self.total_price is not None and self.total_price <= 0:
             raise ValidationError({'total_price': _('Total price must be greater than 0')})
 
+    def overlaps_existing(self):
+        """True if another reservation of the same car books any of these days"""
+        # Exclude self when updating: its stored days must not count
+        previous = getattr(self, '_loaded_span', None)
+        ignore = previous[1:] if previous and previous[0] == self.car_id else None
+        return occupancy.is_booked(self.car_id, self.start_date, self.end_date, ignore=ignore)
+
     def calculate_details(self):
-        """Calculate coverage, rate, and total_price based on user age"""
-        today = date.today()
-        birth = self.user.birth_date
-        
-        if not birth:
-            self.coverage = "Standard"
-            self.rate = Decimal('1.00')
-        else:
-            age = today.year - birth.year - ((today.month, today.day) < (birth.month, birth.day))
-            
-            if age < 25:
-                self.coverage = "Young Driver"
-                self.rate = Decimal('1.50')
-            elif age <= 65:
-                self.coverage = "Standard"
-                self.rate = Decimal('1.00')
-            else:
-                self.coverage = "Senior/Premium"
-                self.rate = Decimal('1.20')
-
-        duration = (self.end_date - self.start_date).days + 1
-        daily_price = self.car.car_model.daily_price
-        self.total_price = Decimal(duration) * daily_price * self.rate
+        """Calculate coverage, rate, and total_price from the pricing rules (renting/pricing.py)"""
+        car_model = self.car.car_model
+        self.coverage, self.rate, _, self.total_price = pricing.quote(
+            car_model.daily_price, self.user.birth_date, self.start_date, self.end_date,
+            vehicle_type_id=car_model.vehicle_type_id, car_model_id=car_model.pk,
+        )
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Remember the stored car and dates so moves update both old and new days"""
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_span = occupancy.reservation_span(instance)
+        return instance
 
     def save(self, *args, **kwargs):
-        """Auto-calculate pricing details before save"""
+        """Auto-calculate pricing details, then save and claim the booked days atomically"""
         self.calculate_details()
-        super().save(*args, **kwargs)
+        previous = getattr(self, '_loaded_span', None)
+        current = occupancy.reservation_span(self)
+
+        # Claiming the days locks only this car's bitmap rows, so concurrent
+        # bookings of the same car serialize and other cars never contend.
+        # The rows are created beforehand so the lock never falls on a gap
+        if current and previous != current and not transaction.get_connection().in_atomic_block:
+            occupancy.ensure_rows(current)
+        try:
+            with transaction.atomic():
+                if previous != current:
+                    occupancy.apply_change(old_span=previous, new_span=current)
+                super().save(*args, **kwargs)
+        except occupancy.OccupancyConflict:
+            raise ValidationError(self.OVERLAP_MESSAGE)
+
+        reservation_changed(previous, current)
+        self._loaded_span = current
 
     def __str__(self):
         return f"Reservation {self.id} - {self.user.email} ({self.start_date} to {self.end_date})"
+
+
+class ArchivedReservation(models.Model):
+    """
+    Completed reservation moved out of the hot `reservation` table by
+    `manage.py archive_reservations`. Same id and columns; read-only.
+    Its booked days stay in the occupancy bitmaps until it is deleted.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    start_date = models.DateField()
+    end_date = models.DateField()
+    coverage = models.CharField(max_length=100, blank=True)
+    rate = models.DecimalField(max_digits=5, decimal_places=2, default=Decimal('1.00'))
+    total_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+
+    user = models.ForeignKey(AppUser, on_delete=models.CASCADE, related_name='archived_reservations', db_index=False)
+    car = models.ForeignKey(Car, on_delete=models.CASCADE, related_name='archived_reservations')
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'reservation_archive'
+        verbose_name = 'Archived Reservation'
+        verbose_name_plural = 'Archived Reservations'
+        ordering = ['-start_date']
+        indexes = [
+            models.Index(fields=['user', 'start_date'], name='archive_user_start_idx'),
+            models.Index(fields=['start_date'], name='archive_start_idx'),
+        ]
+
+    def __str__(self):
+        return f"Archived reservation {self.id} ({self.start_date} to {self.end_date})"
+
+
+class CarOccupancy(models.Model):
+    """
+    Booked days of one car in one calendar year as a bitmap.
+    Bit i is day i counted from January 1st; maintained by Reservation.save()
+    and rebuilt with `manage.py rebuild_occupancy`.
+    """
+    car = models.ForeignKey(Car, on_delete=models.CASCADE, related_name='occupancy')
+    year = models.PositiveSmallIntegerField()
+    days = models.BinaryField(max_length=occupancy.BITMAP_BYTES)
+
+    class Meta:
+        db_table = 'car_occupancy'
+        verbose_name = 'Car Occupancy'
+        verbose_name_plural = 'Car Occupancy'
+        ordering = ['car', 'year']
+        constraints = [
+            models.UniqueConstraint(fields=['car', 'year'], name='unique_car_occupancy_year'),
+        ]
+
+    def __str__(self):
+        return f"Occupancy {self.car_id} ({self.year})"
+
+
+class CarModelPriceCalendar(models.Model):
+    """
+    Per-day prices of one car model in one calendar year, packed as 366
+    little-endian uint32 cents (day i counted from January 1st). 0 means the
+    model's daily_price applies. Written by renting/price_calendar.py.
+    """
+    car_model = models.ForeignKey(CarModel, on_delete=models.CASCADE, related_name='price_calendar')
+    year = models.PositiveSmallIntegerField()
+    prices = models.BinaryField(max_length=price_calendar.CALENDAR_BYTES)
+
+    class Meta:
+        db_table = 'car_model_price_calendar'
+        verbose_name = 'Price Calendar'
+        verbose_name_plural = 'Price Calendars'
+        ordering = ['car_model', 'year']
+        constraints = [
+            models.UniqueConstraint(fields=['car_model', 'year'], name='unique_car_model_price_year'),
+        ]
+
+    def __str__(self):
+        return f"Prices {self.car_model_id} ({self.year})"
+
+
+class CarModelSearchTerm(models.Model):
+    """
+    Search index for `?search=` on cars: every suffix of every word of a car
+    model's name, brand, vehicle type, fuel and transmission, with a weight.
+    Maintained by signals; see renting/search.py.
+    """
+    car_model = models.ForeignKey(CarModel, on_delete=models.CASCADE, related_name='search_terms')
+    term = models.CharField(max_length=40)
+    weight = models.PositiveSmallIntegerField()
+
+    class Meta:
+        db_table = 'car_model_search_term'
+        verbose_name = 'Car Model Search Term'
+        verbose_name_plural = 'Car Model Search Terms'
+        indexes = [
+            # Prefix scans on term, covering the model id and weight
+            models.Index(fields=['term', 'car_model', 'weight'], name='search_term_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.term} ({self.car_model_id}, {self.weight})"
+
+
+class CarSearch(models.Model):
+    """
+    Flattened read model for car listings: one row per car (same id) with
+    every column CarFilter filters or sorts on, so list queries touch a
+    single table. Maintained by signals and checked with
+    `manage.py verify_car_search`; see renting/car_search.py.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    license_plate = models.CharField(max_length=20, unique=True)
+    mileage = models.PositiveIntegerField(null=True, blank=True)
+    color = models.ForeignKey(
+        Color, on_delete=models.DO_NOTHING, db_constraint=False, null=True, related_name='+'
+    )
+    car_model = models.ForeignKey(CarModel, on_delete=models.DO_NOTHING, db_constraint=False, related_name='+')
+    brand = models.ForeignKey(
+        Brand, on_delete=models.DO_NOTHING, db_constraint=False, db_index=False, related_name='+'
+    )
+    vehicle_type = models.ForeignKey(
+        VehicleType, on_delete=models.DO_NOTHING, db_constraint=False, db_index=False,
+        null=True, related_name='+'
+    )
+    fuel_type = models.ForeignKey(
+        FuelType, on_delete=models.DO_NOTHING, db_constraint=False, db_index=False,
+        null=True, related_name='+'
+    )
+    transmission = models.ForeignKey(
+        Transmission, on_delete=models.DO_NOTHING, db_constraint=False, db_index=False,
+        null=True, related_name='+'
+    )
+    seats = models.PositiveIntegerField(null=True)
+    daily_price = models.DecimalField(max_digits=10, decimal_places=2)
+
+    class Meta:
+        db_table = 'car_search'
+        verbose_name = 'Car Search Row'
+        verbose_name_plural = 'Car Search Rows'
+        ordering = ['license_plate']
+        indexes = [
+            # Filter equality column(s) first, then the price range/sort column
+            models.Index(fields=['brand', 'daily_price'], name='car_search_brand_price_idx'),
+            models.Index(fields=['vehicle_type', 'daily_price'], name='car_search_type_price_idx'),
+            models.Index(fields=['fuel_type', 'transmission', 'daily_price'], name='car_search_fuel_price_idx'),
+            models.Index(fields=['seats', 'daily_price'], name='car_search_seats_price_idx'),
+            # Sorts, with the id tie-break used by cursor pagination
+            models.Index(fields=['daily_price', 'id'], name='car_search_price_idx'),
+            models.Index(fields=['mileage', 'id'], name='car_search_mileage_idx'),
+        ]
+
+    def __str__(self):
+        return f"Search row {self.license_plate}"
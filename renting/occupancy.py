@@ -0,0 +1,251 @@
+from collections import defaultdict
+from datetime import date, timedelta
+from itertools import chain
+from django.db import transaction
+from .caching import bump_version_on_commit
+
+
+# Bit i of a year's bitmap is day i counted from January 1st (366 days max)
+BITMAP_BYTES = 46
+# Bumped when every bitmap is rebuilt (reservation writes bump per-car versions)
+REBUILD_VERSION_NAME = 'occupancy_rebuild'
+
+
+class OccupancyConflict(Exception):
+    """Raised when a reservation claims days already booked for the car"""
+
+
+# ============================================
+# Bitmap helpers (pure functions)
+# ============================================
+
+
+def year_masks(start, end):
+    """Split [start, end] (inclusive) into {year: bitmask of booked days}"""
+    masks = {}
+    for year in range(start.year, end.year + 1):
+        first = max(start, date(year, 1, 1))
+        last = min(end, date(year, 12, 31))
+        offset = first.timetuple().tm_yday - 1
+        masks[year] = ((1 << ((last - first).days + 1)) - 1) << offset
+    return masks
+
+
+def to_bytes(bits):
+    return bits.to_bytes(BITMAP_BYTES, 'little')
+
+
+def from_bytes(data):
+    return int.from_bytes(bytes(data), 'little') if data else 0
+
+
+def build_bitmaps(spans):
+    """
+    Fold (car_id, start_date, end_date) rows into {(car_id, year): bits}.
+    Returns the bitmaps and the number of rows that collided with another.
+    """
+    bitmaps = defaultdict(int)
+    collisions = 0
+    for car_id, start, end in spans:
+        for year, mask in year_masks(start, end).items():
+            key = (car_id, year)
+            if bitmaps[key] & mask:
+                collisions += 1
+            bitmaps[key] |= mask
+    return dict(bitmaps), collisions
+
+
+def bit_runs(bits):
+    """Yield (offset, length) of each run of consecutive set bits, lowest first"""
+    offset = 0
+    while bits:
+        # Skip the run of zeros, then measure the run of ones
+        zeros = (bits & -bits).bit_length() - 1
+        bits >>= zeros
+        offset += zeros
+        ones = (~bits & (bits + 1)).bit_length() - 1
+        yield offset, ones
+        bits >>= ones
+        offset += ones
+
+
+def bits_to_ranges(year, bits):
+    """Yield (start, end) date ranges of consecutive set bits in a year bitmap"""
+    jan1 = date(year, 1, 1)
+    for offset, length in bit_runs(bits):
+        yield jan1 + timedelta(days=offset), jan1 + timedelta(days=offset + length - 1)
+
+
+# ============================================
+# Database access
+# ============================================
+
+
+def _stored_bits(car_id, years):
+    from .models import CarOccupancy
+
+    rows = CarOccupancy.objects.filter(car_id=car_id, year__in=years).order_by().values_list('year', 'days')
+    return {year: from_bytes(days) for year, days in rows}
+
+
+def is_booked(car_id, start, end, ignore=None):
+    """
+    True if any day of [start, end] is already booked for the car.
+    `ignore` is a (start, end) span whose days are not counted, typically the
+    stored dates of the reservation being edited.
+    """
+    masks = year_masks(start, end)
+    stored = _stored_bits(car_id, masks.keys())
+    ignored = year_masks(*ignore) if ignore else {}
+    return any(
+        stored.get(year, 0) & ~ignored.get(year, 0) & mask
+        for year, mask in masks.items()
+    )
+
+
+def busy_ranges(car_id, start, end):
+    """Merged booked date ranges of a car clipped to [start, end] (calendar rendering)"""
+    ranges = []
+    stored = _stored_bits(car_id, year_masks(start, end).keys())
+    for year, mask in sorted(year_masks(start, end).items()):
+        for first, last in bits_to_ranges(year, stored.get(year, 0) & mask):
+            if ranges and ranges[-1][1] + timedelta(days=1) == first:
+                ranges[-1] = (ranges[-1][0], last)
+            else:
+                ranges.append((first, last))
+    return ranges
+
+
+def ensure_rows(span):
+    """
+    Create the missing (car, year) rows of a (car_id, start, end) span, each
+    statement committed on its own: call it before the transaction that
+    locks them. On MySQL (REPEATABLE READ) locking a row that does not exist
+    takes a gap lock, and two first bookings of a car for a new year then
+    deadlock on their inserts; existing rows are locked by record only.
+    """
+    from .models import CarOccupancy
+
+    car_id, start, end = span
+    years = range(start.year, end.year + 1)
+    existing = set(CarOccupancy.objects.filter(car_id=car_id, year__in=years).values_list('year', flat=True))
+    missing = [year for year in years if year not in existing]
+    if missing:
+        CarOccupancy.objects.bulk_create(
+            [CarOccupancy(car_id=car_id, year=year, days=to_bytes(0)) for year in missing],
+            ignore_conflicts=True,
+        )
+
+
+def _locked_rows(car_id, years, create=()):
+    """
+    Lock the bitmap rows of a car for the given years, creating `create` years
+    if missing (callers outside a transaction create them first: ensure_rows)
+    """
+    from .models import CarOccupancy
+
+    def select():
+        # order_by(): the default ordering would join (and lock) the car row
+        rows = CarOccupancy.objects.select_for_update().filter(car_id=car_id, year__in=years).order_by()
+        return {row.year: row for row in rows}
+
+    rows = select()
+    missing = set(create) - rows.keys()
+    if missing:
+        CarOccupancy.objects.bulk_create(
+            [CarOccupancy(car_id=car_id, year=year, days=to_bytes(0)) for year in missing],
+            ignore_conflicts=True,
+        )
+        rows = select()
+    return rows
+
+
+def apply_change(old_span=None, new_span=None):
+    """
+    Incrementally update bitmaps for a created, moved or deleted reservation.
+    Spans are (car_id, start_date, end_date) tuples; None means absent.
+    Rows are locked first, so this is also the authoritative overlap check:
+    OccupancyConflict is raised if a new day is already taken.
+    """
+    changes = defaultdict(lambda: [0, 0])  # (car_id, year) -> [clear, set]
+    if old_span:
+        car_id, start, end = old_span
+        for year, mask in year_masks(start, end).items():
+            changes[(car_id, year)][0] |= mask
+    if new_span:
+        car_id, start, end = new_span
+        for year, mask in year_masks(start, end).items():
+            changes[(car_id, year)][1] |= mask
+
+    by_car = defaultdict(dict)
+    for (car_id, year), change in changes.items():
+        by_car[car_id][year] = change
+
+    # Callers (Reservation.save, delete signal) already run inside a transaction
+    with transaction.atomic(savepoint=False):
+        for car_id in sorted(by_car):
+            years = by_car[car_id]
+            # Clearing never creates rows: a cascaded car delete may have removed them
+            marked = [year for year, (_, mark) in years.items() if mark]
+            rows = _locked_rows(car_id, years.keys(), create=marked)
+            for year, (clear, mark) in years.items():
+                row = rows.get(year)
+                if row is None:
+                    continue
+                bits = from_bytes(row.days) & ~clear
+                if bits & mark:
+                    raise OccupancyConflict(f"Car {car_id} already booked in {year}")
+                bits |= mark
+                row.days = to_bytes(bits)
+                row.save(update_fields=['days'])
+
+
+def reservation_span(reservation):
+    """(car_id, start_date, end_date) of a reservation, or None if incomplete"""
+    if reservation.car_id and reservation.start_date and reservation.end_date:
+        return (reservation.car_id, reservation.start_date, reservation.end_date)
+    return None
+
+
+def _all_spans():
+    """Spans of live and archived reservations: archiving keeps the booked days"""
+    from .archive import archived_spans
+    from .models import Reservation
+
+    live = Reservation.objects.order_by().values_list('car_id', 'start_date', 'end_date')
+    return chain(live.iterator(), archived_spans().iterator())
+
+
+def rebuild():
+    """Recompute every bitmap from the reservation tables. Returns (rows, collisions)"""
+    from .models import CarOccupancy
+
+    bitmaps, collisions = build_bitmaps(_all_spans())
+
+    with transaction.atomic():
+        CarOccupancy.objects.all().delete()
+        CarOccupancy.objects.bulk_create(
+            [
+                CarOccupancy(car_id=car_id, year=year, days=to_bytes(bits))
+                for (car_id, year), bits in bitmaps.items()
+            ],
+            batch_size=1000,
+        )
+        bump_version_on_commit(REBUILD_VERSION_NAME)
+    return len(bitmaps), collisions
+
+
+def verify():
+    """Compare stored bitmaps with the reservation tables. Returns mismatching (car_id, year) keys"""
+    from .models import CarOccupancy
+
+    expected, _ = build_bitmaps(_all_spans())
+
+    mismatches = []
+    stored_keys = set()
+    for car_id, year, days in CarOccupancy.objects.values_list('car_id', 'year', 'days').iterator():
+        stored_keys.add((car_id, year))
+        if from_bytes(days) != expected.get((car_id, year), 0):
+            mismatches.append((car_id, year))
+    mismatches.extend(key for key, bits in expected.items() if bits and key not in stored_keys)
+    return sorted(mismatches)
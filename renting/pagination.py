@@ -1,11 +1,341 @@
-from rest_framework.pagination import PageNumberPagination
+import json
+import logging
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+from datetime import date
+from decimal import Decimal
+from hashlib import md5
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connection
+from django.db.models import F, Q
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.filters import OrderingFilter
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from .caching import cache_usable, get_versions
+
+
+logger = logging.getLogger(__name__)
+
+COUNT_KEY = 'renting:count:{}'
+
+
+class CachedCountPaginator(Paginator):
+    """Django paginator whose `count` comes from the count cache when a key is given"""
+
+    def __init__(self, object_list, per_page, cache_key=None, timeout=300, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.cache_key = cache_key
+        self.timeout = timeout
+
+    @cached_property
+    def count(self):
+        if self.cache_key is None:
+            return super().count
+        count = cache.get(self.cache_key)
+        if count is None:
+            count = super().count
+            cache.set(self.cache_key, count, self.timeout)
+        return count
 
 
 class StandardResultsSetPagination(PageNumberPagination):
     """
     Custom pagination class supporting dynamic page size.
     Allows ?page_size=X parameter to control results per page.
+
+    Counts are cached when the view declares `count_cache_tables`: the key is
+    the view, the filter/search params and the version of every listed table,
+    so any write to those tables starts a new key. Views may add a scope
+    (e.g. the user) with `get_count_cache_scope()`.
+
+    Views that declare `count_estimate_table` let staff ask for
+    ?count=estimated on unfiltered lists: the `count` field reports the table
+    statistics. Pages are still bounded by the exact (or cached) count, as a
+    stale estimate would cut them short.
     """
     page_size = 10
     page_size_query_param = 'page_size'
     max_page_size = 100
+    count_query_param = 'count'
+    count_cache_timeout = 300
+    # Params that change the page but never the number of rows
+    non_filter_params = ('page', 'page_size', 'ordering', 'pagination', 'cursor', 'count')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count_cache_key = self.get_count_cache_key(request, view)
+        self.count_estimate = self.get_count_estimate(request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def django_paginator_class(self, object_list, per_page):
+        """Called by DRF like a paginator class; binds this request's count source"""
+        return CachedCountPaginator(
+            object_list, per_page,
+            cache_key=self.count_cache_key,
+            timeout=self.count_cache_timeout,
+        )
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        if self.count_estimate is not None:
+            response.data.pop('count')
+            response.data = OrderedDict(
+                [('count', self.count_estimate), ('count_is_estimate', True)]
+                + list(response.data.items())
+            )
+        return response
+
+    def get_count_cache_key(self, request, view):
+        tables = getattr(view, 'count_cache_tables', None)
+        if not tables or not cache_usable():
+            return None
+        params = request.query_params
+        filters = sorted(
+            (name, sorted(params.getlist(name)))
+            for name in params if name not in self.non_filter_params
+        )
+        scope_getter = getattr(view, 'get_count_cache_scope', None)
+        scope = scope_getter() if scope_getter else ''
+        raw = json.dumps([
+            type(view).__name__, getattr(view, 'action', None), scope,
+            get_versions(*tables), filters,
+        ])
+        return COUNT_KEY.format(md5(raw.encode()).hexdigest())
+
+    def get_count_estimate(self, request, view):
+        """Row estimate for ?count=estimated on unfiltered staff lists, else None"""
+        table = getattr(view, 'count_estimate_table', None)
+        params = request.query_params
+        if not table or params.get(self.count_query_param) != 'estimated':
+            return None
+        if not request.user.is_staff or getattr(view, 'action', None) != 'list':
+            return None
+        if any(name not in self.non_filter_params for name in params):
+            return None
+        return estimated_row_count(table)
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (cursor) pagination keyed on the active ordering field plus `id`.
+
+    Each page is a `WHERE (field, id) > (last_field, last_id)` range read, so
+    deep pages cost the same as the first one and no COUNT query is issued.
+    Only the first ordering term is used; `id` breaks ties in the same
+    direction. NULLs sort first in ascending order on every backend.
+    """
+    page_size = StandardResultsSetPagination.page_size
+    page_size_query_param = 'page_size'
+    max_page_size = StandardResultsSetPagination.max_page_size
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.field, self.descending = self.get_ordering(queryset, request, view)
+        self.nullable = _is_nullable(queryset.model, self.field)
+
+        cursor = self.decode_cursor(request)
+        reverse = bool(cursor and cursor['r'])
+        queryset = queryset.order_by(*self._order_by(reverse))
+        if cursor:
+            queryset = queryset.filter(self._after(cursor['v'], cursor['id'], reverse))
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        # Moving backwards means a next page exists, and vice versa
+        self.has_next = True if reverse else has_more
+        self.has_previous = has_more if reverse else cursor is not None
+        self.page = rows
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(size, self.max_page_size) if size > 0 else self.page_size
+
+    def get_ordering(self, queryset, request, view):
+        """Return (field path, descending) from ?ordering= or the model default"""
+        # The view's own ordering backend, which may map terms to other columns
+        backend = next(
+            (b for b in getattr(view, 'filter_backends', ()) if issubclass(b, OrderingFilter)), OrderingFilter
+        )
+        ordering = backend().get_ordering(request, queryset, view) or queryset.model._meta.ordering
+        term = ordering[0] if ordering else 'id'
+        if not isinstance(term, str):
+            term = 'id'
+        return term.lstrip('-'), term.startswith('-')
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    # Cursor encoding
+
+    def encode_cursor(self, row, reverse):
+        payload = {
+            'f': self.field,
+            'd': self.descending,
+            'v': _to_json(_key_value(row, self.field)),
+            'id': _key_value(row, 'id'),
+            'r': reverse,
+        }
+        token = urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode()).decode()
+        url = remove_query_param(self.base_url, 'page')
+        return replace_query_param(url, self.cursor_query_param, token)
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            cursor = json.loads(urlsafe_b64decode(token.encode()))
+            valid = (
+                cursor['f'] == self.field and cursor['d'] == self.descending
+                and isinstance(cursor['id'], int)
+            )
+        except (TypeError, ValueError, KeyError):
+            valid = False
+        if not valid:
+            # Stale cursor from another ordering, or garbage
+            raise NotFound(self.invalid_cursor_message)
+        return cursor
+
+    # Query building
+
+    def _order_by(self, reverse):
+        descending = self.descending != reverse
+        if descending:
+            key = F(self.field).desc(nulls_last=True) if self.nullable else F(self.field).desc()
+            return [key, '-id']
+        key = F(self.field).asc(nulls_first=True) if self.nullable else F(self.field).asc()
+        return [key, 'id']
+
+    def _after(self, value, last_id, reverse):
+        """Rows strictly after (value, last_id) in the effective direction"""
+        field = self.field
+        if self.descending != reverse:
+            if value is None:
+                return Q(**{f'{field}__isnull': True, 'id__lt': last_id})
+            condition = Q(**{f'{field}__lt': value}) | Q(**{field: value, 'id__lt': last_id})
+            if self.nullable:
+                condition |= Q(**{f'{field}__isnull': True})
+            return condition
+
+        if value is None:
+            return Q(**{f'{field}__isnull': True, 'id__gt': last_id}) | Q(**{f'{field}__isnull': False})
+        return Q(**{f'{field}__gt': value}) | Q(**{field: value, 'id__gt': last_id})
+
+
+class KeysetOrPageNumberPagination(StandardResultsSetPagination):
+    """
+    Page numbers by default; opt into keyset mode with ?pagination=cursor
+    (cursor links returned in that mode keep it enabled).
+
+    Keyword searches without an explicit ?ordering= are ranked by relevance
+    (renting.search), which has no column to resume from: they are always
+    paged by number, and their next links still work in cursor clients.
+    """
+    mode_query_param = 'pagination'
+    search_query_param = 'search'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        params = request.query_params
+        keyset = params.get(self.mode_query_param) == 'cursor' or KeysetPagination.cursor_query_param in params
+        ranked = params.get(self.search_query_param) and not params.get(OrderingFilter.ordering_param)
+        if keyset and not ranked:
+            self.keyset = KeysetPagination()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+
+def estimated_row_count(table):
+    """
+    Row count from the backend's table statistics (no table scan), or None
+    when the backend has none so the caller falls back to an exact count.
+    """
+    if connection.vendor == 'mysql':
+        sql = (
+            'SELECT TABLE_ROWS FROM information_schema.TABLES '
+            'WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s'
+        )
+    elif connection.vendor == 'postgresql':
+        sql = 'SELECT reltuples::bigint FROM pg_class WHERE relname = %s'
+    else:
+        return None
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [table])
+        row = cursor.fetchone()
+    if row is None or row[0] is None or row[0] < 0:
+        logger.debug(f"No row estimate for {table}")
+        return None
+    return int(row[0])
+
+
+def _key_value(row, path):
+    """Read a `__` separated path from a model instance or a values() dict"""
+    if isinstance(row, dict):
+        return row[path]
+    for attr in path.split('__'):
+        row = getattr(row, attr)
+        if row is None:
+            return None
+    return row
+
+
+def _to_json(value):
+    if isinstance(value, (date, Decimal)):
+        return str(value)
+    return value
+
+
+def _is_nullable(model, path):
+    """True if any field along a `__` separated path allows NULL"""
+    for name in path.split('__'):
+        field = model._meta.get_field(name)
+        if field.null:
+            return True
+        model = field.related_model
+    return False
@@ -0,0 +1,173 @@
+import logging
+import struct
+from array import array
+from datetime import date, timedelta
+from decimal import ROUND_HALF_UP, Decimal
+from django.db import transaction
+from .caching import CompiledCache, bump_version_on_commit
+
+
+logger = logging.getLogger(__name__)
+
+# Day i of a year's calendar is day i counted from January 1st (366 days max)
+DAYS = 366
+CALENDAR_FORMAT = f'<{DAYS}I'
+CALENDAR_BYTES = struct.calcsize(CALENDAR_FORMAT)
+# Prices can be set from today up to this many days ahead
+HORIZON_DAYS = 365
+# Calendar rows are written in bulk (no signals): the version is bumped here
+VERSION_NAME = 'car_model_price_calendar'
+CENT = Decimal('0.01')
+
+
+# ============================================
+# Packing helpers (pure functions)
+# ============================================
+
+
+def pack(cents):
+    """366 day prices in cents (0: daily price) -> stored bytes"""
+    return struct.pack(CALENDAR_FORMAT, *cents)
+
+
+def unpack(data):
+    return list(struct.unpack(CALENDAR_FORMAT, bytes(data))) if data else [0] * DAYS
+
+
+def to_cents(price):
+    return int((price / CENT).to_integral_value(ROUND_HALF_UP))
+
+
+def year_slices(start, end):
+    """Split [start, end] (inclusive) into (year, first day index, last day index + 1)"""
+    for year in range(start.year, end.year + 1):
+        first = max(start, date(year, 1, 1))
+        last = min(end, date(year, 12, 31))
+        offset = first.timetuple().tm_yday - 1
+        yield year, offset, offset + (last - first).days + 1
+
+
+# ============================================
+# Prefix sums
+# ============================================
+
+
+class CalendarTable:
+    """
+    Every stored calendar as prefix sums, per (car_model_id, year):
+    `sums[i]` is the cents of calendar days before day i and `counts[i]`
+    how many of them have a calendar price. The price of any date range is
+    then O(1) per calendar year it spans, whatever its length.
+    """
+    __slots__ = ('years', 'car_model_ids')
+
+    def __init__(self, rows=()):
+        self.years = {}
+        for car_model_id, year, data in rows:
+            sums, counts = array('q', [0]), array('H', [0])
+            for cents in unpack(data):
+                sums.append(sums[-1] + cents)
+                counts.append(counts[-1] + (cents > 0))
+            if counts[-1]:
+                self.years[car_model_id, year] = (sums, counts)
+        self.car_model_ids = {car_model_id for car_model_id, _ in self.years}
+
+    def has_prices(self, car_model_id):
+        return car_model_id in self.car_model_ids
+
+    def total(self, car_model_id, daily_price, start_date, end_date):
+        """Price of the days [start_date, end_date]: calendar prices, daily_price on the other days"""
+        base = to_cents(daily_price)
+        cents = 0
+        for year, first, stop in year_slices(start_date, end_date):
+            days = stop - first
+            prefix = self.years.get((car_model_id, year))
+            if prefix is None:
+                cents += base * days
+            else:
+                sums, counts = prefix
+                cents += sums[stop] - sums[first] + base * (days - (counts[stop] - counts[first]))
+        return Decimal(cents) * CENT
+
+    def day_prices(self, car_model_id, daily_price, start_date, end_date):
+        """[(day, price)] for each day of the range (admin preview)"""
+        day = start_date
+        prices = []
+        while day <= end_date:
+            prices.append((day, self.total(car_model_id, daily_price, day, day)))
+            day += timedelta(days=1)
+        return prices
+
+
+def compile_calendars():
+    """CalendarTable of every stored calendar row"""
+    from .models import CarModelPriceCalendar
+
+    rows = list(CarModelPriceCalendar.objects.order_by().values_list('car_model_id', 'year', 'prices'))
+    logger.debug(f"Price calendars compiled: {len(rows)} model-years")
+    return CalendarTable(rows)
+
+
+calendar_cache = CompiledCache(compile_calendars, VERSION_NAME)
+
+
+def calendars_changed():
+    """Keep the table in sync after a calendar write"""
+    calendar_cache.written()
+    bump_version_on_commit(VERSION_NAME)
+
+
+# ============================================
+# Bulk editing (admin)
+# ============================================
+
+
+def horizon(today=None):
+    """First and last day prices can be set for"""
+    today = today or date.today()
+    return today, today + timedelta(days=HORIZON_DAYS - 1)
+
+
+def set_prices(car_models, start_date, end_date, price=None, percent=None):
+    """
+    Set the calendar price of every day in [start_date, end_date] for these
+    car models: a fixed `price`, or `percent` more (negative: less) than each
+    model's daily_price. With neither the days go back to the daily price.
+    All models are written in one transaction. Returns the rows written.
+    """
+    from .models import CarModelPriceCalendar
+
+    slices = list(year_slices(start_date, end_date))
+    years = [year for year, _, _ in slices]
+    with transaction.atomic():
+        stored = {
+            (row.car_model_id, row.year): row
+            for row in CarModelPriceCalendar.objects.select_for_update().filter(
+                car_model__in=car_models, year__in=years
+            ).order_by()
+        }
+        created, updated = [], []
+        for car_model in car_models:
+            if price is not None:
+                cents = to_cents(price)
+            elif percent is not None:
+                cents = to_cents(car_model.daily_price * (100 + percent) / 100)
+            else:
+                cents = 0
+            for year, first, stop in slices:
+                row = stored.get((car_model.pk, year))
+                if row is None:
+                    if not cents:
+                        continue
+                    row = CarModelPriceCalendar(car_model=car_model, year=year)
+                    created.append(row)
+                else:
+                    updated.append(row)
+                prices = unpack(row.prices)
+                prices[first:stop] = [cents] * (stop - first)
+                row.prices = pack(prices)
+
+        CarModelPriceCalendar.objects.bulk_create(created)
+        CarModelPriceCalendar.objects.bulk_update(updated, ['prices'])
+        calendars_changed()
+    return len(created) + len(updated)
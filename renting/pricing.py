@@ -0,0 +1,224 @@
+import logging
+from bisect import bisect_right
+from collections import namedtuple
+from datetime import date, timedelta
+from decimal import ROUND_HALF_UP, Decimal
+from .caching import CompiledCache
+from . import price_calendar
+
+
+logger = logging.getLogger(__name__)
+
+ONE = Decimal('1.00')
+# Built-in (min age, max age, coverage, rate), oldest band first; replaced by any active age rule
+AGE_BANDS = (
+    (66, None, 'Senior/Premium', Decimal('1.20')),
+    (25, 65, 'Standard', Decimal('1.00')),
+    (0, 24, 'Young Driver', Decimal('1.50')),
+)
+# Drivers without a birth date or outside every band
+DEFAULT_COVERAGE = ('Standard', Decimal('1.00'))
+# Totals are rounded once, half up, as the DECIMAL(10, 2) column stores them
+CENT = Decimal('0.01')
+# Bumped by signals.table_changed on every PricingRule write
+VERSION_NAME = 'pricing_rule'
+
+Quote = namedtuple('Quote', ['coverage', 'rate', 'days', 'total_price'])
+
+
+# ============================================
+# Driver and rental terms
+# ============================================
+
+
+def age_on(birth_date, day):
+    """Completed years on `day`"""
+    return day.year - birth_date.year - ((day.month, day.day) < (birth_date.month, birth_date.day))
+
+
+def rental_days(start_date, end_date):
+    """Billed days; both ends are included"""
+    return (end_date - start_date).days + 1
+
+
+# ============================================
+# Compiled rules
+# ============================================
+
+
+class PricingTable:
+    """
+    Active PricingRules compiled into a decision table. Evaluating it never
+    touches the database and costs O(rules) at most:
+
+    - age bands, oldest first (the built-in bands when no age rule exists)
+    - seasons flattened into sorted, non-overlapping day segments (overlapping
+      seasons multiply), found by bisection
+    - long rental tiers, longest first (only the longest reached applies)
+    - one combined multiplier per vehicle type
+    """
+    __slots__ = ('age_bands', 'seasons', 'season_starts', 'durations', 'vehicle_types', 'rule_count')
+
+    def __init__(self, rules=()):
+        from .models import PricingRule
+
+        age_bands, seasons, durations, vehicle_types = [], [], [], {}
+        self.rule_count = 0
+        for rule in rules:
+            if not rule.is_active:
+                continue
+            self.rule_count += 1
+            if rule.kind == PricingRule.AGE:
+                age_bands.append((rule.min_age or 0, rule.max_age, rule.coverage, rule.multiplier))
+            elif rule.kind == PricingRule.SEASON:
+                seasons.append((rule.start_date, rule.end_date + timedelta(days=1), rule.multiplier))
+            elif rule.kind == PricingRule.DURATION:
+                durations.append((rule.min_days, rule.multiplier))
+            elif rule.kind == PricingRule.VEHICLE_TYPE:
+                vehicle_types[rule.vehicle_type_id] = vehicle_types.get(rule.vehicle_type_id, ONE) * rule.multiplier
+
+        self.age_bands = sorted(age_bands, key=lambda band: band[0], reverse=True) or AGE_BANDS
+        self.seasons = _segments(seasons)
+        self.season_starts = [segment[0] for segment in self.seasons]
+        self.durations = sorted(durations, key=lambda tier: tier[0], reverse=True)
+        self.vehicle_types = vehicle_types
+
+    def coverage(self, birth_date, today=None):
+        """(coverage, rate) for a driver born on `birth_date` (None: standard)"""
+        if birth_date is None:
+            return DEFAULT_COVERAGE
+        age = age_on(birth_date, today or date.today())
+        for minimum, maximum, coverage, rate in self.age_bands:
+            if age >= minimum and (maximum is None or age <= maximum):
+                return coverage, rate
+        return DEFAULT_COVERAGE
+
+    def billed_amount(self, start_date, end_date, range_total):
+        """
+        Price of the rental days, each weighted by its season multiplier.
+        `range_total(first, last)` is the unweighted price of [first, last].
+        """
+        total = range_total(start_date, end_date)
+        first = max(bisect_right(self.season_starts, start_date) - 1, 0)
+        for segment_start, segment_end, multiplier in self.seasons[first:]:
+            if segment_start > end_date:
+                break
+            overlap_start = max(segment_start, start_date)
+            overlap_end = min(segment_end - timedelta(days=1), end_date)
+            if overlap_start <= overlap_end:
+                total += (multiplier - ONE) * range_total(overlap_start, overlap_end)
+        return total
+
+    def billed_days(self, start_date, end_date):
+        """Rental days, each weighted by its season multiplier"""
+        return self.billed_amount(start_date, end_date, lambda first, last: Decimal(rental_days(first, last)))
+
+    def duration_multiplier(self, days):
+        for min_days, multiplier in self.durations:
+            if days >= min_days:
+                return multiplier
+        return ONE
+
+    def factor(self, start_date, end_date, vehicle_type_id=None):
+        """Multiplier of a flat daily price for this rental, before the driver rate"""
+        return self.adjust(self.billed_days(start_date, end_date), start_date, end_date, vehicle_type_id)
+
+    def adjust(self, amount, start_date, end_date, vehicle_type_id=None):
+        """Apply the long rental and vehicle type multipliers to a billed amount"""
+        return (
+            amount
+            * self.duration_multiplier(rental_days(start_date, end_date))
+            * self.vehicle_types.get(vehicle_type_id, ONE)
+        )
+
+
+def _segments(seasons):
+    """(start, end exclusive, multiplier) day ranges, sorted and non-overlapping"""
+    bounds = sorted({day for start, end, _ in seasons for day in (start, end)})
+    segments = []
+    for start, end in zip(bounds, bounds[1:]):
+        multiplier = ONE
+        for season_start, season_end, season_multiplier in seasons:
+            if season_start <= start and end <= season_end:
+                multiplier *= season_multiplier
+        if multiplier != ONE:
+            segments.append((start, end, multiplier))
+    return segments
+
+
+def compile_rules():
+    """PricingTable of the active rules in the database"""
+    from .models import PricingRule
+
+    rules = list(PricingRule.objects.filter(is_active=True))
+    logger.debug(f"Pricing rules compiled: {len(rules)} active")
+    return PricingTable(rules)
+
+
+rule_cache = CompiledCache(compile_rules, VERSION_NAME)
+
+
+def rules_changed():
+    """Keep the table in sync after a PricingRule write (signals)"""
+    rule_cache.written()
+
+
+# ============================================
+# Quotes
+# ============================================
+
+
+def coverage_for(birth_date, today=None):
+    """(coverage, rate) for a driver born on `birth_date` (None: standard)"""
+    return rule_cache.get().coverage(birth_date, today)
+
+
+def quote_cars(daily_prices, birth_date, start_date, end_date, vehicle_types=None, car_models=None,
+               today=None, table=None, calendars=None):
+    """
+    Quotes for many cars, one driver and one date range.
+    `daily_prices` maps any key (car id) to a daily price, and `vehicle_types`
+    and `car_models` the same keys to vehicle type and car model ids; returns
+    key -> Quote. The driver rate and the rental factor per vehicle type are
+    resolved once, so a car at its flat daily price costs one multiplication.
+    Models with a price calendar are summed from its prefix sums, O(1) per
+    season segment. No query once the tables are compiled.
+    """
+    if table is None:
+        table = rule_cache.get()
+    if calendars is None and car_models:
+        calendars = price_calendar.calendar_cache.get()
+    coverage, rate = table.coverage(birth_date, today)
+    days = rental_days(start_date, end_date)
+    vehicle_types = vehicle_types or {}
+    car_models = car_models or {}
+
+    factors = {}
+    quotes = {}
+    for key, price in daily_prices.items():
+        vehicle_type_id = vehicle_types.get(key)
+        car_model_id = car_models.get(key)
+        if calendars is not None and calendars.has_prices(car_model_id):
+            amount = table.billed_amount(
+                start_date, end_date,
+                lambda first, last: calendars.total(car_model_id, price, first, last),
+            )
+            total = table.adjust(amount, start_date, end_date, vehicle_type_id) * rate
+        else:
+            factor = factors.get(vehicle_type_id)
+            if factor is None:
+                factor = factors[vehicle_type_id] = table.factor(start_date, end_date, vehicle_type_id) * rate
+            total = price * factor
+        quotes[key] = Quote(coverage, rate, days, total.quantize(CENT, ROUND_HALF_UP))
+    return quotes
+
+
+def quote(daily_price, birth_date, start_date, end_date, vehicle_type_id=None, car_model_id=None,
+          today=None, table=None, calendars=None):
+    """Quote for a single car (Reservation.calculate_details)"""
+    return quote_cars(
+        {None: daily_price}, birth_date, start_date, end_date,
+        vehicle_types={None: vehicle_type_id},
+        car_models={None: car_model_id} if car_model_id is not None else None,
+        today=today, table=table, calendars=calendars,
+    )[None]
@@ -0,0 +1,162 @@
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.fields import empty
+from rest_framework.settings import api_settings
+from .lookups import lookup_cache
+
+
+# ============================================
+# Precompiled values() renderer
+# ============================================
+
+
+class Column:
+    """How one serializer field is read from a values() row"""
+    __slots__ = ('name', 'lookup', 'guards', 'skip_missing', 'convert', 'absolute', 'lookup_model')
+
+    def __init__(self, name, lookup, guards, skip_missing, convert, absolute=False, lookup_model=None):
+        self.name = name
+        self.lookup = lookup
+        self.guards = guards
+        self.skip_missing = skip_missing
+        self.convert = convert
+        self.absolute = absolute
+        self.lookup_model = lookup_model
+
+    def bind(self):
+        """Converter for one render: lookup ids map through a single cache snapshot"""
+        if self.lookup_model is not None:
+            return lookup_cache.table(self.lookup_model).name
+        return self.convert
+
+
+class RowRenderer:
+    """
+    Renders values() rows exactly like the serializer it was compiled from,
+    without building model instances or serializer fields per row.
+
+    DRF semantics kept:
+    - A None value renders as null.
+    - A source crossing a NULL foreign key omits the key (read-only fields)
+      or renders null (allow_null fields).
+    - File URLs are made absolute with the request, as ImageField does.
+    """
+    __slots__ = ('columns', 'lookups')
+
+    def __init__(self, columns):
+        self.columns = columns
+        lookups = []
+        for column in columns:
+            for lookup in (*column.guards, column.lookup):
+                if lookup not in lookups:
+                    lookups.append(lookup)
+        self.lookups = lookups
+
+    def render(self, rows, request=None):
+        absolute = request.build_absolute_uri if request is not None else None
+        columns = [(column, column.bind()) for column in self.columns]
+        data = []
+        for row in rows:
+            item = {}
+            for column, convert in columns:
+                if column.guards and any(row[guard] is None for guard in column.guards):
+                    if not column.skip_missing:
+                        item[column.name] = None
+                    continue
+                value = row[column.lookup]
+                if value is None:
+                    item[column.name] = None
+                    continue
+                value = convert(value)
+                if column.absolute and absolute is not None and value is not None:
+                    value = absolute(value)
+                item[column.name] = value
+            data.append(item)
+        return data
+
+
+def compile_renderer(serializer_class, model):
+    """
+    Build a RowRenderer for a flat serializer, or None when a field cannot be
+    read from values() (nested serializers, method fields, many relations...).
+    """
+    columns = []
+    for name, field in serializer_class().fields.items():
+        if field.write_only:
+            continue
+        column = _compile_field(name, field, model)
+        if column is None:
+            return None
+        columns.append(column)
+    return RowRenderer(columns)
+
+
+def _compile_field(name, field, model):
+    if field.source == '*' or field.default is not empty:
+        return None
+    if isinstance(field, (serializers.BaseSerializer, serializers.ManyRelatedField)):
+        return None
+
+    attrs = field.source.split('.')
+    guards = []
+    current = model
+    for depth, attr in enumerate(attrs[:-1], start=1):
+        model_field = _get_field(current, attr)
+        # Only forward FK/one-to-one hops map to a values() join
+        if model_field is None or not model_field.concrete:
+            return None
+        if not (model_field.many_to_one or model_field.one_to_one):
+            return None
+        lookup = '__'.join(attrs[:depth])
+        if model_field.null:
+            guards.append(lookup)
+        current = model_field.related_model
+
+    model_field = _get_field(current, attrs[-1])
+    if model_field is None or model_field.many_to_many or model_field.one_to_many:
+        return None
+    lookup = '__'.join(attrs[:-1] + [model_field.name])
+    skip_missing = not field.allow_null and not field.required
+
+    lookup_model = getattr(field, 'lookup_model', None)
+    if lookup_model is not None:
+        # LookupNameField: the id is read and named from the lookup cache;
+        # a NULL id omits the key like a NULL relation does
+        return Column(name, lookup, guards + [lookup], True, None, lookup_model=lookup_model)
+
+    if isinstance(field, serializers.RelatedField):
+        if not isinstance(field, serializers.PrimaryKeyRelatedField):
+            return None
+        convert = field.pk_field.to_representation if field.pk_field else _identity
+        return Column(name, lookup, guards, skip_missing, convert)
+
+    if model_field.is_relation:
+        # Non-relational fields over a relation render the related object
+        return None
+
+    if isinstance(field, serializers.FileField):
+        use_url = getattr(field, 'use_url', api_settings.UPLOADED_FILES_USE_URL)
+        convert = _file_url(model_field.storage) if use_url else _identity
+        return Column(name, lookup, guards, skip_missing, convert, absolute=use_url)
+
+    if isinstance(field, serializers.ReadOnlyField):
+        return Column(name, lookup, guards, skip_missing, _identity)
+    return Column(name, lookup, guards, skip_missing, field.to_representation)
+
+
+def _get_field(model, name):
+    try:
+        return model._meta.get_field(name)
+    except FieldDoesNotExist:
+        return None
+
+
+def _identity(value):
+    return value
+
+
+def _file_url(storage):
+    def convert(name):
+        # Same rule as FieldFile: empty names have no URL
+        return storage.url(name) if name else None
+    return convert
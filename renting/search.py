@@ -0,0 +1,115 @@
+import logging
+import unicodedata
+from django.db.models import Case, F, IntegerField, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce
+from .lookups import lookup_cache
+
+
+logger = logging.getLogger(__name__)
+
+TERM_LENGTH = 40
+# Field weights; a term that starts a word counts double
+MODEL_FIELDS = (
+    ('model_name', 4),
+    ('brand__name', 4),
+    ('vehicle_type__name', 2),
+    ('fuel_type__name', 1),
+    ('transmission__name', 1),
+)
+COLOR_WEIGHT = 1
+# Sorts after any character a normalized term holds; [word, word + PREFIX_END)
+# is an index range on every backend
+PREFIX_END = '\uffff'
+
+
+# ============================================
+# Terms
+# ============================================
+
+
+def normalize(text):
+    """Case- and accent-insensitive form, like the MySQL collation of the columns"""
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+
+
+def words(text):
+    return [word[:TERM_LENGTH] for word in normalize(text or '').split()]
+
+
+def model_terms(values):
+    """
+    {term: weight} for one car model, from a values() row of MODEL_FIELDS.
+    Every suffix of every word is a term, so `term LIKE 'query%'` (an index
+    range scan) finds the same substrings `icontains` did.
+    """
+    terms = {}
+    for field, weight in MODEL_FIELDS:
+        for word in words(values.get(field)):
+            for start in range(len(word)):
+                term_weight = weight * 2 if start == 0 else weight
+                term = word[start:]
+                if terms.get(term, 0) < term_weight:
+                    terms[term] = term_weight
+    return terms
+
+
+def index_models(car_model_ids=None):
+    """(Re)build search terms for the given car models, or all of them"""
+    # Local import: models import this module for signal wiring
+    from .models import CarModel, CarModelSearchTerm
+
+    models = CarModel.objects.order_by()
+    terms = CarModelSearchTerm.objects.all()
+    if car_model_ids is not None:
+        models = models.filter(id__in=car_model_ids)
+        terms = terms.filter(car_model_id__in=car_model_ids)
+
+    rows = [
+        CarModelSearchTerm(car_model_id=values['id'], term=term, weight=weight)
+        for values in models.values('id', *(field for field, _ in MODEL_FIELDS)).iterator()
+        for term, weight in model_terms(values).items()
+    ]
+    terms.delete()
+    CarModelSearchTerm.objects.bulk_create(rows, batch_size=1000)
+    logger.debug(f"Search index: {len(rows)} terms written")
+    return len(rows)
+
+
+# ============================================
+# Query
+# ============================================
+
+
+def search_cars(queryset, text):
+    """
+    Filter cars matching every word of `text` (brand, model, vehicle type,
+    fuel, transmission or color) and order them by relevance: per word, the
+    best weight among its matches, summed over words.
+    """
+    from .models import Color, CarModelSearchTerm
+
+    query_words = words(text)
+    if not query_words:
+        return queryset
+
+    colors = lookup_cache.table(Color).rows
+    relevance = Value(0)
+    for position, word in enumerate(query_words):
+        terms = CarModelSearchTerm.objects.filter(
+            term__gte=word, term__lt=word + PREFIX_END, term__istartswith=word
+        )
+        color_ids = [pk for pk, name in colors if word in normalize(name)]
+
+        # Semi-join driven by the term index; weights only for the survivors
+        matches = Q(car_model_id__in=terms.values('car_model_id'))
+        best_term = terms.filter(car_model_id=OuterRef('car_model_id')).order_by('-weight').values('weight')[:1]
+        score = Coalesce(Subquery(best_term, output_field=IntegerField()), Value(0))
+        if color_ids:
+            matches |= Q(color_id__in=color_ids)
+            score = score + Case(When(color_id__in=color_ids, then=Value(COLOR_WEIGHT)), default=Value(0))
+        alias = f'search_word_{position}'
+        queryset = queryset.filter(matches).alias(**{alias: score})
+        relevance = relevance + F(alias)
+
+    return queryset.annotate(search_relevance=relevance).order_by('-search_relevance', 'license_plate')
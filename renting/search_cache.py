@@ -0,0 +1,107 @@
+import json
+import logging
+import math
+import random
+import time
+from hashlib import md5
+from django.core.cache import cache
+from .availability import day_versions, parse_date_range
+from .caching import cache_usable, get_versions
+from .singleflight import SingleFlight
+
+
+logger = logging.getLogger(__name__)
+
+KEY = 'renting:carsearch:{}'
+TIMEOUT = 300
+# Early refresh aggressiveness (1.0 = expected refresh one compute time early)
+REFRESH_BETA = 1.0
+# Longer windows are not cached: one version per day is part of the key
+MAX_WINDOW_DAYS = 92
+# Tables the car list reads; lookup names are covered by the lookup cache version,
+# price quotes (?quote=1) by the pricing rules and price calendar versions
+CATALOG_VERSIONS = ('car', 'car_model', 'car_search', 'lookups', 'pricing_rule', 'car_model_price_calendar')
+# Answers depending on bookings outside the window (?suggest_next=1) are never cached
+UNCACHED_PARAMS = ('suggest_next',)
+
+
+# ============================================
+# Response cache for public car searches
+# ============================================
+
+
+def response_key(request):
+    """
+    Cache key for an anonymous car search (list or facets), or None if it
+    must not be cached.
+
+    The key holds the path, the canonical query string (sorted, empty values
+    dropped, as CarFilter ignores them), the catalog versions and, for
+    availability searches, the version of every day in the window. A catalog write
+    therefore misses every entry, while a reservation only misses entries
+    whose window shares a day with it.
+    """
+    if request.user.is_authenticated or not cache_usable():
+        return None
+
+    params = request.query_params
+    if any(params.get(name) for name in UNCACHED_PARAMS):
+        return None
+    canonical = sorted(
+        (name, sorted(value for value in params.getlist(name) if value))
+        for name in params
+    )
+    canonical = [(name, values) for name, values in canonical if values]
+
+    date_from, date_to = parse_date_range(params.get('available_from'), params.get('available_to'))
+    days = []
+    if date_from is not None:
+        # Bookings overlap the filter iff they share a day with [min, max]
+        low, high = sorted((date_from, date_to))
+        if (high - low).days >= MAX_WINDOW_DAYS:
+            return None
+        days = day_versions(low, high)
+
+    raw = json.dumps([
+        request.path, canonical, get_versions(*CATALOG_VERSIONS), days,
+        request.get_host(), request.accepted_renderer.format,
+    ], default=str)
+    return KEY.format(md5(raw.encode()).hexdigest())
+
+
+flight = SingleFlight()
+
+
+def fetch(key, compute):
+    """
+    Return cached data for `key`, or run `compute()` (returning data or None
+    for uncacheable results) once for all concurrent callers of this worker.
+
+    Entries are refreshed early with jitter (probabilistic early expiration):
+    as expiry nears, a growing share of callers recompute, sooner for entries
+    that are slow to compute, so an entry is replaced before it expires
+    instead of every caller missing at once.
+    """
+    entry = cache.get(key)
+    if entry is not None and not _refresh_early(entry):
+        return entry['data']
+
+    def leader():
+        started = time.monotonic()
+        data = compute()
+        if data is not None:
+            cache.set(key, {
+                'data': data,
+                'delta': time.monotonic() - started,
+                'expires': time.time() + TIMEOUT,
+            }, TIMEOUT)
+            logger.debug(f"Car search cached: {key}")
+        return data
+
+    return flight.do(key, leader)
+
+
+def _refresh_early(entry):
+    # -log(U) is exponentially distributed: a random head start scaled by compute time
+    jitter = -entry['delta'] * REFRESH_BETA * math.log(1.0 - random.random())
+    return time.time() + jitter >= entry['expires']
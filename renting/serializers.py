@@ -5,12 +5,36 @@ from django.core.exceptions import ValidationError
 import re
 from datetime import date
 from django.contrib.auth.hashers import make_password
+from rest_framework.fields import SkipField
+from .lookups import lookup_cache
 from .models import (
     AppUser, VehicleType, Brand, FuelType, Color, Transmission,
     CarModel, Car, Reservation
 )
 
 
+class LookupNameField(serializers.ReadOnlyField):
+    """
+    Name of a lookup row (brand, color...) resolved from the lookup cache.
+    `source` points at the foreign key id, so no join is needed; a NULL key
+    omits the field, as a dotted `.name` source would.
+    """
+
+    def __init__(self, lookup_model, **kwargs):
+        self.lookup_model = lookup_model
+        self._table = None
+        super().__init__(**kwargs)
+
+    def get_attribute(self, instance):
+        pk = super().get_attribute(instance)
+        if pk is None:
+            raise SkipField()
+        if self._table is None:
+            # One snapshot per serialization, shared by all rows of a list
+            self._table = lookup_cache.table(self.lookup_model)
+        return self._table.name(pk)
+
+
 class AppUserSerializer(serializers.ModelSerializer):
     """Serializer for AppUser model operations"""
     class Meta:
@@ -154,10 +178,10 @@ class TransmissionSerializer(serializers.ModelSerializer):
 
 class CarModelSerializer(serializers.ModelSerializer):
     """Serializer for CarModel with nested related data"""
-    brand_name = serializers.CharField(source='brand.name', read_only=True)
-    vehicle_type_name = serializers.CharField(source='vehicle_type.name', read_only=True)
-    fuel_type_name = serializers.CharField(source='fuel_type.name', read_only=True)
-    transmission_name = serializers.CharField(source='transmission.name', read_only=True)
+    brand_name = LookupNameField(Brand, source='brand_id')
+    vehicle_type_name = LookupNameField(VehicleType, source='vehicle_type_id')
+    fuel_type_name = LookupNameField(FuelType, source='fuel_type_id')
+    transmission_name = LookupNameField(Transmission, source='transmission_id')
 
     class Meta:
         model = CarModel
@@ -173,16 +197,16 @@ class CarModelSerializer(serializers.ModelSerializer):
 class CarSerializer(serializers.ModelSerializer):
     """Serializer for Car with nested model details"""
     car_model_name = serializers.CharField(source='car_model.model_name', read_only=True)
-    brand_name = serializers.CharField(source='car_model.brand.name', read_only=True)
-    color_name = serializers.CharField(source='color.name', read_only=True)
+    brand_name = LookupNameField(Brand, source='car_model.brand_id')
+    color_name = LookupNameField(Color, source='color_id')
     car_model_image = serializers.ImageField(source='car_model.image', read_only=True)
     
     # Added for frontend compatibility
     daily_price = serializers.ReadOnlyField(source='car_model.daily_price')
     seats = serializers.ReadOnlyField(source='car_model.seats')
-    transmission_name = serializers.ReadOnlyField(source='car_model.transmission.name')
-    fuel_type_name = serializers.ReadOnlyField(source='car_model.fuel_type.name')
-    vehicle_type_name = serializers.ReadOnlyField(source='car_model.vehicle_type.name')
+    transmission_name = LookupNameField(Transmission, source='car_model.transmission_id')
+    fuel_type_name = LookupNameField(FuelType, source='car_model.fuel_type_id')
+    vehicle_type_name = LookupNameField(VehicleType, source='car_model.vehicle_type_id')
 
     class Meta:
         model = Car
@@ -193,13 +217,21 @@ class CarSerializer(serializers.ModelSerializer):
         ]
 
 
+class QuoteSerializer(serializers.Serializer):
+    """Price of a car for the searched dates (renting/pricing.py), as a reservation would store it"""
+    coverage = serializers.CharField()
+    rate = serializers.DecimalField(max_digits=5, decimal_places=2)
+    days = serializers.IntegerField()
+    total_price = serializers.DecimalField(max_digits=10, decimal_places=2)
+
+
 class ReservationSerializer(serializers.ModelSerializer):
     """Serializer for Reservation with nested user/car data"""
     user_name = serializers.CharField(source='user.first_name', read_only=True)
     car_license = serializers.CharField(source='car.license_plate', read_only=True)
     model_name = serializers.CharField(source='car.car_model.model_name', read_only=True)
     brand_name = serializers.CharField(source='car.car_model.brand.name', read_only=True)
-    car_model_image = serializers.ImageField(source='car.car_model.car_model_image', read_only=True)
+    car_model_image = serializers.ImageField(source='car.car_model.image', read_only=True)
 
 
     class Meta:
@@ -211,7 +243,11 @@ class ReservationSerializer(serializers.ModelSerializer):
             'car_model_image'
         ]
         read_only_fields = ['user', 'coverage', 'rate', 'total_price']
-        extra_kwargs = {'user': {'read_only': True}}
+        extra_kwargs = {
+            'user': {'read_only': True},
+            # Load model and brand with the car: pricing and the response need them
+            'car': {'queryset': Car.objects.select_related('car_model', 'car_model__brand')},
+        }
 
     def validate_start_date(self, value):
         """Start date cannot be in the past (Issue #59)"""
@@ -220,7 +256,12 @@ class ReservationSerializer(serializers.ModelSerializer):
         return value
 
     def validate(self, attrs):
-        """Object-level validation for dates and overlaps"""
+        """
+        Single-pass validation for dates.
+        Car (with its model) and user are already loaded by the fields and the
+        request, so no lookups are repeated here. Overlaps are checked once,
+        under lock, when save() claims the days (see Reservation.save).
+        """
         request = self.context.get('request')
         user = request.user if request else None
         instance = getattr(self, 'instance', None)
@@ -231,36 +272,34 @@ class ReservationSerializer(serializers.ModelSerializer):
         else:
             instance = Reservation(user=user, **attrs)
 
-        try:
-            instance.full_clean()
-        except ValidationError as e:
-            raise serializers.ValidationError(e.message_dict)
-
-        # Date validations (Issue #59)
-        start_date = attrs['start_date']
-        end_date = attrs['end_date']
-        car = attrs['car']
-
-        # end_date must be after start_date
-        if end_date <= start_date:
+        # end_date must be after start_date (Issue #59)
+        if instance.start_date and instance.end_date and instance.end_date <= instance.start_date:
             raise serializers.ValidationError(
                 "End date must be after start date."
             )
 
-        # Check for overlapping reservations
-        overlapping = Reservation.objects.filter(
-            car=car,
-            start_date__lt=end_date,
-            end_date__gt=start_date
-        ).exclude(pk=self.instance.pk if self.instance else None)
-        
-        if overlapping.exists():
-            raise serializers.ValidationError(
-                "Vehicle is already reserved for these dates."
-            )
+        try:
+            instance.clean_fields(exclude=['user', 'car'])
+            instance.clean_dates()
+        except ValidationError as e:
+            raise serializers.ValidationError(e.message_dict)
 
         return attrs
 
+    def create(self, validated_data):
+        """Create reservation; overlap conflicts become 400 responses"""
+        try:
+            return super().create(validated_data)
+        except ValidationError as e:
+            raise serializers.ValidationError(serializers.as_serializer_error(e))
+
+    def update(self, instance, validated_data):
+        """Update reservation; overlap conflicts become 400 responses"""
+        try:
+            return super().update(instance, validated_data)
+        except ValidationError as e:
+            raise serializers.ValidationError(serializers.as_serializer_error(e))
+
     def validate_total_price(self, value):
         """Total price must be positive"""
         if value is not None and value <= 0:
@@ -0,0 +1,148 @@
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from .availability import CAR_VERSION_NAME, reservation_changed
+from .caching import bump_version_on_commit
+from .lookups import lookups_changed
+from . import car_search, occupancy, price_calendar, pricing, search, suggest
+from .models import ArchivedReservation, Reservation, VehicleType, Brand, FuelType, Color, Transmission, CarModel, Car, PricingRule, CarModelPriceCalendar
+
+
+LOOKUP_MODELS = (VehicleType, Brand, FuelType, Color, Transmission)
+# Lookups whose names are part of a car model's search terms, by CarModel field
+INDEXED_LOOKUPS = {Brand: 'brand', VehicleType: 'vehicle_type', FuelType: 'fuel_type', Transmission: 'transmission'}
+
+
+@receiver(post_delete, sender=Reservation)
+def reservation_deleted(sender, instance, **kwargs):
+    """Keep availability index and occupancy bitmaps in sync, including cascaded deletes"""
+    span = getattr(instance, '_loaded_span', None) or occupancy.reservation_span(instance)
+    if span:
+        occupancy.apply_change(old_span=span)
+    reservation_changed(span)
+
+
+@receiver(post_delete, sender=ArchivedReservation)
+def archived_reservation_deleted(sender, instance, **kwargs):
+    """Archived rows keep their occupancy days until deleted (e.g. cascaded from their user or car)"""
+    span = occupancy.reservation_span(instance)
+    if span:
+        occupancy.apply_change(old_span=span)
+        bump_version_on_commit(CAR_VERSION_NAME.format(instance.car_id))
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def table_changed(sender, **kwargs):
+    """Bump the per-table version used as cache key part (e.g. paginated counts)"""
+    if sender._meta.app_label == 'renting':
+        bump_version_on_commit(sender._meta.db_table)
+
+
+def lookup_changed(sender, **kwargs):
+    """Drop cached lookup tables; other workers notice through the version counter"""
+    lookups_changed(sender)
+
+
+for lookup_model in LOOKUP_MODELS:
+    post_save.connect(lookup_changed, sender=lookup_model)
+    post_delete.connect(lookup_changed, sender=lookup_model)
+
+
+# Search index (renting/search.py)
+
+@receiver(post_save, sender=CarModel)
+def car_model_saved(sender, instance, **kwargs):
+    """Reindex the model's search terms"""
+    search.index_models([instance.pk])
+
+
+def indexed_lookup_saved(sender, instance, created, **kwargs):
+    """A renamed lookup changes the terms of every model using it"""
+    if not created:
+        search.index_models(_models_using(sender, instance))
+
+
+def indexed_lookup_deleting(sender, instance, **kwargs):
+    # After deletion the models no longer reference it (SET_NULL)
+    instance._search_model_ids = _models_using(sender, instance)
+
+
+def indexed_lookup_deleted(sender, instance, **kwargs):
+    model_ids = getattr(instance, '_search_model_ids', None)
+    if model_ids:
+        search.index_models(model_ids)
+
+
+def _models_using(lookup_model, instance):
+    field = INDEXED_LOOKUPS[lookup_model]
+    return list(CarModel.objects.filter(**{field: instance}).values_list('id', flat=True))
+
+
+for lookup_model in INDEXED_LOOKUPS:
+    post_save.connect(indexed_lookup_saved, sender=lookup_model)
+    pre_delete.connect(indexed_lookup_deleting, sender=lookup_model)
+    post_delete.connect(indexed_lookup_deleted, sender=lookup_model)
+
+
+# Autocomplete tries (renting/suggest.py)
+
+@receiver(post_save, sender=Car)
+@receiver(post_delete, sender=Car)
+def car_changed(sender, instance, **kwargs):
+    suggest.cars_changed([instance.pk])
+
+
+@receiver(post_save, sender=CarModel)
+def car_model_renamed(sender, instance, created, **kwargs):
+    if not created:
+        suggest.cars_changed(instance.cars.values_list('id', flat=True))
+
+
+@receiver(post_save, sender=Brand)
+def brand_renamed(sender, instance, created, **kwargs):
+    if not created:
+        suggest.cars_changed(Car.objects.filter(car_model__brand=instance).values_list('id', flat=True))
+
+
+# Car search read model (renting/car_search.py)
+
+# Lookups set to NULL on delete, by CarSearch column
+NULLED_LOOKUPS = {
+    VehicleType: 'vehicle_type_id', FuelType: 'fuel_type_id', Transmission: 'transmission_id', Color: 'color_id',
+}
+
+
+@receiver(post_save, sender=Car)
+@receiver(post_delete, sender=Car)
+def car_search_row_changed(sender, instance, **kwargs):
+    car_search.sync_cars([instance.pk])
+
+
+@receiver(post_save, sender=CarModel)
+def car_search_model_saved(sender, instance, created, **kwargs):
+    if not created:
+        car_search.sync_model(instance)
+
+
+def car_search_lookup_deleted(sender, instance, **kwargs):
+    car_search.clear_lookup(NULLED_LOOKUPS[sender], instance.pk)
+
+
+for lookup_model in NULLED_LOOKUPS:
+    post_delete.connect(car_search_lookup_deleted, sender=lookup_model)
+
+
+# Pricing rules (renting/pricing.py)
+
+@receiver(post_save, sender=PricingRule)
+@receiver(post_delete, sender=PricingRule)
+def pricing_rule_changed(sender, **kwargs):
+    pricing.rules_changed()
+
+
+# Price calendars (renting/price_calendar.py); bulk edits notify it themselves
+
+@receiver(post_save, sender=CarModelPriceCalendar)
+@receiver(post_delete, sender=CarModelPriceCalendar)
+def price_calendar_changed(sender, **kwargs):
+    price_calendar.calendars_changed()
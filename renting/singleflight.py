@@ -0,0 +1,54 @@
+import logging
+import threading
+
+
+logger = logging.getLogger(__name__)
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls per key: the first caller (leader) runs the
+    function, callers arriving meanwhile wait and share its result or error.
+    Process-local; each worker process computes at most once per key at a time.
+    """
+
+    def __init__(self, timeout=30):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.timeout = timeout
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            if not call.done.wait(self.timeout):
+                # Leader is stuck: do not pile up behind it
+                logger.warning(f"Single-flight wait timed out for {key}")
+                return fn()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
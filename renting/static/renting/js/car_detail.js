@@ -12,6 +12,25 @@ function checkImageExists(url) {
     });
 }
 
+/**
+ * Load booked date ranges for the next 90 days (revalidated with the ETag on every load)
+ */
+async function loadCarCalendar(carId) {
+    const from = new Date();
+    const to = new Date();
+    to.setDate(to.getDate() + 89);
+    const iso = (d) => d.toISOString().split('T')[0];
+
+    const response = await fetchWithAuth(`/api/cars/${carId}/calendar/?from=${iso(from)}&to=${iso(to)}`, { cache: 'no-cache' });
+    if (!response || !response.ok) return;
+
+    const calendar = await response.json();
+    const fmt = (value) => value.split('-').reverse().slice(0, 2).join('/');
+    document.getElementById('car-booked').innerText = calendar.busy.length
+        ? calendar.busy.map(r => r.start_date === r.end_date ? fmt(r.start_date) : `${fmt(r.start_date)}–${fmt(r.end_date)}`).join(', ')
+        : 'Available';
+}
+
 /**
  * Load car details from API and populate page
  */
@@ -35,6 +54,7 @@ async function loadCarDetail() {
     document.getElementById('car-fuel').innerText = c.fuel_type_name || '-';
     document.getElementById('car-plate').innerText = c.license_plate;
     document.getElementById('reserve-link').href = `/reservations/create/?car=${c.id}`;
+    loadCarCalendar(c.id);
 
     // --- Image carousel logic (core functionality) ---
     const carouselInner = document.getElementById('carousel-images');
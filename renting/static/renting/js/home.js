@@ -7,7 +7,9 @@ let isLoading = false;
  * UI 입력값을 읽어 API 쿼리 스트링 생성
  */
 function getFilterParams() {
-    const params = new URLSearchParams();
+    // Cursor pagination: constant cost per page while scrolling, no count.
+    // Searches are answered page by page in relevance order; `next` works the same
+    const params = new URLSearchParams({ pagination: 'cursor' });
     
     // Basic search and sorting
     const search = document.getElementById('search-input').value;
@@ -14,6 +14,19 @@ function clearReservationErrors() {
     if (container) container.innerHTML = '';
 }
 
+/**
+ * True if the car is already booked on any day of the range.
+ * Checked before posting to spare a failing write; the server still decides.
+ * Always revalidated (ETag): a cached answer could still show freed dates as booked.
+ */
+async function datesTaken(carId, start, end) {
+    if (!carId || !start || !end || end < start) return false;
+    const response = await fetchWithAuth(`/api/cars/${carId}/calendar/?from=${start}&to=${end}`, { cache: 'no-cache' });
+    if (!response || !response.ok) return false;
+    const calendar = await response.json();
+    return calendar.busy.length > 0;
+}
+
 /**
  * Handle reservation form submission
  */
@@ -43,6 +56,11 @@ document.getElementById('res-create-form').onsubmit = async (e) => {
             end_date: document.getElementById('end_date').value
         };
 
+        if (await datesTaken(payload.car, payload.start_date, payload.end_date)) {
+            showGlobalAlert("Selected dates overlap with another reservation for this vehicle");
+            return;
+        }
+
         const response = await fetchWithAuth('/api/reservations/', {
             method: 'POST',
             body: JSON.stringify(payload)
@@ -6,7 +6,7 @@ let currentTab = 'upcoming';
  * Load user's reservations based on current tab (upcoming/past)
  */
 async function loadMyReservations(url = null) {
-    const fetchUrl = url || `/api/reservations/my/?status=${currentTab}`;
+    const fetchUrl = url || `/api/reservations/my/?status=${currentTab}&pagination=cursor`;
     
     const container = document.getElementById('my-res-container');
     const paginationContainer = document.getElementById('pagination-container');
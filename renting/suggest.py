@@ -0,0 +1,203 @@
+import heapq
+import logging
+import threading
+from functools import partial
+from django.db import transaction
+from .caching import CompiledCache
+from .models import Car
+from .search import normalize
+
+
+logger = logging.getLogger(__name__)
+
+VERSION_NAME = 'suggest'
+MAX_SUGGESTIONS = 10
+
+BRAND = 'brand'
+MODEL = 'model'
+PLATE = 'plate'
+
+
+# ============================================
+# Prefix trie
+# ============================================
+
+
+class _Node:
+    __slots__ = ('children', 'entries', 'top')
+
+    def __init__(self):
+        self.children = {}
+        self.entries = set()
+        # Best MAX_SUGGESTIONS entries of the subtree, computed on first query
+        self.top = None
+
+
+class SuggestionTrie:
+    """
+    Counted (kind, label) entries reachable by the prefix of any word of
+    their label ("cher" finds "Grand Cherokee"). Matching is case- and
+    accent-insensitive.
+    """
+
+    def __init__(self):
+        self.root = _Node()
+        self.counts = {}
+
+    def add(self, kind, label, delta):
+        """Change the count of an entry; entries reaching zero are removed"""
+        key = (kind, label)
+        count = self.counts.get(key, 0) + delta
+        if count > 0:
+            self.counts[key] = count
+        else:
+            self.counts.pop(key, None)
+
+        for path in _paths(label):
+            node = self.root
+            _update_top(node, key, count, delta)
+            for char in path:
+                node = node.children.setdefault(char, _Node())
+                _update_top(node, key, count, delta)
+            if count > 0:
+                node.entries.add(key)
+            else:
+                node.entries.discard(key)
+        # Empty branches are left in place; the next rebuild drops them
+
+    def search(self, prefix, limit=MAX_SUGGESTIONS):
+        """[(kind, label, count)] under `prefix`, most cars first"""
+        node = self.root
+        # Spaced like the indexed paths: single spaces between words, none around
+        for char in ' '.join(normalize(prefix).split()):
+            node = node.children.get(char)
+            if node is None:
+                return []
+        if node.top is None:
+            node.top = self._best(node)
+        return node.top[:limit]
+
+    def _best(self, node):
+        keys = set()
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            keys.update(current.entries)
+            stack.extend(current.children.values())
+        return heapq.nsmallest(
+            MAX_SUGGESTIONS, ((kind, label, self.counts[(kind, label)]) for kind, label in keys), key=_rank
+        )
+
+
+def _rank(suggestion):
+    kind, label, count = suggestion
+    return -count, label.casefold(), kind
+
+
+def _update_top(node, key, count, delta):
+    """Keep a computed top list exact, or drop it when that needs the whole subtree"""
+    top = node.top
+    if top is None:
+        return
+    others = [s for s in top if s[:2] != key]
+    if delta < 0 and len(others) < len(top) == MAX_SUGGESTIONS:
+        # An entry below the cut-off may now rank higher
+        node.top = None
+        return
+    if count > 0:
+        others.append((*key, count))
+    node.top = sorted(others, key=_rank)[:MAX_SUGGESTIONS]
+
+
+def _paths(label):
+    words = normalize(label).split()
+    return {' '.join(words[start:]) for start in range(len(words))}
+
+
+# ============================================
+# Process-local suggester
+# ============================================
+
+
+class Suggester:
+    """
+    Brand, model and license plate tries for the autocomplete endpoint: a
+    CompiledCache (renting.caching) whose tries local writes patch in place
+    once they commit, instead of rebuilding them.
+    """
+
+    def __init__(self):
+        # Guards the tries: commits patch them while other threads search
+        self._lock = threading.Lock()
+        self._cache = CompiledCache(_build, VERSION_NAME)
+
+    def suggest(self, text, include_plates=False, limit=MAX_SUGGESTIONS):
+        if not text.strip():
+            return []
+        catalog, plates, _ = self._cache.get()
+        with self._lock:
+            return _merge(catalog, plates if include_plates else None, text, limit)
+
+    def reset(self):
+        self._cache.reset()
+
+    def written(self):
+        """Keep the tries for patching; the writing transaction builds its own until it ends"""
+        self._cache.written(keep=True)
+
+    def refresh(self, car_ids):
+        """Re-read the given cars and patch their contributions (on commit)"""
+        self._cache.patch(partial(self._patch, car_ids))
+
+    def _patch(self, car_ids, tries):
+        catalog, plates, cars = tries
+        rows = {row[0]: row[1:] for row in _car_rows().filter(id__in=car_ids)}
+        with self._lock:
+            for car_id in car_ids:
+                _apply(catalog, plates, cars.pop(car_id, None), -1)
+                current = rows.get(car_id)
+                if current is not None:
+                    cars[car_id] = current
+                    _apply(catalog, plates, current, 1)
+
+
+def _apply(catalog, plates, car, delta):
+    if car is None:
+        return
+    brand, model_name, plate = car
+    catalog.add(BRAND, brand, delta)
+    catalog.add(MODEL, model_name, delta)
+    plates.add(PLATE, plate, delta)
+
+
+def _car_rows():
+    return Car.objects.order_by().values_list(
+        'id', 'car_model__brand__name', 'car_model__model_name', 'license_plate'
+    )
+
+
+def _build():
+    catalog, plates, cars = SuggestionTrie(), SuggestionTrie(), {}
+    for car_id, *car in _car_rows().iterator():
+        cars[car_id] = tuple(car)
+        _apply(catalog, plates, cars[car_id], 1)
+    logger.debug(f"Suggestion tries built from {len(cars)} cars")
+    return catalog, plates, cars
+
+
+def _merge(catalog, plates, text, limit):
+    found = catalog.search(text, limit)
+    if plates is not None:
+        found = heapq.nsmallest(limit, found + plates.search(text, limit), key=_rank)
+    return [{'kind': kind, 'label': label, 'count': count} for kind, label, count in found]
+
+
+suggester = Suggester()
+
+
+def cars_changed(car_ids):
+    """Patch the tries for these cars once the current transaction commits (signals)"""
+    car_ids = list(car_ids)
+    if car_ids:
+        suggester.written()
+        transaction.on_commit(lambda: suggester.refresh(car_ids))
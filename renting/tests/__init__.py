@@ -0,0 +1,52 @@
+"""
+Shared test fixtures
+CacheTestCase: base for the tests of cached reads, which are bypassed inside
+atomic blocks and so need committed data (TransactionTestCase).
+"""
+
+from rest_framework.test import APIClient
+from django.core.cache import cache
+from django.test import TransactionTestCase
+from renting import price_calendar, pricing
+from renting.availability import availability_index
+from renting.lookups import lookup_cache
+from renting.models import AppUser, Brand, Car, CarModel
+from renting.suggest import suggester
+from datetime import date
+from decimal import Decimal
+
+
+def reset_caches():
+    """Empty the shared cache and every process-local cache"""
+    cache.clear()
+    lookup_cache.reset()
+    availability_index.reset()
+    suggester.reset()
+    pricing.rule_cache.reset()
+    price_calendar.calendar_cache.reset()
+
+
+def create_driver(email='driver@example.com'):
+    return AppUser.objects.create_user(
+        email=email, first_name='Driver', last_name='Test', password='Pass123!', birth_date=date(1990, 1, 1)
+    )
+
+
+def create_fleet(count=2, plate='CAR', brand='Toyota', model_name='Corolla', daily_price='40.00', **model_fields):
+    """Create `count` cars (plates `<plate>-000`, ...) of one new car model"""
+    car_model = CarModel.objects.create(
+        brand=Brand.objects.get_or_create(name=brand)[0], model_name=model_name,
+        daily_price=Decimal(daily_price), **model_fields
+    )
+    return [Car.objects.create(car_model=car_model, license_plate=f'{plate}-{i:03d}') for i in range(count)]
+
+
+class CacheTestCase(TransactionTestCase):
+    """Every cache starts and ends each test empty"""
+    client_class = APIClient
+
+    def setUp(self):
+        reset_caches()
+
+    def tearDown(self):
+        reset_caches()
@@ -0,0 +1,106 @@
+"""
+Reservation archive tests
+Tests: batched archiving command, occupancy kept, past reservations served
+transparently from both tables
+"""
+
+from io import StringIO
+from rest_framework.test import APITestCase
+from django.core.management import call_command
+from django.urls import reverse
+from renting import archive, occupancy
+from renting.models import AppUser, ArchivedReservation, Brand, Car, CarModel, Reservation
+from datetime import date, timedelta
+from decimal import Decimal
+
+
+class ArchiveTestCase(APITestCase):
+    """Test moving completed reservations to the archive table"""
+
+    def setUp(self):
+        self.user = AppUser.objects.create_user(
+            email='archive@example.com', first_name='Archive', last_name='User',
+            password='Pass123!', birth_date=date(1990, 1, 1)
+        )
+        self.car = Car.objects.create(
+            car_model=CarModel.objects.create(
+                brand=Brand.objects.create(name='Dacia'), model_name='Sandero', daily_price=Decimal('25.00')
+            ),
+            license_plate='ARC-001',
+        )
+        today = date.today()
+        # Two old enough to archive, one recent past, one upcoming
+        self.old = [self.book(today - timedelta(days=days)) for days in (800, 500)]
+        self.recent = self.book(today - timedelta(days=30))
+        self.upcoming = self.book(today + timedelta(days=10))
+
+    def book(self, start):
+        return Reservation.objects.create(user=self.user, car=self.car, start_date=start, end_date=start + timedelta(days=2))
+
+    def test_01_command_moves_old_reservations_in_batches(self):
+        """Only reservations past the horizon move, one per batch here; re-runs are no-ops"""
+        out = StringIO()
+        call_command('archive_reservations', '--batch-size', '1', '--pause', '0', stdout=out)
+        self.assertIn('Archived 2 reservation(s)', out.getvalue())
+        self.assertIn('in 2 batch(es)', out.getvalue())
+
+        self.assertEqual(set(Reservation.objects.values_list('id', flat=True)), {self.recent.id, self.upcoming.id})
+        archived = ArchivedReservation.objects.get(id=self.old[0].id)
+        self.assertEqual(
+            (archived.start_date, archived.total_price, archived.user_id),
+            (self.old[0].start_date, self.old[0].total_price, self.user.id),
+        )
+
+        self.assertEqual(archive.archive_batch(archive.archive_cutoff()), 0)
+
+    def test_02_archived_days_stay_booked(self):
+        """Archiving keeps the occupancy bitmaps, and they still verify"""
+        old = self.old[0]
+        archive.archive_batch(archive.archive_cutoff())
+
+        self.assertTrue(occupancy.is_booked(self.car.id, old.start_date, old.end_date))
+        self.assertEqual(occupancy.verify(), [])
+
+    def test_03_past_reservations_include_archive(self):
+        """my_reservations?status=past lists live and archived rows in one page"""
+        self.client.force_authenticate(self.user)
+        url = f"{reverse('reservation-my-reservations')}?status=past"
+        before = self.client.get(url).data
+
+        archive.archive_batch(archive.archive_cutoff())
+        after = self.client.get(url).data
+
+        self.assertEqual(after, before)
+        self.assertEqual(after['count'], 3)
+        self.assertEqual([r['id'] for r in after['results']], [self.recent.id, self.old[1].id, self.old[0].id])
+        self.assertEqual(after['results'][2]['car_license'], 'ARC-001')
+
+        upcoming = self.client.get(f"{reverse('reservation-my-reservations')}?status=upcoming").data
+        self.assertEqual([r['id'] for r in upcoming['results']], [self.upcoming.id])
+
+    def test_04_archive_respects_owner_and_filters(self):
+        """Other users' archived rows stay hidden; filters apply to the archive too"""
+        archive.archive_batch(archive.archive_cutoff())
+        other = AppUser.objects.create_user(
+            email='other@example.com', first_name='Other', last_name='User',
+            password='Pass123!', birth_date=date(1990, 1, 1)
+        )
+        self.client.force_authenticate(other)
+        url = reverse('reservation-my-reservations')
+        self.assertEqual(self.client.get(f'{url}?status=past').data['count'], 0)
+
+        self.client.force_authenticate(self.user)
+        cutoff = date.today() - timedelta(days=600)
+        response = self.client.get(f'{url}?status=past&end_date={cutoff}')
+        self.assertEqual([r['id'] for r in response.data['results']], [self.old[0].id])
+
+    def test_05_deleting_archived_rows_frees_their_days(self):
+        """Archived rows removed with their user release the occupancy days"""
+        old = self.old[0]
+        archive.archive_batch(archive.archive_cutoff())
+
+        self.user.delete()
+
+        self.assertFalse(ArchivedReservation.objects.exists())
+        self.assertFalse(occupancy.is_booked(self.car.id, old.start_date, old.end_date))
+        self.assertEqual(occupancy.verify(), [])
@@ -0,0 +1,226 @@
+"""
+Availability index tests
+Tests: interval structure and gaps, index sync on save/delete and across workers, car list filtering,
+next free windows
+"""
+
+from unittest import mock
+from rest_framework.test import APITestCase
+from rest_framework import status
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from renting.availability import (
+    CHANGES_KEY, VERSION_NAME, CarIntervals, availability_index, next_windows, occupied_car_ids,
+)
+from renting.caching import bump_version
+from renting.models import Reservation
+from renting.tests import CacheTestCase, create_driver, create_fleet
+from datetime import date, timedelta
+
+
+class CarIntervalsTestCase(APITestCase):
+    """Test the per-car sorted interval structure"""
+
+    def test_01_overlap_inclusive_bounds(self):
+        """Intervals touching the window on either edge count as overlapping"""
+        intervals = CarIntervals([(date(2030, 1, 10), date(2030, 1, 12))])
+
+        self.assertTrue(intervals.overlaps(date(2030, 1, 12), date(2030, 1, 15)))
+        self.assertTrue(intervals.overlaps(date(2030, 1, 5), date(2030, 1, 10)))
+        self.assertFalse(intervals.overlaps(date(2030, 1, 13), date(2030, 1, 20)))
+        self.assertFalse(intervals.overlaps(date(2030, 1, 1), date(2030, 1, 9)))
+
+    def test_02_long_interval_hidden_behind_later_starts(self):
+        """A long early interval is still found past shorter later ones"""
+        intervals = CarIntervals([
+            (date(2030, 3, 1), date(2030, 3, 2)),
+            (date(2030, 1, 1), date(2030, 12, 31)),
+        ])
+
+        self.assertTrue(intervals.overlaps(date(2030, 6, 1), date(2030, 6, 5)))
+
+    def test_03_free_gaps_sweep(self):
+        """Gaps between (possibly overlapping) intervals, clipped to the window"""
+        intervals = CarIntervals([
+            (date(2030, 1, 1), date(2030, 1, 4)),
+            (date(2030, 1, 8), date(2030, 1, 20)),
+            (date(2030, 1, 10), date(2030, 1, 12)),
+            (date(2030, 1, 25), date(2030, 1, 25)),
+        ])
+
+        self.assertEqual(list(intervals.free_gaps(date(2030, 1, 3), date(2030, 1, 31))), [
+            (date(2030, 1, 5), date(2030, 1, 7)),
+            (date(2030, 1, 21), date(2030, 1, 24)),
+            (date(2030, 1, 26), date(2030, 1, 31)),
+        ])
+        self.assertEqual(list(intervals.free_gaps(date(2030, 1, 9), date(2030, 1, 18))), [])
+        self.assertEqual(
+            list(CarIntervals().free_gaps(date(2030, 1, 1), date(2030, 1, 2))),
+            [(date(2030, 1, 1), date(2030, 1, 2))],
+        )
+
+
+class AvailabilityIndexTestCase(CacheTestCase):
+    """Test that committed reservation writes reload the cars they touch in the index"""
+
+    def setUp(self):
+        super().setUp()
+        self.user = create_driver()
+        self.car1, self.car2 = create_fleet(plate='AVL')
+        self.start = date.today() + timedelta(days=10)
+        self.end = self.start + timedelta(days=3)
+
+    def test_01_index_follows_save_and_delete(self):
+        """Creating, moving and deleting a reservation updates the index"""
+        self.assertEqual(availability_index.occupied_car_ids(self.start, self.end), set())
+
+        reservation = Reservation.objects.create(
+            user=self.user, car=self.car1, start_date=self.start, end_date=self.end
+        )
+        self.assertEqual(availability_index.occupied_car_ids(self.start, self.end), {self.car1.id})
+
+        reservation = Reservation.objects.get(pk=reservation.pk)
+        reservation.car = self.car2
+        reservation.save()
+        self.assertEqual(availability_index.occupied_car_ids(self.start, self.end), {self.car2.id})
+
+        reservation.delete()
+        self.assertEqual(availability_index.occupied_car_ids(self.start, self.end), set())
+
+    def test_02_reload_leaves_handed_out_maps_unchanged(self):
+        """Reloading dirty cars builds a new map: readers iterating the old one are not affected"""
+        before = availability_index.car_intervals(self.start, self.end)
+        Reservation.objects.create(user=self.user, car=self.car1, start_date=self.start, end_date=self.end)
+
+        after = availability_index.car_intervals(self.start, self.end)
+        self.assertIsNot(after, before)
+        self.assertNotIn(self.car1.id, before)
+        self.assertIn(self.car1.id, after)
+
+    def test_03_other_workers_changes_reload_only_their_cars(self):
+        """A commit seen through the shared log reloads its cars; a gap in the log reloads everything"""
+        availability_index.car_intervals(self.start, self.end)
+        # Another worker's commit: the row, the version bump and its change log entry
+        Reservation.objects.bulk_create([
+            Reservation(user=self.user, car=self.car2, start_date=self.start, end_date=self.end)
+        ])
+        version = bump_version(VERSION_NAME)
+        cache.set(CHANGES_KEY.format(version), [self.car2.id])
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(availability_index.occupied_car_ids(self.start, self.end), {self.car2.id})
+        self.assertEqual(len(queries), 1)
+        self.assertIn('"car_id" IN', queries[0]['sql'])
+
+        bump_version(VERSION_NAME)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(availability_index.occupied_car_ids(self.start, self.end), {self.car2.id})
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('"car_id" IN', queries[0]['sql'])
+
+    def test_04_past_reservations_left_to_the_database(self):
+        """Only reservations ending today or later are loaded; earlier windows query the table"""
+        past = date.today() - timedelta(days=30)
+        Reservation.objects.bulk_create([
+            Reservation(user=self.user, car=self.car1, start_date=past, end_date=past + timedelta(days=2))
+        ])
+
+        self.assertNotIn(self.car1.id, availability_index.car_intervals(self.start, self.end))
+        self.assertEqual(availability_index.occupied_car_ids(past, past), {self.car1.id})
+
+
+class CarAvailabilityFilterTestCase(APITestCase):
+    """Test availability filtering on /api/cars/"""
+
+    def setUp(self):
+        self.user = create_driver()
+        self.car1, self.car2 = create_fleet(plate='AVL')
+        self.start = date.today() + timedelta(days=10)
+        Reservation.objects.create(
+            user=self.user, car=self.car1,
+            start_date=self.start, end_date=self.start + timedelta(days=3)
+        )
+        self.cars_url = reverse('car-list')
+
+    def test_01_booked_car_excluded(self):
+        """Cars booked in the requested window are not listed; the index is read once per request"""
+        with mock.patch('renting.availability.occupied_car_ids', wraps=occupied_car_ids) as occupied:
+            response = self.client.get(self.cars_url, {
+                'available_from': str(self.start + timedelta(days=1)),
+                'available_to': str(self.start + timedelta(days=5)),
+            })
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        ids = [car['id'] for car in response.data['results']]
+        self.assertEqual(ids, [self.car2.id])
+        self.assertEqual(occupied.call_count, 1)
+
+    def test_02_invalid_dates_ignored(self):
+        """Unparseable dates do not filter and do not fail"""
+        response = self.client.get(self.cars_url, {
+            'available_from': 'not-a-date',
+            'available_to': str(self.start),
+        })
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 2)
+
+
+class NextAvailableTestCase(APITestCase):
+    """Test ?suggest_next=1 on /api/cars/"""
+
+    def setUp(self):
+        self.user = create_driver()
+        self.cars = create_fleet(3, plate='AVL')
+        self.start = date.today() + timedelta(days=10)
+        self.cars_url = reverse('car-list')
+
+    def book(self, car, first, last):
+        Reservation.objects.create(
+            user=self.user, car=car,
+            start_date=self.start + timedelta(days=first), end_date=self.start + timedelta(days=last)
+        )
+
+    def test_01_first_gap_long_enough(self):
+        """Too short gaps are skipped; a car is free after its last booking; one query"""
+        car1, car2, car3 = self.cars
+        self.book(car1, 0, 3)
+        self.book(car1, 6, 7)
+        self.book(car1, 9, 20)
+        self.book(car2, 1, 2)
+
+        with self.assertNumQueries(1):
+            windows = next_windows(
+                [car1.id, car2.id, car3.id], self.start + timedelta(days=1), self.start + timedelta(days=3)
+            )
+        day = lambda offset: self.start + timedelta(days=offset)
+        self.assertEqual(windows, {
+            car1.id: (day(21), day(23)),
+            car2.id: (day(3), day(5)),
+            car3.id: (day(1), day(3)),
+        })
+
+    def test_02_list_suggests_for_excluded_cars(self):
+        """Booked cars matching the filters get their next window, soonest first"""
+        car1, car2, car3 = self.cars
+        self.book(car1, 0, 9)
+        self.book(car2, 2, 4)
+        params = {
+            'available_from': str(self.start), 'available_to': str(self.start + timedelta(days=2)),
+            'suggest_next': '1',
+        }
+
+        response = self.client.get(self.cars_url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([car['id'] for car in response.data['results']], [car3.id])
+        self.assertEqual(
+            [(item['license_plate'], item['start_date']) for item in response.data['next_available']],
+            [('AVL-001', self.start + timedelta(days=5)), ('AVL-000', self.start + timedelta(days=10))],
+        )
+
+        response = self.client.get(self.cars_url, {**params, 'max_price': '10'})
+        self.assertEqual(response.data['next_available'], [])
+        response = self.client.get(self.cars_url, {k: v for k, v in params.items() if k != 'suggest_next'})
+        self.assertNotIn('next_available', response.data)
@@ -0,0 +1,89 @@
+"""
+Car calendar tests
+Tests: merged busy ranges, parameter validation, per-car ETag invalidation
+"""
+
+from rest_framework import status
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from renting.models import AppUser, Brand, Car, CarModel, Reservation
+from renting.tests import CacheTestCase
+from datetime import date, timedelta
+from decimal import Decimal
+
+
+class CarCalendarTestCase(CacheTestCase):
+    """Test /api/cars/{id}/calendar/ (versions are bumped on commit)"""
+
+    def setUp(self):
+        super().setUp()
+        car_model = CarModel.objects.create(
+            brand=Brand.objects.create(name='Renault'), model_name='Clio', daily_price=Decimal('30.00')
+        )
+        self.car = Car.objects.create(car_model=car_model, license_plate='CAL-101')
+        self.other = Car.objects.create(car_model=car_model, license_plate='CAL-102')
+        self.user = AppUser.objects.create_user(
+            email='cal@example.com', first_name='Cal', last_name='User', password='Pass123!'
+        )
+        self.today = date.today()
+
+    def book(self, car, first, last):
+        return Reservation.objects.create(
+            user=self.user, car=car,
+            start_date=self.today + timedelta(days=first), end_date=self.today + timedelta(days=last),
+        )
+
+    def calendar(self, car, first, last, **headers):
+        url = reverse('car-calendar', args=[car.id])
+        return self.client.get(url, {
+            'from': self.today + timedelta(days=first), 'to': self.today + timedelta(days=last),
+        }, **headers)
+
+    def test_01_busy_ranges_are_merged_and_clipped(self):
+        """Back-to-back reservations merge; ranges are clipped to the window, in one query"""
+        self.book(self.car, 5, 7)
+        self.book(self.car, 8, 9)
+        self.book(self.car, 20, 25)
+        self.book(self.other, 1, 30)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.calendar(self.car, 0, 22)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(r['start_date'], r['end_date']) for r in response.data['busy']],
+            [
+                (self.today + timedelta(days=5), self.today + timedelta(days=9)),
+                (self.today + timedelta(days=20), self.today + timedelta(days=22)),
+            ],
+        )
+        self.assertEqual(len(queries), 1)
+
+    def test_02_invalid_requests(self):
+        """Missing or reversed dates, too long windows and unknown cars are rejected"""
+        url = reverse('car-calendar', args=[self.car.id])
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.calendar(self.car, 5, 1).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.calendar(self.car, 0, 400).status_code, status.HTTP_400_BAD_REQUEST)
+
+        missing = reverse('car-calendar', args=[self.other.id + 100])
+        response = self.client.get(missing, {'from': self.today, 'to': self.today})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_03_etag_changes_only_with_this_car(self):
+        """Other cars' bookings keep the ETag (304 without queries); this car's change it"""
+        first = self.calendar(self.car, 0, 30)
+        self.assertIn('max-age=', first['Cache-Control'])
+
+        self.book(self.other, 3, 4)
+        with CaptureQueriesContext(connection) as queries:
+            second = self.calendar(self.car, 0, 30, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(len(queries), 0)
+
+        self.book(self.car, 3, 4)
+        third = self.calendar(self.car, 0, 30, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(third.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(third['ETag'], first['ETag'])
+        self.assertEqual(len(third.data['busy']), 1)
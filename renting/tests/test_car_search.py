@@ -0,0 +1,81 @@
+"""
+Car search read model tests
+Tests: signal maintenance, single-table list queries, ordering, verify command
+"""
+
+from io import StringIO
+from rest_framework.test import APITestCase
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from renting import car_search
+from renting.models import Brand, Car, CarModel, CarSearch, FuelType
+from decimal import Decimal
+
+
+class CarSearchTestCase(APITestCase):
+    """Test the flattened car_search table"""
+
+    def setUp(self):
+        self.diesel = FuelType.objects.create(name='Diesel')
+        self.golf = CarModel.objects.create(
+            brand=Brand.objects.create(name='Volkswagen'), model_name='Golf',
+            daily_price=Decimal('55.00'), seats=5, fuel_type=self.diesel,
+        )
+        self.up = CarModel.objects.create(
+            brand=Brand.objects.create(name='Skoda'), model_name='Citigo', daily_price=Decimal('30.00'), seats=4,
+        )
+        self.car = Car.objects.create(car_model=self.golf, license_plate='CSR-001', mileage=1000)
+        Car.objects.create(car_model=self.up, license_plate='CSR-002', mileage=500)
+
+    def test_01_signals_keep_rows_in_sync(self):
+        """Car and model writes and lookup deletes are mirrored in car_search"""
+        self.assertEqual(car_search.verify(), [])
+
+        self.golf.daily_price = Decimal('60.00')
+        self.golf.save()
+        self.assertEqual(CarSearch.objects.get(id=self.car.id).daily_price, Decimal('60.00'))
+
+        self.diesel.delete()
+        self.assertIsNone(CarSearch.objects.get(id=self.car.id).fuel_type_id)
+
+        self.car.delete()
+        self.assertFalse(CarSearch.objects.filter(id=self.car.id).exists())
+        self.assertEqual(car_search.verify(), [])
+
+    def test_02_list_filters_and_pages_without_joins(self):
+        """Filtering, counting and paging read car_search alone; only the page is joined"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('car-list'), {'fuel': 'Diesel', 'min_price': 50})
+
+        self.assertEqual([car['license_plate'] for car in response.data['results']], ['CSR-001'])
+        self.assertEqual(response.data['results'][0]['daily_price'], Decimal('55.00'))
+        search_queries = [q['sql'] for q in queries if '"car_search"' in q['sql']]
+        self.assertEqual(len(search_queries), 2)
+        for sql in search_queries:
+            self.assertNotIn('JOIN', sql.upper())
+
+    def test_03_ordering_by_price_uses_read_model_column(self):
+        """?ordering=car_model__daily_price sorts by car_search.daily_price, in both pagination modes"""
+        url = reverse('car-list')
+        response = self.client.get(url, {'ordering': '-car_model__daily_price'})
+        self.assertEqual([car['license_plate'] for car in response.data['results']], ['CSR-001', 'CSR-002'])
+
+        response = self.client.get(url, {'ordering': 'car_model__daily_price', 'pagination': 'cursor', 'page_size': 1})
+        self.assertEqual(response.data['results'][0]['license_plate'], 'CSR-002')
+        response = self.client.get(response.data['next'])
+        self.assertEqual(response.data['results'][0]['license_plate'], 'CSR-001')
+
+    def test_04_verify_command_repairs_drift(self):
+        """Bulk updates bypass signals; verify_car_search reports and repairs them"""
+        Car.objects.filter(id=self.car.id).update(mileage=9999)
+
+        with self.assertRaises(CommandError):
+            call_command('verify_car_search', '--check', stdout=StringIO())
+
+        out = StringIO()
+        call_command('verify_car_search', stdout=out)
+        self.assertIn('Repaired 1', out.getvalue())
+        self.assertEqual(CarSearch.objects.get(id=self.car.id).mileage, 9999)
@@ -0,0 +1,85 @@
+"""
+Conditional GET tests
+Tests: ETag / Last-Modified validators, 304 without queries, invalidation on writes,
+process-local cache with several workers
+"""
+
+import time
+from unittest import mock
+from rest_framework import status
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from renting.caching import cache_usable
+from renting.models import Brand, Car, CarModel
+from renting.tests import CacheTestCase
+from decimal import Decimal
+
+
+class ConditionalGetTestCase(CacheTestCase):
+    """Test catalog validators (versions are bumped on commit)"""
+
+    def setUp(self):
+        super().setUp()
+        brand = Brand.objects.create(name='Kia')
+        self.car_model = CarModel.objects.create(brand=brand, model_name='Picanto', daily_price=Decimal('22.00'))
+        self.car = Car.objects.create(car_model=self.car_model, license_plate='ETG-001')
+
+    def test_01_matching_etag_returns_304_without_queries(self):
+        """If-None-Match with the current ETag short-circuits the view"""
+        first = self.client.get(reverse('brand-list'))
+        self.assertIn('public', first['Cache-Control'])
+        self.assertIn('max-age=', first['Cache-Control'])
+
+        with CaptureQueriesContext(connection) as queries:
+            second = self.client.get(reverse('brand-list'), HTTP_IF_NONE_MATCH=first['ETag'])
+
+        self.assertEqual(second.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(second['ETag'], first['ETag'])
+        self.assertEqual(len(queries), 0)
+
+    def test_02_write_changes_etag(self):
+        """A new brand makes the old ETag stale"""
+        first = self.client.get(reverse('brand-list'))
+        Brand.objects.create(name='Hyundai')
+
+        second = self.client.get(reverse('brand-list'), HTTP_IF_NONE_MATCH=first['ETag'])
+
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(second.data['results']), 2)
+
+    def test_03_car_detail_if_modified_since(self):
+        """Car detail honours If-Modified-Since until the car changes"""
+        url = reverse('car-detail', args=[self.car.id])
+        first = self.client.get(url)
+
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_MODIFIED_SINCE=first['Last-Modified']).status_code,
+            status.HTTP_304_NOT_MODIFIED
+        )
+
+        # Saved a minute later (Last-Modified has one-second resolution)
+        with mock.patch('renting.caching.time.time', return_value=time.time() + 60):
+            self.car.mileage = 1000
+            self.car.save()
+
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_MODIFIED_SINCE=first['Last-Modified']).status_code,
+            status.HTTP_200_OK
+        )
+
+    def test_04_lists_depending_on_reservations_are_not_validated(self):
+        """The car list carries no ETag (availability changes with bookings)"""
+        response = self.client.get(reverse('car-list'))
+
+        self.assertNotIn('ETag', response)
+
+    @override_settings(CACHE_SINGLE_PROCESS=False)
+    def test_05_process_local_cache_not_trusted_by_several_workers(self):
+        """With a process-local cache and several workers, no validators and no cached reads"""
+        response = self.client.get(reverse('brand-list'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('ETag', response)
+        self.assertFalse(cache_usable())
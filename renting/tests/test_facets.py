@@ -0,0 +1,93 @@
+"""
+Car facet tests
+Tests: counts per facet in one query, filters and availability window, caching
+"""
+
+from rest_framework.test import APITestCase
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from renting.models import AppUser, Car, FuelType, Reservation, Transmission
+from renting.tests import CacheTestCase, create_fleet
+from datetime import date, timedelta
+
+
+class FacetCatalog:
+    """Seat Ibiza (diesel, manual) x2 and Skoda Superb x1; no electric car"""
+
+    def setUp(self):
+        super().setUp()
+        diesel = FuelType.objects.create(name='Diesel')
+        FuelType.objects.create(name='Electric')
+        self.car = create_fleet(
+            2, plate='FAC', brand='Seat', model_name='Ibiza', daily_price='45.00', seats=5,
+            fuel_type=diesel, transmission=Transmission.objects.create(name='Manual'),
+        )[0]
+        create_fleet(1, plate='FAS', brand='Skoda', model_name='Superb', daily_price='120.00', seats=5)
+
+
+def counts(facet):
+    return {option.get('name', option.get('value')): option['count'] for option in facet}
+
+
+class FacetTestCase(FacetCatalog, APITestCase):
+    """Test facet counts"""
+
+    def setUp(self):
+        super().setUp()
+        self.url = reverse('car-facets')
+
+    def test_01_counts_every_facet_in_one_query(self):
+        """All facets come from a single aggregate query; empty options count 0"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        # Lookup names are read through the lookup cache
+        aggregates = [q for q in queries if 'COUNT(' in q['sql'].upper()]
+        self.assertEqual(len(aggregates), 1)
+
+        data = response.data
+        self.assertEqual(data['total'], 3)
+        self.assertEqual(counts(data['car_model__brand']), {'Seat': 2, 'Skoda': 1})
+        self.assertEqual(counts(data['fuel']), {'Diesel': 2, 'Electric': 0})
+        self.assertEqual(counts(data['seats']), {5: 3})
+        self.assertEqual([b['count'] for b in data['price']], [2, 0, 1, 0])
+        self.assertEqual(data['price'][1], {'min_price': 50, 'max_price': 100, 'count': 0})
+
+    def test_02_counts_follow_filters_and_search(self):
+        """Facets use the same parameters as the car list"""
+        response = self.client.get(self.url, {'fuel': 'diesel'})
+        self.assertEqual(response.data['total'], 2)
+        self.assertEqual(counts(response.data['car_model__brand']), {'Seat': 2, 'Skoda': 0})
+
+        response = self.client.get(self.url, {'search': 'superb'})
+        self.assertEqual(counts(response.data['car_model__brand']), {'Seat': 0, 'Skoda': 1})
+
+    def test_03_counts_respect_availability_window(self):
+        """Cars booked in the window are not counted"""
+        user = AppUser.objects.create_user(
+            email='facets@example.com', first_name='Facet', last_name='User',
+            password='Pass123!', birth_date=date(1990, 1, 1)
+        )
+        start = date.today() + timedelta(days=5)
+        Reservation.objects.create(user=user, car=self.car, start_date=start, end_date=start + timedelta(days=2))
+
+        response = self.client.get(self.url, {
+            'available_from': start.isoformat(), 'available_to': (start + timedelta(days=1)).isoformat(),
+        })
+        self.assertEqual(counts(response.data['car_model__brand']), {'Seat': 1, 'Skoda': 1})
+
+
+class FacetCacheTestCase(FacetCatalog, CacheTestCase):
+    """Test that facets are cached under their own keys and dropped on catalog writes"""
+
+    def test_01_cached_apart_from_list_and_invalidated_by_catalog(self):
+        """Facets share the list's key scheme without colliding with list responses"""
+        self.client.get(reverse('car-list'), {'fuel': 'Diesel'})
+        self.assertEqual(self.client.get(reverse('car-facets'), {'fuel': 'Diesel'}).data['total'], 2)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('car-facets'), {'fuel': 'Diesel'})
+        self.assertEqual(len(queries), 0)
+
+        Car.objects.create(car_model=self.car.car_model, license_plate='FAC-004')
+        self.assertEqual(self.client.get(reverse('car-facets'), {'fuel': 'Diesel'}).data['total'], 3)
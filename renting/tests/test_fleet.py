@@ -0,0 +1,93 @@
+"""
+Fleet matrix tests
+Tests: run-length and bitmap rows, clipping to the window, staff only, validation
+"""
+
+import base64
+import json
+from unittest import mock
+from rest_framework.test import APITestCase
+from rest_framework import status
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from renting import fleet
+from renting.models import AppUser, Brand, Car, CarModel, Reservation
+from datetime import date, timedelta
+from decimal import Decimal
+
+
+class FleetMatrixTestCase(APITestCase):
+    """Test /api/cars/matrix/"""
+
+    def setUp(self):
+        car_model = CarModel.objects.create(
+            brand=Brand.objects.create(name='Dacia'), model_name='Sandero', daily_price=Decimal('25.00')
+        )
+        self.cars = [Car.objects.create(car_model=car_model, license_plate=f'FLT-{i}') for i in range(3)]
+        self.user = AppUser.objects.create_user(
+            email='fleet@example.com', first_name='Fleet', last_name='User', password='Pass123!'
+        )
+        self.staff = AppUser.objects.create_user(
+            email='ops@example.com', first_name='Ops', last_name='Staff', password='Pass123!', is_staff=True
+        )
+        self.today = date.today()
+        self.url = reverse('car-matrix')
+
+    def book(self, car, first, last):
+        Reservation.objects.create(
+            user=self.user, car=car,
+            start_date=self.today + timedelta(days=first), end_date=self.today + timedelta(days=last),
+        )
+
+    def matrix(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return json.loads(b''.join(response.streaming_content))
+
+    @mock.patch('renting.fleet.BATCH_CARS', 2)
+    def test_01_runs_cover_every_car(self):
+        """Runs are day offsets in the window, clipped, and idle cars get an empty row; two queries per batch"""
+        self.book(self.cars[0], 2, 4)
+        self.book(self.cars[0], 5, 6)
+        self.book(self.cars[0], 85, 100)
+        self.book(self.cars[2], 0, 0)
+        self.client.force_authenticate(user=self.staff)
+
+        with CaptureQueriesContext(connection) as queries:
+            data = self.matrix()
+
+        self.assertEqual(data['days'], fleet.DEFAULT_DAYS)
+        self.assertEqual(
+            [(row['license_plate'], row['busy']) for row in data['cars']],
+            [('FLT-0', [[2, 5], [85, 5]]), ('FLT-1', []), ('FLT-2', [[0, 1]])],
+        )
+        # Cars 1-2 and 3 with their reservations, then the empty batch
+        self.assertEqual(len(queries), 5)
+
+    def test_02_bitmap_matches_runs(self):
+        """Bit i of the base64 bitmap is day i of the window"""
+        self.book(self.cars[1], 3, 12)
+        self.client.force_authenticate(user=self.staff)
+        start = self.today + timedelta(days=2)
+
+        data = self.matrix(**{'from': start, 'to': start + timedelta(days=19), 'encoding': 'bitmap'})
+        bits = int.from_bytes(base64.b64decode(data['cars'][1]['busy']), 'little')
+        self.assertEqual(data['days'], 20)
+        self.assertEqual(bits, ((1 << 10) - 1) << 1)
+        self.assertEqual(list(fleet.bit_runs(bits)), [(1, 10)])
+
+    def test_03_staff_only_and_validation(self):
+        """Regular users are refused; bad dates, long windows and unknown encodings are rejected"""
+        self.client.force_authenticate(user=self.user)
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_403_FORBIDDEN)
+
+        self.client.force_authenticate(user=self.staff)
+        for params in [
+            {'from': 'soon'},
+            {'from': self.today, 'to': self.today - timedelta(days=1)},
+            {'from': self.today, 'to': self.today + timedelta(days=fleet.MAX_DAYS)},
+            {'from': self.today - timedelta(days=800)},
+            {'encoding': 'png'},
+        ]:
+            self.assertEqual(self.client.get(self.url, params).status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,77 @@
+"""
+Flexible date search tests
+Tests: free windows ranked by price, list filters, parameter validation
+"""
+
+from rest_framework.test import APITestCase
+from rest_framework import status
+from django.urls import reverse
+from renting.models import AppUser, Brand, Car, CarModel, Reservation
+from datetime import date, timedelta
+from decimal import Decimal
+
+
+class FlexibleSearchTestCase(APITestCase):
+    """Test /api/cars/flexible/"""
+
+    def setUp(self):
+        brand = Brand.objects.create(name='Fiat')
+        self.cheap = Car.objects.create(
+            car_model=CarModel.objects.create(brand=brand, model_name='Panda', daily_price=Decimal('30.00')),
+            license_plate='FLX-001',
+        )
+        self.dear = Car.objects.create(
+            car_model=CarModel.objects.create(brand=brand, model_name='500X', daily_price=Decimal('50.00')),
+            license_plate='FLX-002',
+        )
+        user = AppUser.objects.create_user(
+            email='flex@example.com', first_name='Flex', last_name='User', password='Pass123!'
+        )
+        self.start = date.today() + timedelta(days=20)
+        Reservation.objects.create(
+            user=user, car=self.cheap,
+            start_date=self.start + timedelta(days=3), end_date=self.start + timedelta(days=4),
+        )
+        self.url = reverse('car-flexible')
+        self.params = {'within_from': self.start, 'within_to': self.start + timedelta(days=9), 'days': 3}
+
+    def test_01_windows_ranked_by_price(self):
+        """Every free window of every car, cheapest first, then earliest"""
+        response = self.client.get(self.url, {**self.params, 'page_size': 5})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # Panda: starts 0, 5, 6, 7 (booked on days 3-4); 500X: starts 0 to 7
+        self.assertEqual(response.data['count'], 12)
+        self.assertEqual(
+            [
+                (item['car']['license_plate'], (item['start_date'] - self.start).days)
+                for item in response.data['results']
+            ],
+            [('FLX-001', 0), ('FLX-001', 5), ('FLX-001', 6), ('FLX-001', 7), ('FLX-002', 0)],
+        )
+        first = response.data['results'][0]
+        self.assertEqual(first['end_date'], self.start + timedelta(days=2))
+        self.assertEqual(first['quote']['total_price'], '90.00')
+
+        response = self.client.get(self.url, {**self.params, 'page_size': 5, 'page': 3})
+        self.assertEqual(
+            [(item['start_date'] - self.start).days for item in response.data['results']], [6, 7]
+        )
+
+    def test_02_list_filters_apply(self):
+        """The car list filters narrow the cars searched"""
+        response = self.client.get(self.url, {**self.params, 'min_price': '40'})
+
+        self.assertEqual(response.data['count'], 8)
+        self.assertEqual({item['car']['id'] for item in response.data['results']}, {self.dear.id})
+
+    def test_03_invalid_parameters(self):
+        """Missing dates, past or too long ranges and bad lengths are rejected"""
+        for params in [
+            {'days': 3},
+            {**self.params, 'within_from': date.today() - timedelta(days=1)},
+            {**self.params, 'within_to': self.start + timedelta(days=100)},
+            {**self.params, 'days': 11},
+            {**self.params, 'days': 'five'},
+        ]:
+            self.assertEqual(self.client.get(self.url, params).status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,82 @@
+"""
+Lookup cache tests
+Tests: cached lookup endpoints, signal and version invalidation, name filters, writes in transactions
+"""
+
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from renting.caching import bump_version
+from renting.lookups import VERSION_NAME, lookup_cache
+from renting.models import Brand, Car, CarModel, Transmission
+from renting.tests import CacheTestCase
+from decimal import Decimal
+
+
+class LookupCacheTestCase(CacheTestCase):
+    """Test the lookup endpoints and name tables served from the lookup cache"""
+
+    def setUp(self):
+        super().setUp()
+        self.brand = Brand.objects.create(name='Mazda')
+        self.manual = Transmission.objects.create(name='Manual')
+        Transmission.objects.create(name='Automatic')
+        car_model = CarModel.objects.create(
+            brand=self.brand, model_name='MX-5', daily_price=Decimal('70.00'), transmission=self.manual
+        )
+        Car.objects.create(car_model=car_model, license_plate='LKP-001')
+
+    def test_01_lookup_list_served_from_cache(self):
+        """A warm cache answers /api/transmissions/ without queries"""
+        self.client.get(reverse('transmission-list'))
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('transmission-list'))
+
+        self.assertEqual(len(queries), 0)
+        self.assertEqual([t['name'] for t in response.data['results']], ['Automatic', 'Manual'])
+
+    def test_02_save_invalidates_local_cache(self):
+        """Renaming a brand through the ORM shows up in car listings at once"""
+        self.client.get(reverse('car-list'))
+        self.brand.name = 'Mazda Motor'
+        self.brand.save()
+
+        response = self.client.get(reverse('car-list'))
+
+        self.assertEqual(response.data['results'][0]['brand_name'], 'Mazda Motor')
+
+    def test_03_version_bump_reloads_other_workers(self):
+        """A write seen only through the shared version counter triggers a reload"""
+        self.assertEqual(lookup_cache.table(Brand).id('mazda'), self.brand.id)
+        Brand.objects.filter(pk=self.brand.pk).update(name='Eunos')  # no signals, like another worker
+        self.assertEqual(lookup_cache.table(Brand).names[self.brand.id], 'Mazda')
+
+        bump_version(VERSION_NAME)
+
+        self.assertEqual(lookup_cache.table(Brand).names[self.brand.id], 'Eunos')
+
+    def test_04_name_filters_use_cache(self):
+        """?transmission= matches names case-insensitively; unknown names match nothing"""
+        url = reverse('car-list')
+
+        self.assertEqual(self.client.get(f'{url}?transmission=manual').data['count'], 1)
+        self.assertEqual(self.client.get(f'{url}?transmission=Automatic').data['count'], 0)
+        self.assertEqual(self.client.get(f'{url}?transmission=Sequential').data['count'], 0)
+        self.assertEqual(self.client.get(f'{url}?search=mazd').data['count'], 1)
+
+    def test_05_transactions_see_their_own_writes_only(self):
+        """Atomic blocks read the cached tables until they write; a rolled back rename is never cached"""
+        lookup_cache.table(Brand)
+
+        with transaction.atomic():
+            with CaptureQueriesContext(connection) as queries:
+                lookup_cache.table(Brand)
+            self.assertEqual(len(queries), 0)
+
+            self.brand.name = 'Eunos'
+            self.brand.save()
+            self.assertEqual(lookup_cache.table(Brand).names[self.brand.id], 'Eunos')
+            transaction.set_rollback(True)
+
+        self.assertEqual(lookup_cache.table(Brand).names[self.brand.id], 'Mazda')
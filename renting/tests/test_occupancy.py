@@ -0,0 +1,120 @@
+"""
+Occupancy bitmap tests
+Tests: bitmap helpers, incremental updates, rebuild command, row creation before locking
+"""
+
+from io import StringIO
+from rest_framework.test import APITestCase
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from renting import occupancy
+from renting.models import AppUser, Car, CarModel, Brand, Reservation, CarOccupancy
+from datetime import date
+from decimal import Decimal
+
+
+class OccupancyBitmapTestCase(APITestCase):
+    """Test bitmap maintenance on reservation writes"""
+
+    def setUp(self):
+        """Create test data"""
+        self.user = AppUser.objects.create_user(
+            email='bitmap@example.com',
+            first_name='Bit',
+            last_name='Map',
+            password='Pass123!',
+            birth_date=date(1990, 1, 1)
+        )
+        brand = Brand.objects.create(name='Toyota')
+        car_model = CarModel.objects.create(brand=brand, model_name='Yaris', daily_price=Decimal('30.00'))
+        self.car = Car.objects.create(car_model=car_model, license_plate='BIT-001')
+
+    def test_01_year_masks_split_across_years(self):
+        """A range crossing New Year is split into two year masks"""
+        masks = occupancy.year_masks(date(2030, 12, 30), date(2031, 1, 2))
+
+        self.assertEqual(masks[2030], 0b11 << 363)
+        self.assertEqual(masks[2031], 0b11)
+
+    def test_02_busy_ranges_follow_create_move_delete(self):
+        """Bitmaps are updated incrementally on create, move and delete"""
+        window = (date(2030, 1, 1), date(2030, 12, 31))
+        reservation = Reservation.objects.create(
+            user=self.user, car=self.car,
+            start_date=date(2030, 3, 1), end_date=date(2030, 3, 4)
+        )
+        self.assertEqual(
+            occupancy.busy_ranges(self.car.id, *window),
+            [(date(2030, 3, 1), date(2030, 3, 4))]
+        )
+
+        reservation = Reservation.objects.get(pk=reservation.pk)
+        reservation.start_date = date(2030, 3, 10)
+        reservation.end_date = date(2030, 3, 11)
+        reservation.save()
+        self.assertEqual(
+            occupancy.busy_ranges(self.car.id, *window),
+            [(date(2030, 3, 10), date(2030, 3, 11))]
+        )
+
+        reservation.delete()
+        self.assertEqual(occupancy.busy_ranges(self.car.id, *window), [])
+
+    def test_03_overlap_check_ignores_own_days(self):
+        """Editing a reservation does not collide with its own stored days"""
+        reservation = Reservation.objects.create(
+            user=self.user, car=self.car,
+            start_date=date(2030, 5, 1), end_date=date(2030, 5, 5)
+        )
+        reservation = Reservation.objects.get(pk=reservation.pk)
+        reservation.end_date = date(2030, 5, 7)
+
+        self.assertFalse(reservation.overlaps_existing())
+
+        other = Reservation(user=self.user, car=self.car, start_date=date(2030, 5, 5), end_date=date(2030, 5, 6))
+        self.assertTrue(other.overlaps_existing())
+
+    def test_04_save_refuses_taken_days(self):
+        """save() claims days under lock and rejects a double-booking even without clean()"""
+        Reservation.objects.create(
+            user=self.user, car=self.car,
+            start_date=date(2030, 6, 1), end_date=date(2030, 6, 3)
+        )
+
+        with self.assertRaises(ValidationError):
+            Reservation.objects.create(
+                user=self.user, car=self.car,
+                start_date=date(2030, 6, 3), end_date=date(2030, 6, 5)
+            )
+        self.assertEqual(Reservation.objects.filter(car=self.car).count(), 1)
+        self.assertEqual(
+            occupancy.busy_ranges(self.car.id, date(2030, 1, 1), date(2030, 12, 31)),
+            [(date(2030, 6, 1), date(2030, 6, 3))]
+        )
+
+    def test_05_rebuild_command_repairs_bitmaps(self):
+        """rebuild_occupancy restores bitmaps that drifted from reservations"""
+        Reservation.objects.create(
+            user=self.user, car=self.car,
+            start_date=date(2030, 7, 1), end_date=date(2030, 7, 3)
+        )
+        CarOccupancy.objects.update(days=occupancy.to_bytes(0))
+        self.assertEqual(occupancy.verify(), [(self.car.id, 2030)])
+
+        out = StringIO()
+        call_command('rebuild_occupancy', stdout=out)
+
+        self.assertIn('match', out.getvalue())
+        self.assertEqual(occupancy.verify(), [])
+
+    def test_06_rows_created_before_locking(self):
+        """ensure_rows adds empty rows for the missing years of a span only"""
+        CarOccupancy.objects.create(car=self.car, year=2031, days=occupancy.to_bytes(1))
+
+        occupancy.ensure_rows((self.car.id, date(2030, 12, 30), date(2032, 1, 2)))
+        occupancy.ensure_rows((self.car.id, date(2030, 12, 30), date(2032, 1, 2)))
+
+        rows = dict(CarOccupancy.objects.filter(car=self.car).values_list('year', 'days'))
+        self.assertEqual(sorted(rows), [2030, 2031, 2032])
+        self.assertEqual(occupancy.from_bytes(rows[2031]), 1)
+        self.assertEqual(occupancy.from_bytes(rows[2030]), 0)
@@ -0,0 +1,205 @@
+"""
+Pagination tests
+Tests: cursor mode traversal, tie-breaking, NULL handling, no COUNT query,
+cached and estimated counts
+"""
+
+from unittest import mock
+from rest_framework.test import APITestCase
+from rest_framework import status
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from renting.models import AppUser, Car, CarModel, Brand
+from renting.tests import CacheTestCase
+from decimal import Decimal
+from datetime import date
+
+
+class KeysetPaginationTestCase(APITestCase):
+    """Test ?pagination=cursor on /api/cars/"""
+
+    def setUp(self):
+        """Create cars with duplicate and NULL mileage values"""
+        brand = Brand.objects.create(name='Toyota')
+        cheap = CarModel.objects.create(brand=brand, model_name='Aygo', daily_price=Decimal('20.00'))
+        pricey = CarModel.objects.create(brand=brand, model_name='Supra', daily_price=Decimal('90.00'))
+        mileages = [None, 500, 500, 500, None, 1200, 80, 500, 3000, None, 80]
+        for i, mileage in enumerate(mileages):
+            Car.objects.create(
+                car_model=cheap if i % 2 else pricey,
+                license_plate=f'KEY-{i:03d}',
+                mileage=mileage
+            )
+        self.cars_url = reverse('car-list')
+
+    def walk(self, url, link='next'):
+        """Follow links until exhausted and return the ids seen"""
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn('count', response.data)
+            ids.extend(car['id'] for car in response.data['results'])
+            url = response.data[link]
+        return ids
+
+    def test_01_forward_walk_matches_full_ordering(self):
+        """Walking cursor pages visits every car once in (mileage, id) order"""
+        expected = list(
+            Car.objects.order_by('mileage', 'id').values_list('id', flat=True)
+        )  # NULLs first on SQLite and MySQL
+
+        ids = self.walk(f'{self.cars_url}?pagination=cursor&ordering=mileage&page_size=3')
+
+        self.assertEqual(ids, expected)
+
+    def test_02_descending_walk_on_related_field(self):
+        """Descending order on a joined field breaks ties on id"""
+        expected = list(
+            Car.objects.order_by('-car_model__daily_price', '-id').values_list('id', flat=True)
+        )
+
+        ids = self.walk(f'{self.cars_url}?pagination=cursor&ordering=-car_model__daily_price&page_size=4')
+
+        self.assertEqual(ids, expected)
+
+    def test_03_previous_links_walk_back(self):
+        """Previous links return the same pages in reverse"""
+        url = f'{self.cars_url}?pagination=cursor&ordering=mileage&page_size=3'
+        pages = []
+        while url:
+            response = self.client.get(url)
+            pages.append([car['id'] for car in response.data['results']])
+            last = response
+            url = response.data['next']
+
+        back = []
+        url = last.data['previous']
+        while url:
+            response = self.client.get(url)
+            back.append([car['id'] for car in response.data['results']])
+            url = response.data['previous']
+
+        self.assertEqual(back, pages[-2::-1])
+
+    def test_04_no_count_query(self):
+        """Cursor pages do not run COUNT(*)"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f'{self.cars_url}?pagination=cursor')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(any('COUNT(' in query['sql'].upper() for query in queries.captured_queries))
+
+    def test_05_invalid_cursor_rejected(self):
+        """Garbage cursors return 404"""
+        response = self.client.get(f'{self.cars_url}?cursor=not-a-cursor')
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_06_page_numbers_still_default(self):
+        """Without opting in, responses keep page-number format"""
+        response = self.client.get(self.cars_url)
+
+        self.assertEqual(response.data['count'], 11)
+
+
+def count_queries(queries):
+    return sum('COUNT(' in query['sql'].upper() for query in queries.captured_queries)
+
+
+class CachedCountTestCase(CacheTestCase):
+    """Test that list counts are cached per filter set and dropped on catalog writes"""
+
+    def setUp(self):
+        super().setUp()
+        brand = Brand.objects.create(name='Seat')
+        self.car_model = CarModel.objects.create(brand=brand, model_name='Ibiza', daily_price=Decimal('25.00'))
+        for i in range(3):
+            Car.objects.create(car_model=self.car_model, license_plate=f'CNT-{i:03d}')
+        self.cars_url = reverse('car-list')
+
+    def test_01_count_served_from_cache(self):
+        """A repeated filter set skips COUNT(*), even on another page or ordering"""
+        self.client.get(f'{self.cars_url}?search=ibiza')
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f'{self.cars_url}?search=ibiza&ordering=mileage&page_size=2')
+
+        self.assertEqual(response.data['count'], 3)
+        self.assertEqual(count_queries(queries), 0)
+
+    def test_02_car_write_invalidates_count(self):
+        """Creating a car changes the key, so the new count is exact"""
+        self.client.get(self.cars_url)
+        Car.objects.create(car_model=self.car_model, license_plate='CNT-NEW')
+
+        response = self.client.get(self.cars_url)
+
+        self.assertEqual(response.data['count'], 4)
+
+    def test_03_different_filters_have_own_counts(self):
+        """Filter params are part of the key"""
+        self.client.get(self.cars_url)
+
+        response = self.client.get(f'{self.cars_url}?search=nomatch')
+
+        self.assertEqual(response.data['count'], 0)
+
+
+class EstimatedCountTestCase(APITestCase):
+    """Test ?count=estimated on staff listings"""
+
+    def setUp(self):
+        """Create staff and regular users"""
+        self.staff = AppUser.objects.create_user(
+            email='staff@example.com', first_name='Staff', last_name='User',
+            password='Pass123!', birth_date=date(1985, 1, 1), is_staff=True
+        )
+        self.user = AppUser.objects.create_user(
+            email='user@example.com', first_name='Regular', last_name='User',
+            password='Pass123!', birth_date=date(1990, 1, 1)
+        )
+        self.users_url = reverse('appuser-list')
+
+    def test_01_staff_gets_table_estimate(self):
+        """Unfiltered staff lists use the table statistics"""
+        self.client.force_authenticate(self.staff)
+        with mock.patch('renting.pagination.estimated_row_count', return_value=1000) as estimate:
+            response = self.client.get(f'{self.users_url}?count=estimated')
+
+        estimate.assert_called_once_with('app_user')
+        self.assertEqual(response.data['count'], 1000)
+        self.assertTrue(response.data['count_is_estimate'])
+
+    def test_02_filtered_lists_stay_exact(self):
+        """Filters disable the estimate"""
+        self.client.force_authenticate(self.staff)
+        with mock.patch('renting.pagination.estimated_row_count', return_value=1000) as estimate:
+            response = self.client.get(f"{reverse('reservation-list')}?count=estimated&search=x")
+
+        estimate.assert_not_called()
+        self.assertEqual(response.data['count'], 0)
+        self.assertNotIn('count_is_estimate', response.data)
+
+    def test_03_backend_without_statistics_falls_back(self):
+        """Without statistics (e.g. SQLite) the exact count is returned"""
+        self.client.force_authenticate(self.staff)
+        response = self.client.get(f'{self.users_url}?count=estimated')
+
+        self.assertEqual(response.data['count'], 2)
+        self.assertNotIn('count_is_estimate', response.data)
+
+    def test_04_low_estimate_does_not_cut_pages(self):
+        """Pages and `next` follow the real rows even when the estimate is too low"""
+        for i in range(11):
+            AppUser.objects.create_user(
+                email=f'extra{i}@example.com', first_name='Extra', last_name='User', password='Pass123!'
+            )
+        self.client.force_authenticate(self.staff)
+        with mock.patch('renting.pagination.estimated_row_count', return_value=4):
+            response = self.client.get(f'{self.users_url}?count=estimated')
+
+        self.assertEqual(response.data['count'], 4)
+        self.assertEqual(len(response.data['results']), 10)
+        self.assertIsNotNone(response.data['next'])
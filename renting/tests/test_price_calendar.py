@@ -0,0 +1,100 @@
+"""
+Price calendar tests
+Tests: prefix sum totals, reservations priced from the calendar, admin bulk edit
+"""
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from renting import price_calendar, pricing
+from renting.models import AppUser, Brand, Car, CarModel, CarModelPriceCalendar, PricingRule, Reservation
+from renting.tests import CacheTestCase
+from datetime import date, timedelta
+from decimal import Decimal
+
+
+class PriceCalendarTestCase(CacheTestCase):
+    """Test per-day car model prices"""
+
+    def setUp(self):
+        super().setUp()
+        self.golf = CarModel.objects.create(
+            brand=Brand.objects.create(name='Volkswagen'), model_name='Golf', daily_price=Decimal('40.00')
+        )
+        self.car = Car.objects.create(car_model=self.golf, license_plate='CAL-001')
+        self.user = AppUser.objects.create_user(
+            email='calendar@example.com', first_name='Calendar', last_name='User', password='Pass123!'
+        )
+        self.start = date.today() + timedelta(days=10)
+
+    def test_01_prefix_sums_match_day_by_day(self):
+        """Range totals equal the sum of the day prices, across a year boundary"""
+        prices = [(day * 7) % 50 * 100 for day in range(price_calendar.DAYS)]
+        prices[0] = 0
+        table = price_calendar.CalendarTable([
+            (1, 2026, price_calendar.pack(prices)), (1, 2027, price_calendar.pack(prices[::-1])),
+        ])
+        self.assertEqual(price_calendar.unpack(price_calendar.pack(prices)), prices)
+
+        daily = Decimal('25.00')
+        for start, end in [(date(2026, 1, 1), date(2026, 1, 10)), (date(2026, 12, 20), date(2027, 1, 5)),
+                           (date(2027, 12, 30), date(2028, 1, 2))]:
+            by_day = sum(price for _, price in table.day_prices(1, daily, start, end))
+            self.assertEqual(table.total(1, daily, start, end), by_day)
+        # Day 0 of 2026 has no calendar price: the daily price applies
+        self.assertEqual(table.total(1, daily, date(2026, 1, 1), date(2026, 1, 1)), daily)
+        self.assertFalse(table.has_prices(2))
+
+    def test_02_reservations_use_calendar_prices(self):
+        """Bookings sum the calendar, seasons weight its days, and no calendar query once compiled"""
+        price_calendar.set_prices([self.golf], self.start, self.start + timedelta(days=1), price=Decimal('60.00'))
+        price_calendar.set_prices(
+            [self.golf], self.start + timedelta(days=2), self.start + timedelta(days=2), percent=Decimal('-25')
+        )
+        PricingRule.objects.create(
+            name='Peak', kind=PricingRule.SEASON, multiplier=Decimal('2.00'),
+            start_date=self.start + timedelta(days=1), end_date=self.start + timedelta(days=1),
+        )
+        pricing.quote(Decimal('40.00'), None, self.start, self.start, car_model_id=self.golf.id)
+
+        with CaptureQueriesContext(connection) as queries:
+            reservation = Reservation.objects.create(
+                user=self.user, car=self.car, start_date=self.start, end_date=self.start + timedelta(days=3)
+            )
+        # 60 + 60 x 2 + 30 + 40
+        self.assertEqual(reservation.total_price, Decimal('250.00'))
+        self.assertFalse([q for q in queries if 'price_calendar' in q['sql'] or 'pricing_rule' in q['sql']])
+
+        price_calendar.set_prices([self.golf], self.start, self.start + timedelta(days=3))
+        self.assertFalse(CarModelPriceCalendar.objects.filter(prices__isnull=True).exists())
+        self.assertEqual(
+            pricing.quote(Decimal('40.00'), None, self.start, self.start, car_model_id=self.golf.id).total_price,
+            Decimal('40.00'),
+        )
+
+    def test_03_admin_bulk_edit(self):
+        """The car model list actions set and reset prices for the selected models"""
+        admin = AppUser.objects.create_superuser(
+            email='admin@example.com', first_name='Admin', last_name='User', password='Pass123!'
+        )
+        self.client.force_login(admin)
+        url = reverse('admin:renting_carmodel_changelist')
+        data = {
+            'action': 'set_calendar_prices', '_selected_action': [self.golf.id], 'index': 0,
+            'calendar_from': self.start, 'calendar_to': self.start + timedelta(days=4), 'calendar_percent': '50',
+        }
+
+        response = self.client.post(url, data, follow=True)
+        self.assertContains(response, 'Calendar prices set for 1 model(s)')
+        table = price_calendar.calendar_cache.get()
+        self.assertEqual(table.total(self.golf.id, Decimal('40.00'), self.start, self.start), Decimal('60.00'))
+
+        response = self.client.post(url, {**data, 'calendar_to': self.start + timedelta(days=400)}, follow=True)
+        self.assertContains(response, 'Calendar dates must be between')
+
+        response = self.client.post(url, {**data, 'action': 'clear_calendar_prices'}, follow=True)
+        self.assertContains(response, 'Calendar prices reset for 1 model(s)')
+        self.assertFalse(price_calendar.calendar_cache.get().has_prices(self.golf.id))
+
+        response = self.client.get(reverse('admin:renting_carmodel_change', args=[self.golf.id]))
+        self.assertContains(response, 'Next 14 days')
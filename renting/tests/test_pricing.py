@@ -0,0 +1,178 @@
+"""
+Pricing tests
+Tests: age bands, calculate_details delegation, batch quotes on the car list,
+compiled pricing rules and their invalidation
+"""
+
+from rest_framework.test import APITestCase
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from renting import pricing
+from renting.models import AppUser, Brand, Car, CarModel, PricingRule, Reservation, VehicleType
+from renting.tests import CacheTestCase
+from datetime import date, timedelta
+from decimal import Decimal
+
+
+class PricingTestCase(APITestCase):
+    """Test the batch quote engine"""
+
+    def setUp(self):
+        brand = Brand.objects.create(name='Seat')
+        self.ibiza = Car.objects.create(
+            car_model=CarModel.objects.create(brand=brand, model_name='Ibiza', daily_price=Decimal('33.33')),
+            license_plate='PRC-001',
+        )
+        self.leon = Car.objects.create(
+            car_model=CarModel.objects.create(brand=brand, model_name='Leon', daily_price=Decimal('47.50')),
+            license_plate='PRC-002',
+        )
+        today = date.today()
+        self.young = AppUser.objects.create_user(
+            email='young@example.com', first_name='Young', last_name='Driver',
+            password='Pass123!', birth_date=today.replace(year=today.year - 20)
+        )
+        self.start = today + timedelta(days=5)
+        self.end = self.start + timedelta(days=2)
+
+    def test_01_age_bands(self):
+        """Coverage and rate follow the age on the day of the quote"""
+        today = date(2026, 6, 15)
+        cases = [
+            (None, ('Standard', Decimal('1.00'))),
+            (date(2001, 6, 16), ('Young Driver', Decimal('1.50'))),
+            (date(2001, 6, 15), ('Standard', Decimal('1.00'))),
+            (date(1960, 6, 16), ('Standard', Decimal('1.00'))),
+            (date(1960, 6, 15), ('Senior/Premium', Decimal('1.20'))),
+        ]
+        for birth_date, expected in cases:
+            self.assertEqual(pricing.coverage_for(birth_date, today), expected, birth_date)
+
+        quotes = pricing.quote_cars({1: Decimal('10.00'), 2: Decimal('20.00')}, None, today, today)
+        self.assertEqual([quote.total_price for quote in quotes.values()], [Decimal('10.00'), Decimal('20.00')])
+
+    def test_02_reservation_uses_quote(self):
+        """Saved reservations store exactly what the quote engine computes"""
+        reservation = Reservation.objects.create(
+            user=self.young, car=self.ibiza, start_date=self.start, end_date=self.end
+        )
+        expected = pricing.quote(Decimal('33.33'), self.young.birth_date, self.start, self.end)
+        self.assertEqual(
+            (reservation.coverage, reservation.rate, reservation.total_price),
+            (expected.coverage, expected.rate, expected.total_price),
+        )
+        # 3 x 33.33 x 1.50 = 149.985, rounded half up like the column
+        self.assertEqual(reservation.total_price, Decimal('149.99'))
+
+    def test_03_car_list_quotes_without_extra_queries(self):
+        """?quote=1 adds a quote per car for the window, for the current user, at no query cost"""
+        url = reverse('car-list')
+        params = {'available_from': self.start, 'available_to': self.end, 'ordering': 'license_plate'}
+        self.client.force_authenticate(self.young)
+
+        with CaptureQueriesContext(connection) as plain:
+            self.assertNotIn('quote', self.client.get(url, params).data['results'][0])
+        with CaptureQueriesContext(connection) as quoted:
+            response = self.client.get(url, {**params, 'quote': 1})
+
+        self.assertEqual(len(quoted), len(plain))
+        self.assertEqual(
+            [car['quote'] for car in response.data['results']],
+            [
+                {'coverage': 'Young Driver', 'rate': '1.50', 'days': 3, 'total_price': '149.99'},
+                {'coverage': 'Young Driver', 'rate': '1.50', 'days': 3, 'total_price': '213.75'},
+            ],
+        )
+
+    def test_04_anonymous_and_missing_window(self):
+        """Anonymous users get standard coverage; without dates no quote is added"""
+        url = reverse('car-list')
+        response = self.client.get(url, {
+            'available_from': self.start, 'available_to': self.end, 'quote': 1, 'ordering': 'license_plate',
+        })
+        self.assertEqual(response.data['results'][1]['quote']['total_price'], '142.50')
+        self.assertEqual(response.data['results'][1]['quote']['coverage'], 'Standard')
+
+        response = self.client.get(url, {'quote': 1})
+        self.assertNotIn('quote', response.data['results'][0])
+
+
+class PricingRuleTestCase(CacheTestCase):
+    """Test the compiled rules table and its cache"""
+
+    def setUp(self):
+        super().setUp()
+        self.suv = VehicleType.objects.create(name='SUV')
+        self.car = Car.objects.create(
+            car_model=CarModel.objects.create(
+                brand=Brand.objects.create(name='Kia'), model_name='Sportage',
+                daily_price=Decimal('50.00'), vehicle_type=self.suv,
+            ),
+            license_plate='PRC-101',
+        )
+        self.user = AppUser.objects.create_user(
+            email='rules@example.com', first_name='Rules', last_name='User', password='Pass123!'
+        )
+
+    def test_05_rules_compile_into_decision_table(self):
+        """Seasons (overlaps multiply), longest duration tier, vehicle type and age rules"""
+        table = pricing.PricingTable([
+            PricingRule(kind=PricingRule.SEASON, multiplier=Decimal('1.20'),
+                        start_date=date(2027, 7, 1), end_date=date(2027, 7, 31)),
+            PricingRule(kind=PricingRule.SEASON, multiplier=Decimal('1.50'),
+                        start_date=date(2027, 7, 10), end_date=date(2027, 7, 20)),
+            PricingRule(kind=PricingRule.DURATION, multiplier=Decimal('0.90'), min_days=7),
+            PricingRule(kind=PricingRule.DURATION, multiplier=Decimal('0.80'), min_days=14),
+            PricingRule(kind=PricingRule.VEHICLE_TYPE, multiplier=Decimal('1.10'), vehicle_type_id=self.suv.id),
+            PricingRule(kind=PricingRule.SEASON, multiplier=Decimal('3.00'), is_active=False,
+                        start_date=date(2027, 1, 1), end_date=date(2027, 12, 31)),
+        ])
+        # 2 days x 1.20 + 5 days x 1.20 x 1.50 = 11.40 billed days, 7 days: x0.90, SUV: x1.10
+        quote = pricing.quote(Decimal('50.00'), None, date(2027, 7, 8), date(2027, 7, 14), self.suv.id, table=table)
+        self.assertEqual(quote, ('Standard', Decimal('1.00'), 7, Decimal('564.30')))
+        self.assertEqual(table.factor(date(2027, 8, 1), date(2027, 8, 1)), Decimal('1'))
+
+        table = pricing.PricingTable([
+            PricingRule(kind=PricingRule.AGE, multiplier=Decimal('1.40'), coverage='Under 30', max_age=29),
+            PricingRule(kind=PricingRule.AGE, multiplier=Decimal('1.00'), coverage='Standard', min_age=30),
+        ])
+        self.assertEqual(table.coverage(date(2000, 1, 1), date(2027, 6, 1)), ('Under 30', Decimal('1.40')))
+        self.assertEqual(table.coverage(date(1990, 1, 1), date(2027, 6, 1)), ('Standard', Decimal('1.00')))
+
+    def test_06_table_is_cached_and_invalidated(self):
+        """Quotes and bookings read no rules once compiled; saving a rule recompiles"""
+        start = date.today() + timedelta(days=3)
+        rule = PricingRule.objects.create(
+            name='SUV', kind=PricingRule.VEHICLE_TYPE, multiplier=Decimal('1.10'), vehicle_type=self.suv
+        )
+        self.assertEqual(pricing.quote(Decimal('50.00'), None, start, start, self.suv.id).total_price, Decimal('55.00'))
+
+        with CaptureQueriesContext(connection) as queries:
+            reservation = Reservation.objects.create(user=self.user, car=self.car, start_date=start, end_date=start)
+        self.assertEqual(reservation.total_price, Decimal('55.00'))
+        self.assertFalse([q for q in queries if 'pricing_rule' in q['sql']])
+
+        rule.multiplier = Decimal('1.30')
+        rule.save()
+        self.assertEqual(pricing.quote(Decimal('50.00'), None, start, start, self.suv.id).total_price, Decimal('65.00'))
+
+    def test_07_uncommitted_rules_stay_in_their_transaction(self):
+        """A transaction prices with its own rule writes; a rollback leaves no trace"""
+        start = date.today() + timedelta(days=3)
+        pricing.quote(Decimal('50.00'), None, start, start)
+
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                PricingRule.objects.create(
+                    name='Promo', kind=PricingRule.DURATION, multiplier=Decimal('0.50'), min_days=1
+                )
+                self.assertEqual(pricing.quote(Decimal('50.00'), None, start, start).total_price, Decimal('25.00'))
+                raise RuntimeError
+
+        self.assertEqual(pricing.quote(Decimal('50.00'), None, start, start).total_price, Decimal('50.00'))
+        # The rolled back write is forgotten: later transactions use the compiled table
+        with transaction.atomic(), CaptureQueriesContext(connection) as queries:
+            self.assertEqual(pricing.quote(Decimal('50.00'), None, start, start).total_price, Decimal('50.00'))
+            pricing.quote(Decimal('50.00'), None, start, start)
+        self.assertFalse([q for q in queries if 'pricing_rule' in q['sql']])
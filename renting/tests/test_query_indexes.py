@@ -0,0 +1,173 @@
+"""
+Query plan regression tests
+Tests: EXPLAIN every hot query of ReservationViewSet, CarViewSet and CarFilter
+against a seeded dataset and fail on full table scans
+"""
+
+import re
+from rest_framework.test import APITestCase
+from django.db import connection
+from django.urls import reverse
+from renting import car_search
+from renting.models import AppUser, Brand, Car, CarModel, FuelType, Reservation, Transmission, VehicleType
+from datetime import date, timedelta
+from decimal import Decimal
+
+
+# Tables that grow with the business; lookup tables are read whole by design
+HOT_TABLES = {'reservation', 'car', 'car_search', 'car_model_search_term'}
+
+CARS = 3000
+MODELS = 60
+USERS = 200
+RESERVATIONS_PER_CAR = 8
+
+
+def full_scans(sql, params):
+    """Hot tables the backend would read with a full table scan for this query"""
+    # Subqueries alias their tables (U0, U1, ...)
+    aliases = dict((alias, table) for table, alias in re.findall(r'"(\w+)" (U\d+)', sql))
+    aliases.update(dict((alias, table) for table, alias in re.findall(r'`(\w+)` (U\d+)', sql)))
+
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            # "SCAN t" is a full scan; "SCAN t USING [COVERING] INDEX i" walks an index
+            scanned = [
+                match.group(1) for match in (re.match(r'SCAN (\w+)$', row[3]) for row in cursor.fetchall())
+                if match
+            ]
+        elif connection.vendor == 'mysql':
+            cursor.execute(f'EXPLAIN {sql}', params)
+            columns = [column[0] for column in cursor.description]
+            scanned = [
+                row[columns.index('table')] for row in cursor.fetchall()
+                if row[columns.index('type')] == 'ALL'
+            ]
+        elif connection.vendor == 'postgresql':
+            cursor.execute(f'EXPLAIN {sql}', params)
+            scanned = [
+                match.group(1) for match in (re.search(r'Seq Scan on (\w+)', row[0]) for row in cursor.fetchall())
+                if match
+            ]
+        else:
+            return []
+    return sorted({aliases.get(name, name) for name in scanned} & HOT_TABLES)
+
+
+class QueryIndexTestCase(APITestCase):
+    """EXPLAIN the queries behind the reservation and car endpoints"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.diesel = FuelType.objects.create(name='Diesel')
+        cls.manual = Transmission.objects.create(name='Manual')
+        cls.suv = VehicleType.objects.create(name='SUV')
+        cls.brand = Brand.objects.create(name='Peugeot')
+        models = [
+            CarModel.objects.create(
+                brand=cls.brand if i % 2 else Brand.objects.create(name=f'Brand {i}'),
+                model_name=f'Model {i}', daily_price=Decimal(30 + i * 7), seats=2 + i % 6,
+                fuel_type=cls.diesel if i % 3 else None, transmission=cls.manual if i % 2 else None,
+                vehicle_type=cls.suv if i % 4 else None,
+            )
+            for i in range(MODELS)
+        ]
+        Car.objects.bulk_create(
+            Car(car_model=models[i % len(models)], license_plate=f'EXP-{i:05d}', mileage=i * 37 % 90000)
+            for i in range(CARS)
+        )
+        car_search.rebuild()
+
+        cls.staff = AppUser.objects.create_user(
+            email='explain-staff@example.com', first_name='Staff', last_name='Plan',
+            password='Pass123!', is_staff=True
+        )
+        AppUser.objects.bulk_create(
+            AppUser(email=f'explain{i}@example.com', first_name='User', last_name=str(i), password='!')
+            for i in range(USERS)
+        )
+        cls.user = AppUser.objects.get(email='explain0@example.com')
+        user_ids = list(AppUser.objects.values_list('id', flat=True))
+        car_ids = list(Car.objects.values_list('id', flat=True))
+
+        # Non-overlapping 3-day bookings per car, spread over two years
+        first = date.today() - timedelta(days=365)
+        Reservation.objects.bulk_create(
+            Reservation(
+                car_id=car_id, user_id=user_ids[(n * 7 + k) % len(user_ids)],
+                start_date=first + timedelta(days=(n % 9) * 80 + k * 10),
+                end_date=first + timedelta(days=(n % 9) * 80 + k * 10 + 2),
+                total_price=Decimal('100.00'),
+            )
+            for n, car_id in enumerate(car_ids)
+            for k in range(RESERVATIONS_PER_CAR)
+        )
+        cls.reservation = Reservation.objects.filter(user=cls.user).first()
+
+        if connection.vendor in ('sqlite', 'postgresql'):
+            # Give the planner real statistics, as in production
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+
+    def explain_requests(self, user, urls):
+        """Run the requests, EXPLAIN every SELECT they issued, return the offending ones"""
+        captured = []
+
+        def capture(execute, sql, params, many, context):
+            captured.append((sql, params))
+            return execute(sql, params, many, context)
+
+        self.client.force_authenticate(user)
+        with connection.execute_wrapper(capture):
+            for url in urls:
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200, url)
+
+        offending = []
+        for sql, params in captured:
+            if sql.lstrip().upper().startswith('SELECT'):
+                tables = full_scans(sql, params)
+                if tables:
+                    offending.append(f'{", ".join(tables)}: {sql % tuple(repr(p) for p in params or ())}')
+        return offending
+
+    def test_01_reservation_queries_use_indexes(self):
+        """Staff lists, filters, cursor pages and my_reservations avoid full scans"""
+        list_url = reverse('reservation-list')
+        today = date.today()
+        offending = self.explain_requests(self.staff, [
+            list_url,
+            f'{list_url}?start_date={today}',
+            f'{list_url}?end_date={today}',
+            f'{list_url}?user={self.user.id}',
+            f'{list_url}?pagination=cursor',
+            reverse('reservation-detail', args=[self.reservation.id]),
+        ])
+        my_url = reverse('reservation-my-reservations')
+        offending += self.explain_requests(self.user, [
+            my_url, f'{my_url}?status=upcoming', f'{my_url}?status=past', f'{my_url}?pagination=cursor',
+        ])
+        self.assertEqual(offending, [])
+
+    def test_02_car_queries_use_indexes(self):
+        """Car list filters, sorts, search, availability and facets avoid full scans"""
+        url = reverse('car-list')
+        start = date.today() + timedelta(days=20)
+        window = f'available_from={start}&available_to={start + timedelta(days=3)}'
+        offending = self.explain_requests(self.staff, [
+            f'{url}?fuel=Diesel',
+            f'{url}?transmission=Manual',
+            f'{url}?car_model__brand={self.brand.id}',
+            f'{url}?car_model__vehicle_type={self.suv.id}',
+            f'{url}?seats=6',
+            f'{url}?min_price=100&max_price=120',
+            f'{url}?ordering=car_model__daily_price',
+            f'{url}?ordering=-mileage',
+            f'{url}?pagination=cursor&ordering=car_model__daily_price',
+            f'{url}?search=13',
+            f'{url}?{window}',
+            f"{reverse('car-facets')}?fuel=Diesel",
+            reverse('car-detail', args=[Car.objects.values_list('id', flat=True).first()]),
+        ])
+        self.assertEqual(offending, [])
@@ -0,0 +1,96 @@
+"""
+Query planner tests
+Tests: plans derived from serializer sources, no missing relations per viewset, constant list queries
+"""
+
+import warnings
+from rest_framework.test import APITestCase, APIRequestFactory
+from rest_framework.request import Request
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from renting.mixins import RelationNotLoadedWarning, missing_relations, plan_serializer
+from renting.models import AppUser, Car, CarModel, Brand, Transmission, FuelType, VehicleType, Color, Reservation
+from renting.serializers import CarSerializer
+from renting.urls import router
+from datetime import date, timedelta
+from decimal import Decimal
+
+
+class QueryPlanTestCase(APITestCase):
+    """Test QueryPlanMixin on the API viewsets"""
+
+    def setUp(self):
+        """Create a fully populated car model"""
+        self.car_model = CarModel.objects.create(
+            brand=Brand.objects.create(name='Renault'),
+            model_name='Clio',
+            daily_price=Decimal('35.00'),
+            transmission=Transmission.objects.create(name='Manual'),
+            fuel_type=FuelType.objects.create(name='Diesel'),
+            vehicle_type=VehicleType.objects.create(name='Compact'),
+        )
+        self.color = Color.objects.create(name='Red')
+
+    def create_cars(self, count, offset=0):
+        for i in range(offset, offset + count):
+            Car.objects.create(car_model=self.car_model, color=self.color, license_plate=f'PLN-{i:03d}')
+
+    def test_01_plan_follows_dotted_sources(self):
+        """CarSerializer joins its model; lookup names only need the id columns"""
+        plan = plan_serializer(CarSerializer, Car)
+
+        self.assertEqual(plan.select_related, ['car_model'])
+        for path in ('car_model__transmission', 'car_model__fuel_type', 'car_model__vehicle_type', 'color'):
+            self.assertIn(path, plan.only)
+        self.assertIn('car_model__daily_price', plan.only)
+        self.assertEqual(plan.unresolved, [])
+
+    def test_02_viewsets_load_every_relation(self):
+        """No registered viewset serializes a relation its list queryset did not load"""
+        factory = APIRequestFactory()
+        staff = AppUser(email='planner@example.com', is_staff=True)
+        for prefix, viewset, basename in router.registry:
+            with self.subTest(viewset=viewset.__name__):
+                view = viewset(action='list', format_kwarg=None, kwargs={})
+                view.request = Request(factory.get(f'/api/{prefix}/'))
+                view.request.user = staff
+                with warnings.catch_warnings():
+                    warnings.simplefilter('error', RelationNotLoadedWarning)
+                    # Read model views serialize objects loaded from the regular queryset
+                    queryset = getattr(view, 'get_object_queryset', view.get_queryset)()
+                    plan = view.get_query_plan(queryset.model)
+
+                self.assertEqual(missing_relations(queryset, plan), [])
+
+    def test_03_car_list_queries_do_not_grow_with_rows(self):
+        """Listing 2 or 8 cars costs the same number of queries"""
+        self.create_cars(2)
+        with CaptureQueriesContext(connection) as small:
+            self.client.get(reverse('car-list'))
+
+        self.create_cars(6, offset=2)
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.get(reverse('car-list'))
+
+        self.assertEqual(response.data['count'], 8)
+        self.assertEqual(response.data['results'][0]['transmission_name'], 'Manual')
+        self.assertEqual(len(large), len(small))
+
+    def test_04_reservation_list_includes_model_image(self):
+        """ReservationSerializer reads the model image through a planned join"""
+        user = AppUser.objects.create_user(
+            email='planner@example.com', first_name='Plan', last_name='Ner',
+            password='Pass123!', birth_date=date(1990, 1, 1)
+        )
+        self.create_cars(1)
+        start = date.today() + timedelta(days=5)
+        Reservation.objects.create(user=user, car=Car.objects.get(), start_date=start, end_date=start + timedelta(days=2))
+        self.client.force_authenticate(user)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('reservation-list'))
+
+        self.assertIn('car_model_image', response.data['results'][0])
+        self.assertEqual(response.data['results'][0]['brand_name'], 'Renault')
+        self.assertLessEqual(len(queries), 2)
@@ -5,12 +5,20 @@ Tests: CRUD operations, filtering, password-protected deletion
 
 from rest_framework.test import APITestCase
 from rest_framework import status
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from renting.models import AppUser, Car, CarModel, Brand, Color, VehicleType, FuelType, Transmission, Reservation
 from datetime import date, timedelta
 from decimal import Decimal
 
 
+# Ceiling on SQL queries for one POST /api/reservations/: auth user, car with
+# model, savepoint pair, locked occupancy claim (the only overlap check,
+# up to 4 queries when the year row is new) and the insert
+RESERVATION_CREATE_QUERY_BUDGET = 9
+
+
 class ReservationManagementTestCase(APITestCase):
     """Test reservation endpoints"""
     
@@ -303,3 +311,42 @@ class ReservationManagementTestCase(APITestCase):
         response = self.client.delete(delete_url, {'password': 'Pass123!'}, format='json')
         
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_12_create_reservation_query_budget(self):
+        """Creating a reservation stays within the SQL query budget"""
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token_user1}')
+        
+        reservation_data = {
+            'car': self.car.id,
+            'start_date': str(date.today()),
+            'end_date': str(date.today() + timedelta(days=3))
+        }
+        
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.reservations_url, reservation_data, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertLessEqual(
+            len(queries), RESERVATION_CREATE_QUERY_BUDGET,
+            '\n'.join(query['sql'] for query in queries.captured_queries)
+        )
+ 
+    def test_13_create_overlapping_reservation_fails(self):
+        """Overlapping reservation for the same car is rejected"""
+        Reservation.objects.create(
+            user=self.user2,
+            car=self.car,
+            start_date=date.today() + timedelta(days=2),
+            end_date=date.today() + timedelta(days=4)
+        )
+        
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token_user1}')
+        reservation_data = {
+            'car': self.car.id,
+            'start_date': str(date.today()),
+            'end_date': str(date.today() + timedelta(days=2))
+        }
+        
+        response = self.client.post(self.reservations_url, reservation_data, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,61 @@
+"""
+Values-row list rendering tests
+Tests: byte-identical JSON to the serializers, NULL relations, images, pagination modes
+"""
+
+from rest_framework.test import APITestCase, APIRequestFactory
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from django.urls import reverse
+from renting.models import Car, CarModel, Brand, Transmission, FuelType, VehicleType, Color
+from renting.rows import compile_renderer
+from renting.serializers import CarSerializer, CarModelSerializer
+from decimal import Decimal
+
+
+class RowRendererTestCase(APITestCase):
+    """Compare RowRenderer output with the serializers it replaces"""
+
+    def setUp(self):
+        """One fully populated model with an image, one with NULL lookups"""
+        brand = Brand.objects.create(name='Peugeot')
+        full = CarModel.objects.create(
+            brand=brand, model_name='208', daily_price=Decimal('42.50'), seats=5,
+            transmission=Transmission.objects.create(name='Automatic'),
+            fuel_type=FuelType.objects.create(name='Hybrid'),
+            vehicle_type=VehicleType.objects.create(name='Hatchback'),
+            image='car_models/208.jpg',
+        )
+        bare = CarModel.objects.create(brand=brand, model_name='Partner', daily_price=Decimal('30.00'))
+        red = Color.objects.create(name='Red')
+        Car.objects.create(car_model=full, license_plate='ROW-001', color=red, mileage=1500)
+        Car.objects.create(car_model=bare, license_plate='ROW-002')
+        self.request = Request(APIRequestFactory().get('/api/cars/'))
+
+    def assertSameJson(self, serializer_class, queryset):
+        expected = serializer_class(queryset, many=True, context={'request': self.request}).data
+        renderer = compile_renderer(serializer_class, queryset.model)
+        rows = renderer.render(queryset.values(*renderer.lookups), self.request)
+
+        self.assertEqual(JSONRenderer().render(rows), JSONRenderer().render(expected))
+
+    def test_01_car_rows_match_serializer(self):
+        """Cars with and without color, lookups and image render identically"""
+        self.assertSameJson(CarSerializer, Car.objects.all())
+
+    def test_02_car_model_rows_match_serializer(self):
+        """Car models (DecimalField strings, nullable FKs) render identically"""
+        self.assertSameJson(CarModelSerializer, CarModel.objects.all())
+
+    def test_03_list_endpoint_uses_row_path(self):
+        """GET /api/cars/ returns serializer-identical results in both pagination modes"""
+        expected = CarSerializer(Car.objects.all(), many=True, context={'request': self.request}).data
+
+        page = self.client.get(reverse('car-list'))
+        cursor = self.client.get(f"{reverse('car-list')}?pagination=cursor")
+
+        self.assertEqual(page.data['count'], 2)
+        self.assertEqual(page.data['results'], [dict(item) for item in expected])
+        self.assertEqual(cursor.data['results'], page.data['results'])
+        self.assertTrue(page.data['results'][0]['car_model_image'].endswith('/media/car_models/208.jpg'))
+        self.assertNotIn('color_name', page.data['results'][1])
@@ -0,0 +1,77 @@
+"""
+Car search index tests
+Tests: term generation, substring and multi-word matching, relevance (also in cursor mode),
+index maintenance
+"""
+
+from rest_framework.test import APITestCase
+from django.urls import reverse
+from renting import search
+from renting.models import Car, CarModel, Brand, FuelType, Color, CarModelSearchTerm
+from decimal import Decimal
+
+
+class CarSearchTestCase(APITestCase):
+    """Test ?search= on /api/cars/ through the search term table"""
+
+    def setUp(self):
+        """Create two brands and a model whose fuel name mentions the other brand"""
+        self.toyota = Brand.objects.create(name='Toyota')
+        self.hybrid = FuelType.objects.create(name='Hybrid')
+        corolla = CarModel.objects.create(brand=self.toyota, model_name='Corolla', daily_price=Decimal('40.00'))
+        yaris = CarModel.objects.create(
+            brand=self.toyota, model_name='Yaris', daily_price=Decimal('30.00'), fuel_type=self.hybrid
+        )
+        civic = CarModel.objects.create(
+            brand=Brand.objects.create(name='Honda'), model_name='Civic Hybrid', daily_price=Decimal('45.00')
+        )
+        self.red = Color.objects.create(name='Rojo Cereza')
+        Car.objects.create(car_model=corolla, license_plate='SRH-001', color=self.red)
+        Car.objects.create(car_model=yaris, license_plate='SRH-002')
+        Car.objects.create(car_model=civic, license_plate='SRH-003')
+        self.url = reverse('car-list')
+
+    def plates(self, query):
+        response = self.client.get(self.url, {'search': query})
+        return [car['license_plate'] for car in response.data['results']]
+
+    def test_01_terms_are_weighted_suffixes(self):
+        """Every suffix is indexed; word starts weigh double"""
+        terms = search.model_terms({'model_name': 'Yaris', 'brand__name': 'Toyota', 'fuel_type__name': 'Híbrido'})
+
+        self.assertEqual(terms['yaris'], 8)
+        self.assertEqual(terms['aris'], 4)
+        self.assertEqual(terms['hibrido'], 2)
+
+    def test_02_substring_and_multi_word_search(self):
+        """Words match anywhere; every word must match"""
+        self.assertEqual(self.plates('yot'), ['SRH-001', 'SRH-002'])
+        self.assertEqual(self.plates('toyota coro'), ['SRH-001'])
+        self.assertEqual(self.plates('cereza'), ['SRH-001'])
+        self.assertEqual(self.plates('toyota civic'), [])
+
+    def test_03_relevance_orders_results(self):
+        """A model-name match ranks above a fuel-type match"""
+        self.assertEqual(self.plates('hybrid'), ['SRH-003', 'SRH-002'])
+
+    def test_04_index_follows_renames_and_deletes(self):
+        """Renaming a brand or deleting a fuel type reindexes affected models"""
+        self.toyota.name = 'Daihatsu'
+        self.toyota.save()
+        self.hybrid.delete()
+
+        self.assertEqual(self.plates('daihatsu'), ['SRH-001', 'SRH-002'])
+        self.assertEqual(self.plates('toyota'), [])
+        self.assertEqual(self.plates('hybrid'), ['SRH-003'])
+        self.assertFalse(CarModelSearchTerm.objects.filter(term='toyota').exists())
+
+    def test_05_cursor_mode_keeps_relevance_order(self):
+        """Searches requested in cursor mode are paged in relevance order to the end"""
+        plates = []
+        url = f'{self.url}?search=hybrid&pagination=cursor&page_size=1'
+        while url:
+            response = self.client.get(url)
+            plates += [car['license_plate'] for car in response.data['results']]
+            url = response.data['next']
+
+        self.assertEqual(plates, ['SRH-003', 'SRH-002'])
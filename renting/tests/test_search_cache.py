@@ -0,0 +1,152 @@
+"""
+Car search response cache tests
+Tests: canonical keys, catalog invalidation, date-window precise invalidation,
+single-flight coalescing, early refresh
+"""
+
+import threading
+import time
+from unittest import mock
+from django.db import connection
+from django.test import SimpleTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from renting.models import AppUser, Brand, Car, CarModel, Reservation
+from renting import search_cache
+from renting.singleflight import SingleFlight
+from renting.tests import CacheTestCase
+from datetime import date, timedelta
+from decimal import Decimal
+
+
+class SearchCacheTestCase(CacheTestCase):
+    """Test that car searches are served from the response cache and invalidated precisely"""
+
+    def setUp(self):
+        super().setUp()
+        self.user = AppUser.objects.create_user(
+            email='search@example.com', first_name='Search', last_name='Cache',
+            password='Pass123!', birth_date=date(1990, 1, 1)
+        )
+        self.car_model = CarModel.objects.create(
+            brand=Brand.objects.create(name='Fiat'), model_name='Panda', daily_price=Decimal('28.00')
+        )
+        self.car = Car.objects.create(car_model=self.car_model, license_plate='SRC-001')
+        Car.objects.create(car_model=self.car_model, license_plate='SRC-002')
+        self.url = reverse('car-list')
+        self.start = date.today() + timedelta(days=10)
+        self.window = f'available_from={self.start}&available_to={self.start + timedelta(days=2)}'
+
+    def book(self, offset, days=1):
+        start = self.start + timedelta(days=offset)
+        Reservation.objects.create(user=self.user, car=self.car, start_date=start, end_date=start + timedelta(days=days))
+
+    def get_counted(self, query):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f'{self.url}?{query}')
+        return response, len(queries)
+
+    def test_01_identical_search_served_from_cache(self):
+        """Reordered params and empty values hit the same entry without queries"""
+        self.client.get(f'{self.url}?search=panda&{self.window}')
+
+        response, queries = self.get_counted(f'{self.window}&fuel=&search=panda')
+
+        self.assertEqual(queries, 0)
+        self.assertEqual(response.data['count'], 2)
+
+    def test_02_catalog_write_invalidates(self):
+        """A new car is visible on the next identical search"""
+        self.client.get(f'{self.url}?search=panda')
+        Car.objects.create(car_model=self.car_model, license_plate='SRC-003')
+
+        response, queries = self.get_counted('search=panda')
+
+        self.assertGreater(queries, 0)
+        self.assertEqual(response.data['count'], 3)
+
+    def test_03_reservation_outside_window_keeps_entry(self):
+        """Bookings on other days leave the cached window untouched"""
+        self.client.get(f'{self.url}?{self.window}')
+        self.book(offset=20)
+
+        response, queries = self.get_counted(self.window)
+
+        self.assertEqual(queries, 0)
+        self.assertEqual(response.data['count'], 2)
+
+    def test_04_overlapping_reservation_invalidates_window(self):
+        """A booking sharing a day with the window refreshes it"""
+        self.client.get(f'{self.url}?{self.window}')
+        self.book(offset=2, days=3)
+
+        response, _ = self.get_counted(self.window)
+
+        self.assertEqual(response.data['count'], 1)
+
+    def test_05_authenticated_requests_bypass(self):
+        """Logged-in users always get fresh results"""
+        self.client.force_authenticate(self.user)
+        self.client.get(self.url)
+
+        _, queries = self.get_counted('')
+
+        self.assertGreater(queries, 0)
+
+
+class SingleFlightTestCase(SimpleTestCase):
+    """Test request coalescing and early refresh"""
+
+    def run_concurrently(self, flight, fn, threads=8):
+        barrier = threading.Barrier(threads)
+        results, errors = [], []
+
+        def worker():
+            barrier.wait()
+            try:
+                results.append(flight.do('key', fn))
+            except ValueError as e:
+                errors.append(e)
+
+        workers = [threading.Thread(target=worker) for _ in range(threads)]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        return results, errors
+
+    def test_01_concurrent_calls_compute_once(self):
+        """Callers arriving during a computation share its result"""
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return {'count': 3}
+
+        results, _ = self.run_concurrently(SingleFlight(), compute)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{'count': 3}] * 8)
+
+    def test_02_errors_reach_every_waiter(self):
+        """A failing leader fails its followers too, then the key is free again"""
+        flight = SingleFlight()
+
+        def fail():
+            time.sleep(0.2)
+            raise ValueError('boom')
+
+        _, errors = self.run_concurrently(flight, fail)
+
+        self.assertEqual(len(errors), 8)
+        self.assertEqual(flight.do('key', lambda: 'ok'), 'ok')
+
+    def test_03_early_refresh_near_expiry_only(self):
+        """Fresh entries are served; entries about to expire are refreshed early"""
+        with mock.patch('renting.search_cache.random.random', return_value=0.99):
+            fresh = {'delta': 0.5, 'expires': time.time() + 60}
+            expiring = {'delta': 0.5, 'expires': time.time() + 1}
+
+            self.assertFalse(search_cache._refresh_early(fresh))
+            self.assertTrue(search_cache._refresh_early(expiring))
@@ -0,0 +1,90 @@
+"""
+Autocomplete tests
+Tests: brand/model suggestions with counts, staff-only plates, incremental
+updates without database reads, cross-worker rebuild
+"""
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from renting.caching import bump_version
+from renting.models import AppUser, Brand, Car, CarModel
+from renting.suggest import VERSION_NAME
+from renting.tests import CacheTestCase
+from datetime import date
+from decimal import Decimal
+
+
+class SuggestTestCase(CacheTestCase):
+    """Test /api/cars/suggest/ answered from the in-memory tries"""
+
+    def setUp(self):
+        super().setUp()
+        self.jeep = Brand.objects.create(name='Jeep')
+        self.cherokee = CarModel.objects.create(
+            brand=self.jeep, model_name='Grand Cherokee', daily_price=Decimal('90.00')
+        )
+        CarModel.objects.create(brand=self.jeep, model_name='Renegade', daily_price=Decimal('60.00'))
+        for n in range(3):
+            Car.objects.create(car_model=self.cherokee, license_plate=f'JEP-00{n}')
+        self.url = reverse('car-suggest')
+
+    def suggest(self, q):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, {'q': q})
+        return response.data['suggestions'], len(queries)
+
+    def test_01_prefix_of_any_word_with_counts(self):
+        """Brands and models match by word prefix and carry their car counts"""
+        suggestions, _ = self.suggest('j')
+        self.assertEqual(suggestions, [{'kind': 'brand', 'label': 'Jeep', 'count': 3}])
+
+        suggestions, _ = self.suggest('CHER')
+        self.assertEqual(suggestions, [{'kind': 'model', 'label': 'Grand Cherokee', 'count': 3}])
+        # Models without cars are not suggested
+        self.assertEqual(self.suggest('ren')[0], [])
+
+    def test_02_plates_for_staff_only(self):
+        """License plates are only suggested to staff"""
+        self.assertEqual(self.suggest('jep')[0], [])
+
+        staff = AppUser.objects.create_user(
+            email='staff@example.com', first_name='Staff', last_name='User',
+            password='Pass123!', birth_date=date(1990, 1, 1), is_staff=True
+        )
+        self.client.force_authenticate(staff)
+        labels = [s['label'] for s in self.suggest('jep')[0]]
+        self.assertEqual(labels, ['JEP-000', 'JEP-001', 'JEP-002'])
+
+    def test_03_local_writes_patch_tries_without_queries(self):
+        """New cars and renames show up without rebuilding from the database"""
+        self.suggest('j')
+        _, queries = self.suggest('j')
+        self.assertEqual(queries, 0)
+
+        Car.objects.create(car_model=self.cherokee, license_plate='JEP-003')
+        self.jeep.name = 'Jeep Motors'
+        self.jeep.save()
+
+        suggestions, queries = self.suggest('mot')
+        self.assertEqual(queries, 0)
+        self.assertEqual(suggestions, [{'kind': 'brand', 'label': 'Jeep Motors', 'count': 4}])
+        Car.objects.filter(license_plate='JEP-003').delete()
+        self.assertEqual(self.suggest('grand')[0][0]['count'], 3)
+
+    def test_04_other_worker_change_triggers_rebuild(self):
+        """A version bump from another process makes the next request rebuild"""
+        self.suggest('j')
+        Car.objects.bulk_create([Car(car_model=self.cherokee, license_plate='JEP-009')])
+        bump_version(VERSION_NAME)
+
+        suggestions, queries = self.suggest('j')
+        self.assertGreater(queries, 0)
+        self.assertEqual(suggestions[0]['count'], 4)
+
+    def test_05_query_whitespace_ignored_like_labels(self):
+        """Leading, trailing and repeated spaces match the same entries as single spaces"""
+        grand_cherokee = [{'kind': 'model', 'label': 'Grand Cherokee', 'count': 3}]
+        self.assertEqual(self.suggest('grand  cher')[0], grand_cherokee)
+        self.assertEqual(self.suggest(' cherokee')[0], grand_cherokee)
+        self.assertEqual(self.suggest('jeep ')[0], [{'kind': 'brand', 'label': 'Jeep', 'count': 3}])
@@ -1,25 +1,35 @@
 import logging
+from datetime import timedelta
 from django.shortcuts import render, redirect
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
+from django.db.models import Value
+from django.http import StreamingHttpResponse
 from django.utils import timezone
-from django.db.models import Q
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, status, viewsets, permissions
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound
 from rest_framework.response import Response
 from rest_framework_simplejwt.tokens import RefreshToken
-from .filters import CarFilter, ReservationFilter
-from .filters import CarFilter, ReservationFilter
+from .archive import archive_cutoff
+from .availability import (
+    CAR_VERSION_NAME, availability_index, next_windows, occupied_car_ids, parse_date_range
+)
+from .filters import CarFilter, ColumnOrderingFilter, ReservationFilter
+from .mixins import CachedLookupMixin, ConditionalGetMixin, QueryPlanMixin, ReadModelMixin, ValuesListMixin
+from .pagination import KeysetOrPageNumberPagination, StandardResultsSetPagination
+from . import facets, fleet, flexible, occupancy, pricing, search, search_cache, suggest
 from .permissions import IsReservationOwnerOrStaff, IsStaffPermission, IsStaffOrReadOnlyPermission 
 from .models import (
     AppUser, VehicleType, Brand, FuelType, Color, Transmission,
-    CarModel, Car, Reservation
+    CarModel, Car, CarSearch, Reservation, ArchivedReservation
 )
 from .serializers import (
     AppUserSerializer, VehicleTypeSerializer, BrandSerializer,
     FuelTypeSerializer, ColorSerializer, TransmissionSerializer,
-    CarModelSerializer, CarSerializer, ReservationSerializer, AppUserSignupSerializer
+    CarModelSerializer, CarSerializer, ReservationSerializer, AppUserSignupSerializer,
+    QuoteSerializer
 )
 
 
@@ -124,10 +134,12 @@ class IsOwnerOrStaffOrCreateOnly(permissions.BasePermission):
         return obj == request.user
 
 
-class AppUserViewSet(viewsets.ModelViewSet):
+class AppUserViewSet(QueryPlanMixin, viewsets.ModelViewSet):
     queryset = AppUser.objects.all()
     serializer_class = AppUserSerializer
     permission_classes = [IsOwnerOrStaffOrCreateOnly]
+    # Staff may ask for ?count=estimated on the unfiltered list
+    count_estimate_table = 'app_user'
 
     def get_serializer_class(self):
         if self.action == 'create':
@@ -244,108 +256,367 @@ class AppUserViewSet(viewsets.ModelViewSet):
         return Response({"detail": "Password updated successfully"})
 
 
-class VehicleTypeViewSet(viewsets.ModelViewSet):
+class VehicleTypeViewSet(ConditionalGetMixin, CachedLookupMixin, QueryPlanMixin, viewsets.ModelViewSet):
     """Admin-only CRUD for vehicle types"""
     queryset = VehicleType.objects.all()
     serializer_class = VehicleTypeSerializer
     permission_classes = [IsStaffOrReadOnlyPermission]
+    conditional_tables = ('vehicle_type',)
 
 
-class BrandViewSet(viewsets.ModelViewSet):
+class BrandViewSet(ConditionalGetMixin, CachedLookupMixin, QueryPlanMixin, viewsets.ModelViewSet):
     """Admin-only CRUD for brands"""
     queryset = Brand.objects.all()
     serializer_class = BrandSerializer
     permission_classes = [IsStaffOrReadOnlyPermission]
+    conditional_tables = ('brand',)
 
 
-class FuelTypeViewSet(viewsets.ModelViewSet):
+class FuelTypeViewSet(ConditionalGetMixin, CachedLookupMixin, QueryPlanMixin, viewsets.ModelViewSet):
     """Admin-only CRUD for fuel types"""
     queryset = FuelType.objects.all()
     serializer_class = FuelTypeSerializer
     permission_classes = [IsStaffOrReadOnlyPermission] 
+    conditional_tables = ('fuel_type',)
 
 
-class ColorViewSet(viewsets.ModelViewSet):
+class ColorViewSet(ConditionalGetMixin, CachedLookupMixin, QueryPlanMixin, viewsets.ModelViewSet):
     """Admin-only CRUD for colors"""
     queryset = Color.objects.all()
     serializer_class = ColorSerializer
     permission_classes = [IsStaffOrReadOnlyPermission]
+    conditional_tables = ('color',)
 
 
-class TransmissionViewSet(viewsets.ModelViewSet):
+class TransmissionViewSet(ConditionalGetMixin, CachedLookupMixin, QueryPlanMixin, viewsets.ModelViewSet):
     """Admin-only CRUD for transmissions"""
     queryset = Transmission.objects.all()
     serializer_class = TransmissionSerializer
     permission_classes = [IsStaffOrReadOnlyPermission]
+    conditional_tables = ('transmission',)
 
 
-class CarModelViewSet(viewsets.ModelViewSet):
-    """Admin-only CRUD for car models with optimized queries"""
-    queryset = CarModel.objects.select_related(
-        'brand', 'vehicle_type', 'fuel_type', 'transmission'
-    ).all()
+class CarModelViewSet(ConditionalGetMixin, ValuesListMixin, QueryPlanMixin, viewsets.ModelViewSet):
+    """Admin-only CRUD for car models (joins planned from the serializer)"""
+    queryset = CarModel.objects.all()
     serializer_class = CarModelSerializer
     permission_classes = [IsStaffOrReadOnlyPermission]
+    conditional_tables = ('car_model', 'brand', 'vehicle_type', 'fuel_type', 'transmission')
 
 
-class CarViewSet(viewsets.ModelViewSet):
+class CarViewSet(ConditionalGetMixin, ReadModelMixin, ValuesListMixin, QueryPlanMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing Car resources.
 
     Provides CRUD operations with:
-    - Optimized queryset using select_related
+    - list/facets filtered, sorted and paged on the car_search read model (ReadModelMixin)
+    - Joins and columns planned from CarSerializer (QueryPlanMixin)
+    - list() pages rendered from values() rows, same JSON as CarSerializer (ValuesListMixin)
+    - Conditional GET (ETag/Last-Modified) on detail and calendar (ConditionalGetMixin)
+    - Response cache for anonymous searches (search_cache)
     - Filtering, ordering, and unified keyword search
     - Availability filtering based on reservation dates
+    - Optional price quote per car for those dates (?quote=1)
     - Logging for create and delete actions
     """
 
-    # Base queryset optimized with select_related to reduce DB queries
-    queryset = Car.objects.select_related(
-        'car_model',
-        'car_model__brand',
-        'color'
-    ).all()
+    # select_related/only() are added by QueryPlanMixin from the serializer
+    queryset = Car.objects.all()
+    # Single-table filtering and sorting; see renting/car_search.py
+    read_model = CarSearch
+    read_model_actions = ('list', 'facets', 'flexible')
 
     serializer_class = CarSerializer
     permission_classes = [IsStaffOrReadOnlyPermission]
+    pagination_class = KeysetOrPageNumberPagination
+    # Detail responses are validated by ETag/Last-Modified; lists depend on availability
+    conditional_tables = ('car', 'car_model', 'brand', 'color', 'fuel_type', 'transmission', 'vehicle_type')
+    conditional_actions = ('retrieve', 'calendar')
+    # Longest window a calendar request may span
+    calendar_max_days = 366
+    # ?suggest_next=1: booked cars given a suggestion, at most
+    suggest_next_limit = 50
+    # Tables whose writes invalidate cached page counts (search/filters read lookup names)
+    count_cache_tables = ('car', 'car_model', 'brand', 'fuel_type', 'transmission', 'reservation', 'car_search')
 
     # Enable filtering and ordering backends
-    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, ColumnOrderingFilter]
     filterset_class = CarFilter
     ordering_fields = ['license_plate', 'car_model__daily_price', 'mileage']
+    # Public ordering names -> car_search columns
+    ordering_columns = {'car_model__daily_price': 'daily_price'}
 
     def get_queryset(self):
         """
-        Override base queryset to apply:
-        - Unified keyword search (Brand OR Model)
-        - Availability filtering by date range
-
-        Returns a filtered queryset based on query parameters.
+        Override base queryset to apply the unified keyword search (indexed,
+        relevance ordered). Availability by date range is filtered by
+        CarFilter, like the other list filters.
         """
         # Get the base queryset before filter backends are applied
         queryset = super().get_queryset()
 
-        # Unified keyword search across brand name and model name
+        # Unified keyword search (brand, model, type, fuel, transmission, color)
+        # through the search term index, ordered by relevance
         search_query = self.request.query_params.get('search', None)
         if search_query:
-            queryset = queryset.filter(
-                Q(car_model__brand__name__icontains=search_query) |
-                Q(car_model__model_name__icontains=search_query)
+            queryset = search.search_cars(queryset, search_query)
+
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        """
+        Anonymous searches are answered from the search cache when an identical
+        query ran since the last relevant catalog or reservation change.
+        Concurrent identical misses are computed once (single flight).
+        """
+        key = search_cache.response_key(request)
+        if key is None:
+            return super().list(request, *args, **kwargs)
+
+        response = None
+
+        def compute():
+            nonlocal response
+            response = super(CarViewSet, self).list(request, *args, **kwargs)
+            return response.data if response.status_code == status.HTTP_200_OK else None
+
+        data = search_cache.fetch(key, compute)
+        if response is not None:
+            return response
+        if data is None:
+            # The leader's result was not cacheable (e.g. invalid page)
+            return super().list(request, *args, **kwargs)
+        return Response(data)
+
+    def render_rows(self, rows):
+        """
+        With ?quote=1 and a valid availability window, each car also gets
+        `quote`: coverage, rate, days and total for the current user (standard
+        coverage when anonymous). Priced from the read model rows of the page,
+        so no query is added.
+        """
+        data = super().render_rows(rows)
+        if self.request.query_params.get('quote') not in ('1', 'true'):
+            return data
+
+        date_from, date_to = parse_date_range(
+            self.request.query_params.get('available_from'),
+            self.request.query_params.get('available_to'),
+        )
+        if date_from is None or date_from > date_to:
+            return data
+
+        user = self.request.user
+        quotes = pricing.quote_cars(
+            {row.pk: row.daily_price for row in rows},
+            user.birth_date if user.is_authenticated else None,
+            date_from, date_to,
+            vehicle_types={row.pk: row.vehicle_type_id for row in rows},
+            car_models={row.pk: row.car_model_id for row in rows},
+        )
+        rendered = dict(zip(quotes, QuoteSerializer(quotes.values(), many=True).data))
+        for item in data:
+            item['quote'] = rendered.get(item['id'])
+        return data
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        if self.action == 'list' and self.request.query_params.get('suggest_next') in ('1', 'true'):
+            suggestions = self.next_available()
+            if suggestions is not None:
+                response.data['next_available'] = suggestions
+        return response
+
+    def next_available(self):
+        """
+        With ?suggest_next=1 and a valid availability window: the cars matching
+        the search and other filters but booked in the window, each with its
+        earliest free window of the same length starting on or after
+        available_from, soonest first. Two queries whatever the number of cars.
+        """
+        params = self.request.query_params
+        date_from, date_to = parse_date_range(params.get('available_from'), params.get('available_to'))
+        if date_from is None or date_from > date_to:
+            return None
+        occupied = occupied_car_ids(date_from, date_to)
+        if not occupied:
+            return []
+
+        rows = self.read_model.objects.filter(id__in=occupied)
+        if params.get('search'):
+            rows = search.search_cars(rows, params['search'])
+        # The same filters, without the window that excluded these cars
+        data = params.copy()
+        for name in ('available_from', 'available_to'):
+            data.pop(name, None)
+        rows = self.filterset_class(data, queryset=rows, request=self.request).qs
+        plates = dict(rows.order_by().values_list('id', 'license_plate'))
+
+        windows = next_windows(plates, date_from, date_to)
+        soonest = sorted(windows.items(), key=lambda item: (item[1][0], plates[item[0]]))
+        return [
+            {'car': car_id, 'license_plate': plates[car_id], 'start_date': start, 'end_date': end}
+            for car_id, (start, end) in soonest[:self.suggest_next_limit]
+        ]
+
+    def get_conditional_names(self):
+        """The calendar depends on this car's reservations only"""
+        if self.action == 'calendar':
+            return (CAR_VERSION_NAME.format(self.kwargs.get('pk')), occupancy.REBUILD_VERSION_NAME)
+        return super().get_conditional_names()
+
+    @action(detail=True, methods=['get'], url_path='calendar')
+    def calendar(self, request, pk=None):
+        """
+        Booked date ranges of the car between `from` and `to` (inclusive),
+        merged, so forms can reject taken dates before posting a reservation.
+        Read from the occupancy bitmaps in one indexed query; the ETag changes
+        only when this car's reservations do.
+        """
+        return self.conditional_get(self.busy_calendar, request, pk=pk)
+
+    def busy_calendar(self, request, pk=None):
+        date_from, date_to = parse_date_range(request.query_params.get('from'), request.query_params.get('to'))
+        if date_from is None:
+            return Response(
+                {"error": "from and to are required dates (YYYY-MM-DD)"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if date_to < date_from or (date_to - date_from).days >= self.calendar_max_days:
+            return Response(
+                {"error": f"to must be on or after from, at most {self.calendar_max_days} days later"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            car_id = int(pk)
+        except (TypeError, ValueError):
+            raise NotFound()
+
+        ranges = occupancy.busy_ranges(car_id, date_from, date_to)
+        # Only a car without bookings in the window needs the existence check
+        if not ranges and not Car.objects.filter(pk=car_id).exists():
+            raise NotFound()
+        return Response({
+            'car': car_id,
+            'from': date_from,
+            'to': date_to,
+            'busy': [{'start_date': start, 'end_date': end} for start, end in ranges],
+        })
+
+    @action(detail=False, methods=['get'], url_path='matrix', permission_classes=[IsStaffPermission])
+    def matrix(self, request):
+        """
+        Staff: occupancy of every car for each day between `from` (default
+        today) and `to` (default 90 days), each car's row encoded as booked
+        runs or a base64 bitmap (`encoding=runs|bitmap`). Read in batches of
+        cars (one reservation query each) and streamed, so memory stays flat.
+        """
+        params = request.query_params
+        today = timezone.localdate()
+        date_from, date_to = parse_date_range(params.get('from') or today, params.get('to') or today)
+        if date_from is None:
+            return Response({"error": "from and to must be dates (YYYY-MM-DD)"}, status=status.HTTP_400_BAD_REQUEST)
+        if not params.get('to'):
+            date_to = date_from + timedelta(days=fleet.DEFAULT_DAYS - 1)
+        if date_to < date_from or (date_to - date_from).days >= fleet.MAX_DAYS:
+            return Response(
+                {"error": f"to must be on or after from, at most {fleet.MAX_DAYS} days later"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        # Archived reservations are not scanned: they all ended before the cutoff
+        cutoff = archive_cutoff()
+        if date_from < cutoff:
+            return Response(
+                {"error": f"from must be on or after {cutoff} (older reservations are archived)"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        encoding = params.get('encoding', 'runs')
+        if encoding not in fleet.ENCODINGS:
+            return Response(
+                {"error": f"encoding must be one of: {', '.join(fleet.ENCODINGS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        logger.info(f"Fleet matrix {date_from}..{date_to} ({encoding}) streamed to {request.user.email}")
+        return StreamingHttpResponse(fleet.stream(date_from, date_to, encoding), content_type='application/json')
+
+    @action(detail=False, methods=['get'], url_path='flexible', pagination_class=StandardResultsSetPagination)
+    def flexible(self, request):
+        """
+        Every free `days`-day window between `within_from` and `within_to` of
+        the cars matching the list filters and search, cheapest first, priced
+        as the reservation would be for the current user. Free windows come
+        from the in-memory availability index (sweep line per car).
+        """
+        params = request.query_params
+        within_from, within_to = parse_date_range(params.get('within_from'), params.get('within_to'))
+        if within_from is None:
+            return Response(
+                {"error": "within_from and within_to are required dates (YYYY-MM-DD)"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        range_days = (within_to - within_from).days + 1
+        if within_from < timezone.localdate() or not 0 < range_days <= flexible.MAX_RANGE_DAYS:
+            return Response(
+                {"error": f"The range must start today or later and span 1 to {flexible.MAX_RANGE_DAYS} days"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            days = int(params.get('days', ''))
+        except ValueError:
+            days = 0
+        if not 0 < days <= range_days:
+            return Response(
+                {"error": f"days must be a number from 1 to {range_days}"},
+                status=status.HTTP_400_BAD_REQUEST
             )
 
-        # Availability filtering: exclude cars with overlapping reservations
-        date_from = self.request.query_params.get('available_from', None)
-        date_to = self.request.query_params.get('available_to', None)
+        rows = {row.pk: row for row in self.filter_queryset(self.get_queryset()).order_by()}
+        user = request.user
+        windows = flexible.ranked_windows(
+            rows, availability_index.car_intervals(within_from, within_to), within_from, within_to, days,
+            user.birth_date if user.is_authenticated else None,
+        )
 
-        if date_from and date_to:
-            occupied_car_ids = Reservation.objects.filter(
-                start_date__lte=date_to,
-                end_date__gte=date_from
-            ).values_list('car_id', flat=True)
+        page = self.paginate_queryset(windows)
+        cars = {item['id']: item for item in self.render_objects(list({window[3]: None for window in page}))}
+        quotes = QuoteSerializer([window[4] for window in page], many=True).data
+        data = [
+            {
+                'car': cars.get(car_id),
+                'start_date': start,
+                'end_date': start + timedelta(days=days - 1),
+                'quote': quote,
+            }
+            for (_, start, _, car_id, _), quote in zip(page, quotes)
+        ]
+        return self.get_paginated_response(data)
+
+    @action(detail=False, methods=['get'], url_path='facets')
+    def facets(self, request):
+        """
+        Counts per filter option (brand, vehicle type, fuel, transmission,
+        seats, price bucket) for the cars matching the same parameters as the
+        list, availability window included. Cached like the list.
+        """
+        def compute():
+            return facets.facet_counts(self.filter_queryset(self.get_queryset()))
 
-            queryset = queryset.exclude(id__in=occupied_car_ids)
+        key = search_cache.response_key(request)
+        data = compute() if key is None else search_cache.fetch(key, compute)
+        return Response(data)
 
-        return queryset
+    @action(detail=False, methods=['get'], url_path='suggest')
+    def suggest(self, request):
+        """
+        Autocomplete for the search box: brands and models (license plates for
+        staff) starting with `q`, with their number of cars. Answered from
+        in-memory tries (renting/suggest.py).
+        """
+        suggestions = suggest.suggester.suggest(
+            request.query_params.get('q', ''), include_plates=request.user.is_staff
+        )
+        return Response({'suggestions': suggestions})
 
     def perform_create(self, serializer):
         """
@@ -362,13 +633,15 @@ class CarViewSet(viewsets.ModelViewSet):
         instance.delete()
 
 
-class ReservationViewSet(viewsets.ModelViewSet):
+class ReservationViewSet(QueryPlanMixin, viewsets.ModelViewSet):
     """Authenticated users manage reservations (own only, staff all)"""
-    queryset = Reservation.objects.select_related(
-        'user', 'car', 'car__car_model', 'car__car_model__brand'
-    ).all()
+    queryset = Reservation.objects.all()
     serializer_class = ReservationSerializer
     permission_classes = [permissions.IsAuthenticated, IsReservationOwnerOrStaff]
+    pagination_class = KeysetOrPageNumberPagination
+    count_cache_tables = ('reservation', 'app_user', 'car', 'reservation_archive')
+    count_estimate_table = 'reservation'
+    plan_only_actions = ('list', 'retrieve', 'my_reservations')
 
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_class = ReservationFilter
@@ -382,8 +655,17 @@ class ReservationViewSet(viewsets.ModelViewSet):
             return queryset.filter(user=self.request.user)
         return queryset
 
+    def get_count_cache_scope(self):
+        """Counts differ per user, and upcoming/past move with the date"""
+        owner = 'staff' if self.request.user.is_staff else self.request.user.pk
+        return [owner, str(timezone.now().date())]
+
     def perform_create(self, serializer):
-        """Auto-assign current user and log creation"""
+        """
+        Auto-assign current user and log creation.
+        Booking is atomic: save() claims the days under a lock on this car's
+        occupancy rows only, so concurrent requests cannot double-book.
+        """
         reservation = serializer.save(user=self.request.user)
         logger.info(
             f"Reservation created: user={reservation.user.email}, car={reservation.car.license_plate}"
@@ -412,7 +694,7 @@ class ReservationViewSet(viewsets.ModelViewSet):
         if status_param == 'upcoming':
             queryset = queryset.filter(start_date__gte=now)
         elif status_param == 'past':
-            queryset = queryset.filter(end_date__lt=now)
+            return self.past_with_archive(queryset.filter(end_date__lt=now), now)
         
         page = self.paginate_queryset(queryset)
         if page is not None:
@@ -422,6 +704,42 @@ class ReservationViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data)
 
+    def past_with_archive(self, queryset, today):
+        """
+        Past reservations from the live table and the archive as one list.
+        The archive gets the same user scope, filters and search; the union
+        is paged by page number only (a cursor cannot range-filter a union).
+        """
+        request = self.request
+        archived = ArchivedReservation.objects.filter(end_date__lt=today)
+        if not request.user.is_staff:
+            archived = archived.filter(user=request.user)
+        archived = ReservationFilter(request.query_params, queryset=archived, request=request).qs
+        archived = filters.SearchFilter().filter_queryset(request, archived, self)
+
+        columns = ('id', 'start_date', 'end_date')
+        ordering = [*(queryset.query.order_by or Reservation._meta.ordering), '-id']
+        rows = queryset.order_by().values(*columns).annotate(archived=Value(False)).union(
+            archived.order_by().values(*columns).annotate(archived=Value(True)), all=True,
+        ).order_by(*ordering)
+
+        paginator = StandardResultsSetPagination()
+        page = paginator.paginate_queryset(rows, request, view=self)
+        live_ids = [row['id'] for row in page if not row['archived']]
+        archived_ids = [row['id'] for row in page if row['archived']]
+        objects = {
+            (False, obj.id): obj for obj in self.get_queryset().filter(id__in=live_ids)
+        }
+        objects.update({
+            (True, obj.id): obj
+            for obj in ArchivedReservation.objects.select_related('user', 'car__car_model__brand').filter(
+                id__in=archived_ids
+            )
+        })
+        # Rows moved to the archive while paging are skipped
+        found = [objects[key] for key in ((row['archived'], row['id']) for row in page) if key in objects]
+        return paginator.get_paginated_response(self.get_serializer(found, many=True).data)
+
     @action(detail=True, methods=['delete'], url_path='delete-with-password')
     def delete_with_password(self, request, pk=None):
         """DELETE /api/reservations/{id}/delete-with-password/ - Secure deletion (Issue #62)"""
@@ -94,6 +94,28 @@ DATABASES = {
     }
 }
 
+# Cache
+# Version counters (ETags, availability, search, count and lookup caches) must
+# be seen by every server process: use Redis in production (REDIS_URL).
+# The process-local fallback is only trusted while a single process serves
+# requests (CACHE_SINGLE_PROCESS, default: DEBUG); otherwise those caches are
+# bypassed and every request reads the database.
+REDIS_URL = os.getenv('REDIS_URL')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+CACHE_SINGLE_PROCESS = os.getenv('CACHE_SINGLE_PROCESS', str(DEBUG)).lower() in ('1', 'true', 'yes')
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -159,4 +181,8 @@ SIMPLE_JWT = {
 }
 
 # for @login_required
-LOGIN_URL = 'login'
\ No newline at end of file
+LOGIN_URL = 'login'
+
+# Reservations that ended more than this many days ago are moved to the
+# archive table by `manage.py archive_reservations`
+RESERVATION_ARCHIVE_DAYS = 365